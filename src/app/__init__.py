@@ -1,9 +1,12 @@
 from flask import Flask, jsonify
 from marshmallow.exceptions import ValidationError
 from .extensions import db, ma, jwt
+from .utils.negotiation import NegotiatingJSONProvider, compress_response
 
 def create_app():
     app = Flask(__name__)
+    # Answer with MessagePack instead of JSON when the client's Accept header asks for it
+    app.json = NegotiatingJSONProvider(app)
     
     try:
         # Load configuration
@@ -14,8 +17,12 @@ def create_app():
         ma.init_app(app)
         jwt.init_app(app)
 
+        # Reject revoked tokens on every JWT-protected route
+        from .services.TokenRevocationService import TokenRevocationService
+        jwt.token_in_blocklist_loader(TokenRevocationService.is_revoked)
+
         # Import and register blueprints
-        from .routes import user_routes, dog_routes, recipe_routes, ingredient_routes, shopping_list_routes, search_routes, auth_routes
+        from .routes import user_routes, dog_routes, recipe_routes, ingredient_routes, shopping_list_routes, search_routes, auth_routes, meal_plan_routes, batch_routes
         app.register_blueprint(user_routes.bp)
         app.register_blueprint(dog_routes.bp)
         app.register_blueprint(recipe_routes.bp)
@@ -23,11 +30,16 @@ def create_app():
         app.register_blueprint(shopping_list_routes.bp)
         app.register_blueprint(search_routes.bp)
         app.register_blueprint(auth_routes.bp)
+        app.register_blueprint(meal_plan_routes.bp)
+        app.register_blueprint(batch_routes.bp)
         
         # Register CLI commands
         from .controllers.cli_controller import db_commands
         app.register_blueprint(db_commands)
 
+        # Compress large responses for clients that accept gzip or brotli
+        app.after_request(compress_response)
+
         # Error handlers
         @app.errorhandler(ValidationError)
         def validation_error(err):
@@ -76,6 +76,24 @@ def seed_tables():
         db.session.rollback()
         print(f"An error occurred during seeding: {str(e)}")
 
+@db_commands.cli.command("recount")
+def recount_users():
+    try:
+        # Recompute every user's dog and recipe counters with one set-based UPDATE
+        # This backfills the counters for existing databases and repairs any drift
+        db.session.execute(
+            db.update(User).values(
+                dog_count=db.select(db.func.count(Dog.id)).where(Dog.user_id == User.id).scalar_subquery(),
+                recipe_count=db.select(db.func.count(Recipe.id)).where(Recipe.user_id == User.id).scalar_subquery()
+            ),
+            execution_options={"synchronize_session": False}
+        )
+        db.session.commit()
+        print("User counters recomputed successfully")
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        print(f"An error occurred while recomputing user counters: {str(e)}")
+
 @db_commands.cli.command("reset")
 def reset_db():
     try:
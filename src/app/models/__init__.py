@@ -4,3 +4,9 @@ from .recipe import Recipe
 from .ingredient import Ingredient
 from .recipe_ingredient import RecipeIngredient
 from .dog_recipe import dog_recipe
+from .tombstone import Tombstone
+from .meal_plan import MealPlan
+from .feeding import Feeding, FeedingRollup
+from .weight import WeightSample, WeightRollup
+from .idempotency_key import IdempotencyKey
+from .revoked_token import RevokedToken
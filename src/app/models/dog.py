@@ -1,4 +1,7 @@
 from ..extensions import db
+from .tombstone import record_tombstone
+from .user import adjust_user_counters
+from .weight import queue_weight_change
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 
@@ -11,6 +14,8 @@ class Dog(db.Model):
     profile_image = db.Column(db.String(255))
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     age = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     # Relationship: Many-to-Many with Recipe model
     # This relationship allows easy access to all recipes associated with this dog
@@ -38,4 +43,15 @@ class Dog(db.Model):
 
 # Event listeners to automatically update the dog's age before inserting or updating
 db.event.listen(Dog, 'before_insert', lambda mapper, connection, target: target.calculate_age())
-db.event.listen(Dog, 'before_update', lambda mapper, connection, target: target.calculate_age())
\ No newline at end of file
+db.event.listen(Dog, 'before_update', lambda mapper, connection, target: target.calculate_age())
+
+# Event listener to record a tombstone so deletions show up in the change feed
+db.event.listen(Dog, 'after_delete', lambda mapper, connection, target: record_tombstone(connection, 'dog', target))
+
+# Event listeners to keep the owner's dog counter and last activity current
+db.event.listen(Dog, 'after_insert', lambda mapper, connection, target: adjust_user_counters(target, dogs=1))
+db.event.listen(Dog, 'after_update', lambda mapper, connection, target: adjust_user_counters(target))
+db.event.listen(Dog, 'after_delete', lambda mapper, connection, target: adjust_user_counters(target, dogs=-1))
+# Event listeners to keep every weigh-in in the weight history, not just the latest weight
+db.event.listen(Dog, 'after_insert', lambda mapper, connection, target: queue_weight_change(target))
+db.event.listen(Dog, 'after_update', lambda mapper, connection, target: queue_weight_change(target))
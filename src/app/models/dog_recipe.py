@@ -4,7 +4,7 @@ from ..extensions import db
 # This table doesn't have its own model class as it's a simple junction table
 dog_recipe = db.Table('dog_recipe',
     # Foreign key referencing the Dog model's id
-    db.Column('dog_id', db.Integer, db.ForeignKey('dog.id'), primary_key=True),
+    db.Column('dog_id', db.Integer, db.ForeignKey('dog.id', ondelete='CASCADE'), primary_key=True),
     # Foreign key referencing the Recipe model's id
-    db.Column('recipe_id', db.Integer, db.ForeignKey('recipe.id'), primary_key=True)
+    db.Column('recipe_id', db.Integer, db.ForeignKey('recipe.id', ondelete='CASCADE'), primary_key=True)
 )
\ No newline at end of file
@@ -0,0 +1,57 @@
+from ..extensions import db
+from datetime import datetime
+
+class Feeding(db.Model):
+    """
+    One meal fed to a dog.
+
+    Feedings are append-only events: they are inserted in batches and never updated.
+    The macros are worked out from the recipe when the feeding is recorded, so later
+    edits to the recipe don't rewrite what the dog actually ate.
+    """
+    __tablename__ = 'feeding'
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    dog_id = db.Column(db.Integer, db.ForeignKey('dog.id', ondelete='CASCADE'), nullable=False)
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipe.id', ondelete='SET NULL'))
+    fed_at = db.Column(db.DateTime, nullable=False)
+    grams = db.Column(db.Float, nullable=False)
+    calories = db.Column(db.Float, nullable=False, default=0)
+    protein = db.Column(db.Float, nullable=False, default=0)
+    fat = db.Column(db.Float, nullable=False, default=0)
+    carbohydrates = db.Column(db.Float, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    # Every read is one dog's feedings over a time window, in time order
+    __table_args__ = (
+        db.Index('ix_feeding_dog_id_fed_at', 'dog_id', 'fed_at'),
+    )
+
+    def __repr__(self):
+        return f'<Feeding {self.id} for dog {self.dog_id}>'
+
+class FeedingRollup(db.Model):
+    """
+    Precomputed feeding totals for one dog over one day or one week.
+
+    Rollups are incremented in the same transaction that appends the feedings,
+    so history charts read a handful of rollup rows instead of scanning every feeding.
+    """
+    __tablename__ = 'feeding_rollup'
+    id = db.Column(db.Integer, primary_key=True)
+    dog_id = db.Column(db.Integer, db.ForeignKey('dog.id', ondelete='CASCADE'), nullable=False)
+    # 'day' or 'week'; weeks start on Monday
+    period = db.Column(db.String(4), nullable=False)
+    period_start = db.Column(db.Date, nullable=False)
+    feedings = db.Column(db.Integer, nullable=False, default=0)
+    grams = db.Column(db.Float, nullable=False, default=0)
+    calories = db.Column(db.Float, nullable=False, default=0)
+    protein = db.Column(db.Float, nullable=False, default=0)
+    fat = db.Column(db.Float, nullable=False, default=0)
+    carbohydrates = db.Column(db.Float, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('dog_id', 'period', 'period_start', name='uq_feeding_rollup_dog_period_start'),
+    )
+
+    def __repr__(self):
+        return f'<FeedingRollup {self.period} {self.period_start} for dog {self.dog_id}>'
@@ -0,0 +1,33 @@
+from ..extensions import db
+from datetime import datetime
+
+class IdempotencyKey(db.Model):
+    """
+    The stored response of a POST request sent with an 'Idempotency-Key' header.
+
+    A row is claimed (with no status yet) before the request runs and completed with the
+    response afterwards, so a retry with the same key replays the response instead of
+    running the request again. A claim left without a response for IDEMPOTENCY_CLAIM_TIMEOUT
+    can be taken over by a retry. Rows expire after IDEMPOTENCY_KEY_TTL.
+    """
+    __tablename__ = 'idempotency_key'
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(255), nullable=False)
+    # The authenticated user, or 0 for requests without a token such as registration
+    # There is deliberately no foreign key, so a replay still works after the user is deleted
+    user_id = db.Column(db.Integer, nullable=False, default=0)
+    # SHA-256 of the method, path and body, so a key reused for a different request is rejected
+    fingerprint = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer)
+    mimetype = db.Column(db.String(100))
+    body = db.Column(db.LargeBinary)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    # When the request running for this key claimed it; moved on when a retry takes over a stale claim
+    claimed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'key', name='uq_idempotency_key_user_id_key'),
+    )
+
+    def __repr__(self):
+        return f'<IdempotencyKey {self.key} for user {self.user_id}>'
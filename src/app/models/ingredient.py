@@ -1,3 +1,6 @@
+import time
+from datetime import datetime
+from sqlalchemy.orm import Session, object_session
 from ..extensions import db
 
 class Ingredient(db.Model):
@@ -11,8 +14,62 @@ class Ingredient(db.Model):
     fiber = db.Column(db.Float)
     vitamins = db.Column(db.JSON)
     minerals = db.Column(db.JSON)
+    # Moved by every insert and update, so other processes can tell the catalog changed (see catalog_version)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationship: One-to-Many with RecipeIngredient model
     # This relationship allows easy access to all recipes that use this ingredient
     # The 'cascade' parameter ensures that when an ingredient is deleted, its associations are also deleted
-    recipe_ingredients = db.relationship('RecipeIngredient', back_populates='ingredient', cascade="all, delete-orphan")
\ No newline at end of file
+    recipe_ingredients = db.relationship('RecipeIngredient', back_populates='ingredient', cascade="all, delete-orphan")
+
+# Version of the ingredient catalog
+# Structures derived from the catalog (such as the nutrient matrix) store the version they were
+# built from and rebuild once it moves on. The version is bumped when a transaction that wrote
+# ingredients commits in this process, so nothing can be rebuilt from data that is later rolled
+# back. Writes from other processes, such as the 'flask db seed' command, are noticed by
+# comparing the number of ingredients and their latest 'updated_at' with the last values seen,
+# at most once every CATALOG_CHECK_INTERVAL seconds.
+CATALOG_CHECK_INTERVAL = 10
+
+_catalog = {'version': 0, 'stamp': None, 'checked_at': None}
+
+def catalog_version():
+    """
+    Return the current version of the ingredient catalog.
+
+    Returns:
+        int: A number that increases every time a change to any ingredient is committed,
+        straight away for changes made by this process and within CATALOG_CHECK_INTERVAL
+        seconds for changes made by other processes.
+    """
+    now = time.monotonic()
+    if _catalog['checked_at'] is None or now - _catalog['checked_at'] >= CATALOG_CHECK_INTERVAL:
+        # Query to retrieve the size and the latest change of the catalog
+        # A deletion changes the count, an insert or update moves the latest 'updated_at'
+        stamp = tuple(db.session.execute(
+            db.select(db.func.count(Ingredient.id), db.func.max(Ingredient.updated_at))
+        ).one())
+        if _catalog['stamp'] is not None and stamp != _catalog['stamp']:
+            _catalog['version'] += 1
+        _catalog['stamp'] = stamp
+        _catalog['checked_at'] = now
+    return _catalog['version']
+
+def _mark_catalog_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info['ingredient_catalog_changed'] = True
+
+def _bump_catalog_version(session):
+    if session.info.pop('ingredient_catalog_changed', False):
+        _catalog['version'] += 1
+        # The stamp is read again on the next call, without counting this change twice
+        _catalog['stamp'] = None
+        _catalog['checked_at'] = None
+
+# Event listeners to track ingredient writes and bump the catalog version on commit
+db.event.listen(Ingredient, 'after_insert', _mark_catalog_changed)
+db.event.listen(Ingredient, 'after_update', _mark_catalog_changed)
+db.event.listen(Ingredient, 'after_delete', _mark_catalog_changed)
+db.event.listen(Session, 'after_commit', _bump_catalog_version)
+db.event.listen(Session, 'after_rollback', lambda session: session.info.pop('ingredient_catalog_changed', None))
@@ -0,0 +1,20 @@
+from ..extensions import db
+from datetime import datetime
+
+class MealPlan(db.Model):
+    __tablename__ = 'meal_plan'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
+    start_date = db.Column(db.Date, nullable=False)
+    days = db.Column(db.Integer, nullable=False)
+    activity = db.Column(db.String(10), nullable=False, default='normal')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # The generated plan and shopping list are stored as they were returned
+    # A plan is a snapshot, so fetching it again is a single row read with no recomputation,
+    # and later changes to the dogs or recipes don't rewrite plans that were already made
+    plan = db.Column(db.JSON, nullable=False)
+    shopping_list = db.Column(db.JSON, nullable=False)
+
+    def __repr__(self):
+        return f'<MealPlan {self.id} for user {self.user_id}>'
@@ -1,4 +1,8 @@
+from sqlalchemy.orm import Session, object_session
 from ..extensions import db
+from .tombstone import record_tombstone
+from .user import adjust_user_counters
+from ..utils.units import nutrient_amount
 from datetime import datetime
 
 class Recipe(db.Model):
@@ -8,14 +12,15 @@ class Recipe(db.Model):
     instructions = db.Column(db.Text)
     is_public = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
     # Relationships
     # Relationship: One-to-Many with RecipeIngredient model
     # This relationship allows easy access to all ingredients in this recipe
     # The 'cascade' parameter ensures that when a recipe is deleted, its ingredients are also deleted
-    ingredients = db.relationship('RecipeIngredient', back_populates='recipe', cascade="all, delete-orphan")
+    # 'passive_deletes' leaves that to the ON DELETE CASCADE foreign key instead of loading every row first
+    ingredients = db.relationship('RecipeIngredient', back_populates='recipe', cascade="all, delete-orphan", passive_deletes=True)
 
     # Relationship: Many-to-Many with Dog model
     # This relationship allows easy access to all dogs associated with this recipe
@@ -27,39 +32,45 @@ class Recipe(db.Model):
         """
         Calculate the total calories for the recipe.
         
-        This property sums the calories of each ingredient, multiplied by its quantity.
+        This property sums the calories supplied by each ingredient line: its value per 100 g
+        times the line's mass in grams, divided by 100 (see app/utils/units.py). Lines in units
+        without a mass are left out.
         It iterates through all RecipeIngredient objects associated with this recipe.
         
         Returns:
             float: The total calories of the recipe.
         """
-        return sum(ri.ingredient.calories * ri.quantity for ri in self.ingredients)
+        return sum(nutrient_amount(ri.ingredient.calories, ri.quantity, ri.unit) for ri in self.ingredients)
 
     @property
     def total_protein(self):
         """
         Calculate the total protein content for the recipe.
         
-        This property sums the protein content of each ingredient, multiplied by its quantity.
+        This property sums the protein content supplied by each ingredient line: its value per 100 g
+        times the line's mass in grams, divided by 100 (see app/utils/units.py). Lines in units
+        without a mass are left out.
         It iterates through all RecipeIngredient objects associated with this recipe.
         
         Returns:
             float: The total protein content of the recipe.
         """
-        return sum(ri.ingredient.protein * ri.quantity for ri in self.ingredients)
+        return sum(nutrient_amount(ri.ingredient.protein, ri.quantity, ri.unit) for ri in self.ingredients)
 
     @property
     def total_fat(self):
         """
         Calculate the total fat content for the recipe.
         
-        This property sums the fat content of each ingredient, multiplied by its quantity.
+        This property sums the fat content supplied by each ingredient line: its value per 100 g
+        times the line's mass in grams, divided by 100 (see app/utils/units.py). Lines in units
+        without a mass are left out.
         It iterates through all RecipeIngredient objects associated with this recipe.
         
         Returns:
             float: The total fat content of the recipe.
         """
-        return sum(ri.ingredient.fat * ri.quantity for ri in self.ingredients)
+        return sum(nutrient_amount(ri.ingredient.fat, ri.quantity, ri.unit) for ri in self.ingredients)
 
     @property
     def dog_ids(self):
@@ -72,4 +83,62 @@ class Recipe(db.Model):
         Returns:
             list: A list of dog IDs associated with the recipe.
         """
-        return [dog.id for dog in self.dogs]
\ No newline at end of file
+        return [dog.id for dog in self.dogs]
+
+def _record_unpublished(mapper, connection, target):
+    """
+    Record a tombstone when a public recipe is made private.
+
+    Other users lose sight of the recipe, so their change feed has to report it as deleted
+    even though the row still exists.
+    """
+    history = db.inspect(target).attrs.is_public.history
+    if history.deleted and history.deleted[0] and not target.is_public:
+        record_tombstone(connection, 'recipe', target, is_public=True)
+
+# Event listeners to record a tombstone so deletions and recipes made private show up in the change feed
+db.event.listen(Recipe, 'after_delete', lambda mapper, connection, target: record_tombstone(connection, 'recipe', target, target.is_public))
+db.event.listen(Recipe, 'after_update', _record_unpublished)
+
+# Event listeners to keep the owner's recipe counter and last activity current
+db.event.listen(Recipe, 'after_insert', lambda mapper, connection, target: adjust_user_counters(target, recipes=1))
+db.event.listen(Recipe, 'after_update', lambda mapper, connection, target: adjust_user_counters(target))
+db.event.listen(Recipe, 'after_delete', lambda mapper, connection, target: adjust_user_counters(target, recipes=-1))
+
+# In-process generation of the recipe table
+# In-memory indexes over recipes compare the generation they last saw with this one to know
+# whether anything changed. Like the ingredient catalog version, it is bumped when a transaction
+# that wrote recipes commits, including set-based UPDATE and DELETE statements that bypass the
+# mapper events (bulk deletes, touching 'updated_at' when dog links change).
+_recipes = {'generation': 0}
+
+def recipe_generation():
+    """
+    Return the current generation of the recipe table.
+
+    Returns:
+        int: A number that increases every time a change to any recipe is committed.
+    """
+    return _recipes['generation']
+
+def _mark_recipes_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info['recipes_changed'] = True
+
+def _mark_bulk_recipe_write(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        if orm_execute_state.bind_mapper is Recipe.__mapper__:
+            orm_execute_state.session.info['recipes_changed'] = True
+
+def _bump_recipe_generation(session):
+    if session.info.pop('recipes_changed', False):
+        _recipes['generation'] += 1
+
+# Event listeners to track recipe writes and bump the generation on commit
+db.event.listen(Recipe, 'after_insert', _mark_recipes_changed)
+db.event.listen(Recipe, 'after_update', _mark_recipes_changed)
+db.event.listen(Recipe, 'after_delete', _mark_recipes_changed)
+db.event.listen(Session, 'do_orm_execute', _mark_bulk_recipe_write)
+db.event.listen(Session, 'after_commit', _bump_recipe_generation)
+db.event.listen(Session, 'after_rollback', lambda session: session.info.pop('recipes_changed', None))
@@ -0,0 +1,23 @@
+from ..extensions import db
+from datetime import datetime
+
+class RevokedToken(db.Model):
+    """
+    A revoked access token, or every token of a user issued before a revoke-all.
+
+    A row with a 'jti' revokes that one token (logout). A row without a 'jti' revokes every
+    token of 'user_id' whose generation claim is below 'generation' (revoke all). Rows are
+    only needed until the tokens they revoke would have expired anyway, which is 'expires_at'.
+    """
+    __tablename__ = 'revoked_token'
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True)
+    # There is deliberately no foreign key, so revocations outlive a deleted user's row
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # The user's token generation after a revoke-all; None for a single revoked token
+    generation = db.Column(db.Integer)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<RevokedToken {self.jti or "all"} for user {self.user_id}>'
@@ -0,0 +1,42 @@
+from ..extensions import db
+from datetime import datetime
+
+class Tombstone(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    # The owner and visibility are copied from the deleted row so the change feed
+    # can still apply the usual access rules once the row itself is gone
+    # There is deliberately no foreign key on user_id, the owner may be deleted too
+    user_id = db.Column(db.Integer, nullable=False)
+    is_public = db.Column(db.Boolean, default=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    # Change feeds always filter on the entity type and a time window
+    __table_args__ = (
+        db.Index('ix_tombstone_entity_type_deleted_at', 'entity_type', 'deleted_at'),
+    )
+
+    def __repr__(self):
+        return f'<Tombstone {self.entity_type}:{self.entity_id}>'
+
+def record_tombstone(connection, entity_type, target, is_public=False):
+    """
+    Insert a tombstone row for a deleted entity.
+
+    This is called from 'after_delete' mapper events, so it writes through the flush
+    connection instead of the session.
+
+    Args:
+        connection: The connection used by the current flush.
+        entity_type (str): Either 'recipe' or 'dog'.
+        target: The deleted model instance.
+        is_public (bool): Whether the deleted entity was publicly visible.
+    """
+    connection.execute(Tombstone.__table__.insert().values(
+        entity_type=entity_type,
+        entity_id=target.id,
+        user_id=target.user_id,
+        is_public=bool(is_public),
+        deleted_at=datetime.utcnow()
+    ))
@@ -1,4 +1,6 @@
+from sqlalchemy.orm import Session, object_session
 from ..extensions import db
+from datetime import datetime
 import bcrypt
 
 class User(db.Model):
@@ -9,6 +11,17 @@ class User(db.Model):
     password_hash = db.Column(db.String(128))
     is_admin = db.Column(db.Boolean, default=False)
 
+    # Precomputed activity counters for the admin user listing
+    # They are kept current by the Dog and Recipe event listeners (see adjust_user_counters)
+    # and indexed so the listing can sort and filter on them without counting rows per user
+    dog_count = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
+    recipe_count = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
+    last_active_at = db.Column(db.DateTime, index=True)
+
+    # Bumped by every revoke-all; access tokens carry the generation they were issued in,
+    # and those from an earlier generation are rejected (see TokenRevocationService)
+    token_generation = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
     # Relationship: One-to-Many with Dog model
     # This relationship allows easy access to all dogs owned by this user
     # The 'lazy' parameter set to 'dynamic' returns a query object instead of loading all dogs at once
@@ -46,4 +59,53 @@ class User(db.Model):
         return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
 
     def __repr__(self):
-        return f'<User {self.username}>'
\ No newline at end of file
+        return f'<User {self.username}>'
+
+def adjust_user_counters(target, dogs=0, recipes=0):
+    """
+    Queue a change to the owner's dog and recipe counters and record their latest activity.
+
+    This is called from mapper events on Dog and Recipe. The changes of every row in a
+    flush are added up per user in 'session.info' and written by _apply_user_counters once
+    the flush is done, so a batch of 50 dogs costs one UPDATE of its owner, not 50.
+
+    Args:
+        target: The Dog or Recipe that was inserted, updated or deleted.
+        dogs (int): The change in the number of dogs.
+        recipes (int): The change in the number of recipes.
+    """
+    session = object_session(target)
+    if session is None:
+        return
+    deltas = session.info.setdefault('user_counter_deltas', {})
+    delta = deltas.setdefault(target.user_id, [0, 0])
+    delta[0] += dogs
+    delta[1] += recipes
+
+def _apply_user_counters(session, flush_context):
+    """
+    Write the counter changes queued during a flush, with one relative UPDATE per user.
+
+    The UPDATE runs on the flush's connection, inside the same transaction as the rows it counts.
+    """
+    deltas = session.info.pop('user_counter_deltas', None)
+    if not deltas:
+        return
+    table = User.__table__
+    session.connection().execute(
+        table.update()
+        .where(table.c.id == db.bindparam('owner_id'))
+        .values(
+            dog_count=table.c.dog_count + db.bindparam('dogs'),
+            recipe_count=table.c.recipe_count + db.bindparam('recipes'),
+            last_active_at=db.bindparam('active_at')
+        ),
+        [
+            {'owner_id': user_id, 'dogs': dogs, 'recipes': recipes, 'active_at': datetime.utcnow()}
+            for user_id, (dogs, recipes) in deltas.items()
+        ]
+    )
+
+# Event listeners to apply the queued counter changes after every flush
+db.event.listen(Session, 'after_flush', _apply_user_counters)
+db.event.listen(Session, 'after_rollback', lambda session: session.info.pop('user_counter_deltas', None))
@@ -0,0 +1,127 @@
+from sqlalchemy.orm import Session, object_session
+from ..extensions import db
+from ..utils.rollups import upsert_rollups
+from datetime import datetime, timedelta
+
+# Downsampled resolutions kept for every dog, finest first; weeks start on Monday
+WEIGHT_RESOLUTIONS = ('day', 'week', 'month')
+
+def period_start(resolution, day):
+    """
+    Return the first day of the period at a resolution that contains a date.
+    """
+    if resolution == 'week':
+        return day - timedelta(days=day.weekday())
+    if resolution == 'month':
+        return day.replace(day=1)
+    return day
+
+class WeightSample(db.Model):
+    """
+    One weigh-in of a dog. Dog.weight keeps the latest value, the samples keep the history.
+    """
+    __tablename__ = 'weight_sample'
+    id = db.Column(db.Integer, primary_key=True)
+    dog_id = db.Column(db.Integer, db.ForeignKey('dog.id', ondelete='CASCADE'), nullable=False)
+    measured_at = db.Column(db.DateTime, nullable=False)
+    weight = db.Column(db.Float, nullable=False)
+
+    # Every read is one dog's samples over a time window, in time order
+    __table_args__ = (
+        db.Index('ix_weight_sample_dog_id_measured_at', 'dog_id', 'measured_at'),
+    )
+
+    def __repr__(self):
+        return f'<WeightSample {self.weight} for dog {self.dog_id} at {self.measured_at}>'
+
+class WeightRollup(db.Model):
+    """
+    The weigh-ins of one dog aggregated over one day, week or month.
+
+    Rollups are updated as samples are recorded, so a long range is charted from a few
+    hundred rollup rows at a coarser resolution instead of from every sample.
+    """
+    __tablename__ = 'weight_rollup'
+    id = db.Column(db.Integer, primary_key=True)
+    dog_id = db.Column(db.Integer, db.ForeignKey('dog.id', ondelete='CASCADE'), nullable=False)
+    resolution = db.Column(db.String(5), nullable=False)
+    period_start = db.Column(db.Date, nullable=False)
+    samples = db.Column(db.Integer, nullable=False, default=0)
+    weight_sum = db.Column(db.Float, nullable=False, default=0)
+    weight_min = db.Column(db.Float, nullable=False)
+    weight_max = db.Column(db.Float, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('dog_id', 'resolution', 'period_start', name='uq_weight_rollup_dog_resolution_start'),
+    )
+
+    def __repr__(self):
+        return f'<WeightRollup {self.resolution} {self.period_start} for dog {self.dog_id}>'
+
+def record_weights(connection, weigh_ins):
+    """
+    Record a batch of weigh-ins and fold them into the dogs' rollups at every resolution.
+
+    The samples are written with one multi-row INSERT. They are added up per dog, resolution
+    and period in memory first, then folded into the rollups with a single upsert (see
+    upsert_rollups), so a batch costs two statements however many dogs and periods it
+    touches, and concurrent writes creating the same period don't collide.
+
+    Args:
+        connection: The connection used by the current flush or session.
+        weigh_ins (list): (dog_id, weight in kg, measured_at in UTC or None for now) tuples.
+    """
+    if not weigh_ins:
+        return
+    now = datetime.utcnow()
+    samples = [
+        {'dog_id': dog_id, 'weight': float(weight), 'measured_at': measured_at or now}
+        for dog_id, weight, measured_at in weigh_ins
+    ]
+    connection.execute(WeightSample.__table__.insert(), samples)
+
+    rollups = {}
+    for sample in samples:
+        weight = sample['weight']
+        for resolution in WEIGHT_RESOLUTIONS:
+            key = (sample['dog_id'], resolution, period_start(resolution, sample['measured_at'].date()))
+            rollup = rollups.get(key)
+            if rollup is None:
+                rollups[key] = {
+                    'dog_id': key[0], 'resolution': resolution, 'period_start': key[2],
+                    'samples': 1, 'weight_sum': weight, 'weight_min': weight, 'weight_max': weight
+                }
+            else:
+                rollup['samples'] += 1
+                rollup['weight_sum'] += weight
+                rollup['weight_min'] = min(rollup['weight_min'], weight)
+                rollup['weight_max'] = max(rollup['weight_max'], weight)
+
+    upsert_rollups(
+        connection,
+        WeightRollup.__table__,
+        ('dog_id', 'resolution', 'period_start'),
+        list(rollups.values()),
+        {'samples': 'sum', 'weight_sum': 'sum', 'weight_min': 'min', 'weight_max': 'max'}
+    )
+
+def queue_weight_change(target):
+    """
+    Queue a weigh-in when a dog is created or its weight is changed.
+
+    This is called from mapper events on Dog. The weigh-ins of every dog in a flush are
+    collected in 'session.info' and written together by _record_queued_weights once the
+    flush is done, so creating a batch of dogs doesn't cost statements per dog.
+    """
+    if not db.inspect(target).attrs.weight.history.has_changes():
+        return
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('weigh_ins', []).append((target.id, target.weight, None))
+
+def _record_queued_weights(session, flush_context):
+    record_weights(session.connection(), session.info.pop('weigh_ins', None))
+
+# Event listeners to write the queued weigh-ins after every flush
+db.event.listen(Session, 'after_flush', _record_queued_weights)
+db.event.listen(Session, 'after_rollback', lambda session: session.info.pop('weigh_ins', None))
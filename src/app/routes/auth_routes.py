@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import get_jwt
 from app.utils.validators import validate_username, validate_password, validate_and_sanitize_email, sanitize_string, validate_is_admin
-from app.utils.route_helpers import handle_errors, validate_request_data
+from app.utils.route_helpers import handle_errors, validate_request_data, jwt_required
+from app.utils.idempotency import idempotent
+from app.services.TokenRevocationService import TokenRevocationService
 from app import db
 from ..schemas.user_schema import user_schema
 import sqlalchemy
@@ -30,6 +33,7 @@ def login():
 
 @bp.route('/register', methods=['POST'])
 @handle_errors
+@idempotent
 def register():
     try:
         username = sanitize_string(request.json.get('username'))
@@ -75,4 +79,13 @@ def register():
             return jsonify({"error": "An error occurred while creating the user."}), 400
     except Exception as e:
         db.session.rollback()
-        return jsonify({"error": "An unexpected error occurred", "details": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": "An unexpected error occurred", "details": str(e)}), 500
+
+@bp.route('/logout', methods=['POST'])
+@jwt_required()
+@handle_errors
+def logout():
+    # Add the token's jti to the revocation list, so it is rejected from now on
+    # See TokenRevocationService.py for how revoked tokens are checked without a query per request
+    TokenRevocationService.revoke(get_jwt())
+    return jsonify({"message": "Logged out successfully"}), 200
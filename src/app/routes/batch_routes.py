@@ -0,0 +1,38 @@
+from flask import Blueprint, request, jsonify, current_app, g
+from flask_jwt_extended import get_jwt_identity
+from app.models.user import User
+from app.utils.route_helpers import handle_errors, jwt_required, COMPOSITE_VERIFIED
+from app.utils.validators import validate_user_id
+from app.services.CompositeRequestService import CompositeRequestService
+
+bp = Blueprint('batch', __name__)
+
+@bp.route('/batch', methods=['POST'])
+@jwt_required()
+@handle_errors
+def execute_batch():
+    current_user_id = get_jwt_identity()
+    if not validate_user_id(current_user_id):
+        return jsonify({"error": "Invalid user_id. Must be a positive integer."}), 400
+    # Query to retrieve the current user
+    # This query loads the User object into the shared session once, so the sub-requests
+    # that run in this session find it in the identity map instead of querying again
+    current_user = User.query.get_or_404(current_user_id)
+
+    # Example request body:
+    # {"requests": [{"id": "dogs", "method": "GET", "path": "/dogs/"},
+    #               {"id": "list", "method": "GET", "path": "/shopping-list/?recipe_ids=1&recipe_ids=2"}]}
+    data = request.json
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be an object with a 'requests' list.")
+    sub_requests = CompositeRequestService.parse(data.get('requests'), current_app.config['MAX_COMPOSITE_REQUESTS'])
+
+    # The token was verified once for this request; every sub-request runs as the same user
+    # with the claims left on g, instead of decoding and checking the token again
+    setattr(g, COMPOSITE_VERIFIED, True)
+    headers = {'Authorization': request.headers['Authorization']}
+    try:
+        responses = CompositeRequestService.execute(sub_requests, headers)
+    finally:
+        g.pop(COMPOSITE_VERIFIED, None)
+    return jsonify({"user_id": current_user.id, "responses": responses}), 200
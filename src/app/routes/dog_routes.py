@@ -1,21 +1,85 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app import db
 from app.models.dog import Dog
 from ..schemas.dog_schema import dog_schema, dogs_schema
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import get_jwt_identity
 from app.utils.validators import (
     validate_date_of_birth, validate_weight, validate_dog_name_or_breed, 
     validate_profile_image_url, validate_user_id, sanitize_string, validate_date_format, validate_url
 )
 from app.models.user import User
+from app.models.tombstone import Tombstone
+from app.services.SyncService import SyncService
+from app.services.ReadModelService import ReadModelService
+from app.services.FeedingService import FeedingService
+from app.services.ShoppingListService import ShoppingListService
+from app.services.FeedingLogService import FeedingLogService
+from app.services.WeightHistoryService import WeightHistoryService
+from app.models.recipe import Recipe
+from app.models.dog_recipe import dog_recipe
+from app.models.feeding import Feeding, FeedingRollup
+from app.models.weight import WeightSample, WeightRollup
 from datetime import datetime
-from app.utils.route_helpers import handle_errors, validate_request_data
+from app.utils.route_helpers import handle_errors, validate_request_data, parse_batch_request, parse_days_arg, BATCH_MODE_ALL_OR_NOTHING, jwt_required
+from app.utils.idempotency import idempotent
 
 bp = Blueprint('dogs', __name__, url_prefix='/dogs')
 
+def _validate_dog_data(data):
+    """
+    Validate and sanitize the fields for a new dog.
+
+    Args:
+        data (dict): The request data for a single dog.
+
+    Returns:
+        tuple: The sanitized Dog fields and None, or None and an error message.
+
+    Raises:
+        KeyError: If a required field is missing.
+    """
+    name = sanitize_string(data['name'])
+    breed = sanitize_string(data['breed'])
+    date_of_birth_input = data['date_of_birth']
+    weight = data['weight']
+    profile_image = data.get('profile_image')
+
+    if not validate_date_format(date_of_birth_input):
+        return None, "Invalid date format. Use YYYY-MM-DD."
+
+    date_of_birth = datetime.strptime(date_of_birth_input, '%Y-%m-%d').date()
+
+    is_valid_dob, dob_error = validate_date_of_birth(date_of_birth)
+    if not is_valid_dob:
+        return None, dob_error
+
+    if not validate_weight(weight):
+        return None, "Invalid weight. Weight must be a positive number less than 200 (assuming kg)."
+
+    if not validate_dog_name_or_breed(name):
+        return None, "Invalid dog name. Name must be 1-50 characters long."
+
+    if not validate_dog_name_or_breed(breed):
+        return None, "Invalid dog breed. Breed must be 1-50 characters long."
+
+    if profile_image:
+        if not validate_url(profile_image):
+            return None, "Invalid profile image URL."
+        if not validate_profile_image_url(profile_image):
+            return None, "Invalid profile image URL. Must be a string with max length 255."
+
+    return {
+        'name': name,
+        'breed': breed,
+        'date_of_birth': date_of_birth,
+        'weight': weight,
+        'profile_image': profile_image
+    }, None
+
 @bp.route('/', methods=['POST'])
 @jwt_required()
 @handle_errors
+@idempotent
 def create_dog():
     try:
         user_id = get_jwt_identity()
@@ -24,43 +88,14 @@ def create_dog():
         validated_data = request.json
         validated_data['user_id'] = user_id
 
-        name = sanitize_string(validated_data['name'])
-        breed = sanitize_string(validated_data['breed'])
-        date_of_birth_input = validated_data['date_of_birth']
-        weight = validated_data['weight']
-        profile_image = validated_data.get('profile_image')
-
-        if not validate_date_format(date_of_birth_input):
-            return jsonify({"error": "Invalid date format. Use YYYY-MM-DD."}), 400
-
-        date_of_birth = datetime.strptime(date_of_birth_input, '%Y-%m-%d').date()
-
-        is_valid_dob, dob_error = validate_date_of_birth(date_of_birth)
-        if not is_valid_dob:
-            return jsonify({"error": dob_error}), 400
-
-        if not validate_weight(weight):
-            return jsonify({
-                "error": "Invalid weight. Weight must be a positive number less than 200 (assuming kg)."
-            }), 400
-
-        if not validate_dog_name_or_breed(name):
-            return jsonify({"error": "Invalid dog name. Name must be 1-50 characters long."}), 400
-
-        if not validate_dog_name_or_breed(breed):
-            return jsonify({"error": "Invalid dog breed. Breed must be 1-50 characters long."}), 400
-
-        if profile_image:
-            if not validate_url(profile_image):
-                return jsonify({"error": "Invalid profile image URL."}), 400
-            if not validate_profile_image_url(profile_image):
-                return jsonify({"error": "Invalid profile image URL. Must be a string with max length 255."}), 400
+        dog_fields, error = _validate_dog_data(validated_data)
+        if error:
+            return jsonify({"error": error}), 400
 
         # Create a new Dog instance and add it to the database
         # This query creates a new Dog record in the database with the provided attributes
         # It associates the dog with the current user and sets its initial properties
-        new_dog = Dog(name=name, breed=breed, date_of_birth=date_of_birth, 
-                      weight=weight, profile_image=profile_image, user_id=user_id)
+        new_dog = Dog(**dog_fields, user_id=user_id)
         db.session.add(new_dog)
         db.session.commit()
 
@@ -72,6 +107,49 @@ def create_dog():
         db.session.rollback()
         return jsonify({"error": str(e)}), 400
 
+@bp.route('/batch', methods=['POST'])
+@jwt_required()
+@handle_errors
+def create_dogs_batch():
+    user_id = get_jwt_identity()
+    if not validate_user_id(user_id):
+        return jsonify({"error": "Invalid user_id. Must be a positive integer."}), 400
+
+    # Example request body:
+    # {"mode": "best_effort", "items": [{"name": "Buddy", "breed": "Labrador", ...}, ...]}
+    items, mode = parse_batch_request(request.json)
+
+    # Validate every item in one pass before anything is written
+    results = []
+    new_dogs = []
+    for index, item in enumerate(items):
+        try:
+            dog_fields, error = _validate_dog_data(item)
+        except KeyError as e:
+            dog_fields, error = None, f"Missing required field: {e.args[0]}"
+        if error:
+            results.append({"index": index, "status": 400, "error": error})
+        else:
+            new_dogs.append((index, Dog(**dog_fields, user_id=user_id)))
+
+    if len(new_dogs) != len(items) and mode == BATCH_MODE_ALL_OR_NOTHING:
+        return jsonify({
+            "error": "Validation error",
+            "message": "No dogs were created because one or more items are invalid.",
+            "results": results
+        }), 400
+
+    # Add all valid dogs and commit them in a single transaction
+    # The unit of work batches the rows into one multi-row INSERT per flush
+    # Results are serialized after the flush so the committed dogs don't need to be reloaded
+    db.session.add_all([dog for _, dog in new_dogs])
+    db.session.flush()
+    results.extend({"index": index, "status": 201, "dog": dog_schema.dump(dog)} for index, dog in new_dogs)
+    db.session.commit()
+
+    results.sort(key=lambda result: result['index'])
+    return jsonify({"mode": mode, "results": results}), 201 if len(new_dogs) == len(items) else 207
+
 @bp.route('/', methods=['GET'])
 @jwt_required()
 @handle_errors
@@ -83,33 +161,117 @@ def get_dogs():
         # It's used to determine the user's role (admin or regular user)
         current_user = User.query.get_or_404(current_user_id)
 
+        # Example request:
+        # GET /dogs/?include=recipe_summaries
+        # Adds the name and total calories of each linked recipe to every dog
+        include = request.args.get('include', '')
+        include_recipe_summaries = 'recipe_summaries' in include.split(',')
+
         # Query to retrieve dogs based on user role
+        # Each query returns the dog columns with their recipe IDs aggregated in SQL
         if current_user.is_admin:
             # For admin users, retrieve all dogs
-            # This query fetches all Dog records from the database
-            dogs = Dog.query.options(db.joinedload(Dog.recipes)).all()
+            # This query selects the serialized columns of every dog and their recipe IDs
+            dogs = ReadModelService.dogs(include_recipe_summaries=include_recipe_summaries)
             if not dogs:
                 return jsonify({"message": "No dogs found. No user has created a dog yet."}), 404
         else:
             # For regular users, retrieve only their dogs
             # This query filters Dog records to only include those owned by the current user
-            dogs = Dog.query.filter_by(user_id=current_user_id).options(db.joinedload(Dog.recipes)).all()
+            dogs = ReadModelService.dogs(Dog.user_id == current_user_id, include_recipe_summaries=include_recipe_summaries)
             if not dogs:
                 return jsonify({"message": "No dogs found on your account. You haven't created any dogs yet."}), 404
 
-        result = []
-        for dog in dogs:
-            dog_data = dog_schema.dump(dog)
-            # Query to retrieve recipe IDs for each dog
-            # This accesses the 'recipes' relationship of each Dog object
-            # It retrieves the IDs of all recipes associated with the dog
-            dog_data['recipes'] = [recipe.id for recipe in dog.recipes]
-            result.append(dog_data)
-
-        return jsonify(result)
+        return jsonify(dogs)
     except Exception as e:
         return jsonify({"error": "An unexpected error occurred", "details": str(e)}), 500
 
+@bp.route('/changes', methods=['GET'])
+@jwt_required()
+@handle_errors
+def get_dog_changes():
+    current_user_id = get_jwt_identity()
+    # Query to retrieve the current user
+    # This query fetches the User object for the authenticated user
+    # It's used to determine the user's role (admin or regular user)
+    current_user = User.query.get_or_404(current_user_id)
+
+    # Example request:
+    # GET /dogs/changes?since=2024-07-01T10:15:30.123456
+    # Omitting 'since' returns every visible dog as 'created'
+    since = SyncService.parse_cursor(request.args.get('since'))
+    cursor = SyncService.new_cursor()
+
+    # Query to retrieve dogs touched since the cursor
+    # This query uses the index on Dog.updated_at, so it scales with the change rate
+    # Regular users only ever see their own dogs
+    dogs_query = Dog.query.options(db.joinedload(Dog.recipes))
+    if not current_user.is_admin:
+        dogs_query = dogs_query.filter_by(user_id=current_user_id)
+    if since:
+        dogs_query = dogs_query.filter(Dog.updated_at >= SyncService.window_start(since))
+    dogs = dogs_query.all()
+
+    created, updated = [], []
+    for dog in dogs:
+        dog_data = dog_schema.dump(dog)
+        dog_data['recipes'] = [recipe.id for recipe in dog.recipes]
+        if since is None or dog.created_at >= since:
+            created.append(dog_data)
+        else:
+            updated.append(dog_data)
+
+    deleted = []
+    if since:
+        # Query to retrieve dog tombstones recorded since the cursor
+        # Regular users only see tombstones for dogs they owned
+        tombstones_query = Tombstone.query.filter(
+            Tombstone.entity_type == 'dog',
+            Tombstone.deleted_at >= SyncService.window_start(since)
+        )
+        if not current_user.is_admin:
+            tombstones_query = tombstones_query.filter(Tombstone.user_id == current_user_id)
+        deleted = sorted(set(tombstone.entity_id for tombstone in tombstones_query.all()))
+
+    return jsonify({
+        "cursor": cursor.isoformat(),
+        "created": created,
+        "updated": updated,
+        "deleted": deleted
+    }), 200
+
+@bp.route('/requirements', methods=['GET'])
+@jwt_required()
+@handle_errors
+def get_dogs_requirements():
+    current_user_id = get_jwt_identity()
+    # Query to retrieve the current user
+    # This query fetches the User object for the authenticated user
+    # It's used to determine the user's role (admin or regular user)
+    current_user = User.query.get_or_404(current_user_id)
+
+    # Example request:
+    # GET /dogs/requirements?activity=high
+    # Admins can pass 'user_id' to calculate the requirements for another user's dogs
+    activity = request.args.get('activity', 'normal')
+    user_id = request.args.get('user_id', current_user_id, type=int)
+    if user_id != current_user_id and not current_user.is_admin:
+        return jsonify({
+            "error": "Access denied",
+            "message": "You can only view the feeding requirements of your own dogs."
+        }), 403
+
+    # Query to retrieve only the columns the requirements are calculated from
+    # All of the user's dogs are then calculated together in one batch
+    dogs = db.session.execute(
+        db.select(Dog.id, Dog.weight, Dog.date_of_birth).where(Dog.user_id == user_id).order_by(Dog.id)
+    ).all()
+    if not dogs:
+        return jsonify({"message": "No dogs found on this account."}), 404
+
+    requirements = FeedingService.calculate_requirements(dogs, activity)
+    return jsonify([requirements[dog.id] for dog in dogs]), 200
+
 @bp.route('/<int:dog_id>', methods=['GET'])
 @jwt_required()
 @handle_errors
@@ -141,6 +303,39 @@ def get_dog(dog_id):
             "message": "You do not have permission to view this dog. You can only view dogs that you own."
         }), 403
 
+@bp.route('/<int:dog_id>/requirements', methods=['GET'])
+@jwt_required()
+@handle_errors
+def get_dog_requirements(dog_id):
+    if not validate_user_id(dog_id):
+        return jsonify({"error": "Invalid dog_id. Must be a positive integer."}), 400
+
+    current_user_id = get_jwt_identity()
+    # Query to retrieve the current user
+    # This query fetches the User object for the authenticated user
+    # It's used to check if the user is an admin or the owner of the requested dog
+    current_user = User.query.get_or_404(current_user_id)
+
+    # Query to retrieve the columns the requirements are calculated from
+    # If the dog doesn't exist, it will return None
+    dog = db.session.execute(
+        db.select(Dog.id, Dog.user_id, Dog.weight, Dog.date_of_birth).where(Dog.id == dog_id)
+    ).first()
+    if not dog:
+        return jsonify({"error": "Dog not found"}), 404
+
+    if not current_user.is_admin and dog.user_id != current_user_id:
+        return jsonify({
+            "error": "Access denied",
+            "message": "You do not have permission to view this dog. You can only view dogs that you own."
+        }), 403
+
+    # Example request:
+    # GET /dogs/1/requirements?activity=low
+    activity = request.args.get('activity', 'normal')
+    requirements = FeedingService.calculate_requirements([dog], activity)
+    return jsonify(requirements[dog.id]), 200
+
 @bp.route('/<int:dog_id>', methods=['PUT', 'PATCH'])
 @jwt_required()
 @handle_errors
@@ -234,8 +429,19 @@ def delete_dog(dog_id):
         return jsonify({"error": "Dog not found", "message": "The specified dog does not exist or has already been deleted."}), 404
 
     if current_user.is_admin or dog.user_id == current_user_id:
+        # Query to retrieve the IDs of the recipes linked to the dog
+        # Their dog lists change with this delete, so they are touched for the change feed
+        SyncService.touch_recipes(SyncService.linked_recipe_ids(dog.id))
+
+        # The dog's feeding log, weight history and their rollups go with it, with one DELETE each
+        db.session.execute(db.delete(Feeding).where(Feeding.dog_id == dog.id))
+        db.session.execute(db.delete(FeedingRollup).where(FeedingRollup.dog_id == dog.id))
+        db.session.execute(db.delete(WeightSample).where(WeightSample.dog_id == dog.id))
+        db.session.execute(db.delete(WeightRollup).where(WeightRollup.dog_id == dog.id))
+
         # Delete operation
         # This removes the dog object from the database session
+        # A tombstone is recorded by the Dog 'after_delete' event listener
         # The actual deletion from the database occurs when the session is committed
         db.session.delete(dog)
         # Commit the changes to the database
@@ -246,4 +452,271 @@ def delete_dog(dog_id):
         return jsonify({
             "error": "Access denied",
             "message": "You do not have permission to delete this dog. You can only delete dogs that you own."
-        }), 403
\ No newline at end of file
+        }), 403
+
+@bp.route('/<int:dog_id>/shopping-list', methods=['GET'])
+@jwt_required()
+@handle_errors
+def get_dog_shopping_list(dog_id):
+    current_user_id = get_jwt_identity()
+    # Query to retrieve the current user
+    # This query fetches the User object for the authenticated user
+    # If the user doesn't exist, it will raise a 404 error
+    current_user = User.query.get_or_404(current_user_id)
+
+    # Example request:
+    # GET /dogs/1/shopping-list?days=7
+    days = parse_days_arg()
+
+    # Query to retrieve the owner of the dog
+    # This query selects only the user_id column for the access check
+    owner_id = db.session.execute(db.select(Dog.user_id).where(Dog.id == dog_id)).scalar()
+    if owner_id is None:
+        return jsonify({"error": "Dog not found"}), 404
+    if not (current_user.is_admin or owner_id == current_user_id):
+        return jsonify({
+            "error": "Access denied",
+            "message": "You do not have permission to view this dog's shopping list. You can only view your own dogs."
+        }), 403
+
+    # Query to aggregate the shopping list for the dog
+    # The dog's recipes are resolved through dog_recipe and summed in one statement
+    recipe_condition = None
+    if not current_user.is_admin:
+        recipe_condition = (Recipe.user_id == current_user_id) | (Recipe.is_public == True)
+    items = ShoppingListService.for_dogs(dog_recipe.c.dog_id == dog_id, days, recipe_condition)
+    return jsonify({"dog_id": dog_id, "days": days, "items": items}), 200
+
+def _dog_history_access(dog_id, current_user_id, current_user, action, history):
+    """
+    Check that a dog exists and the current user may read or add to one of its histories.
+
+    Returns:
+        tuple: A JSON error response and status code, or None if access is allowed.
+    """
+    # Query to retrieve the owner of the dog
+    # This query selects only the user_id column for the access check
+    owner_id = db.session.execute(db.select(Dog.user_id).where(Dog.id == dog_id)).scalar()
+    if owner_id is None:
+        return jsonify({"error": "Dog not found"}), 404
+    if not (current_user.is_admin or owner_id == current_user_id):
+        return jsonify({
+            "error": "Access denied",
+            "message": f"You do not have permission to {action} this dog's {history}. You can only {action} {history} of your own dogs."
+        }), 403
+    return None
+
+def _parse_feeding_items(data):
+    """
+    Validate a batch of feedings.
+
+    Args:
+        data (dict): The JSON request body with an 'items' list.
+
+    Returns:
+        tuple: The validated items and a list of item errors.
+
+    Raises:
+        ValueError: If the body is malformed or the batch is empty or too large.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('items'), list):
+        raise ValueError("Request body must be an object with an 'items' list.")
+    items = data['items']
+    max_items = current_app.config['MAX_FEEDING_BATCH_SIZE']
+    if not items or len(items) > max_items:
+        raise ValueError(f"A batch must contain between 1 and {max_items} feedings.")
+
+    now = datetime.utcnow()
+    validated = []
+    errors = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({"index": index, "error": "Every feeding must be an object."})
+            continue
+        grams = item.get('grams')
+        if isinstance(grams, bool) or not isinstance(grams, (int, float)) or not 0 < grams <= 10000:
+            errors.append({"index": index, "error": "Invalid grams. Must be a number greater than 0 and at most 10000."})
+            continue
+        recipe_id = item.get('recipe_id')
+        if recipe_id is not None and not validate_user_id(recipe_id):
+            errors.append({"index": index, "error": "Invalid recipe_id. Must be a positive integer."})
+            continue
+        if item.get('fed_at') is None:
+            fed_at = now
+        else:
+            try:
+                fed_at = FeedingLogService.parse_timestamp(item['fed_at'])
+            except ValueError as e:
+                errors.append({"index": index, "error": str(e)})
+                continue
+        validated.append({'recipe_id': recipe_id, 'grams': float(grams), 'fed_at': fed_at})
+    return validated, errors
+
+@bp.route('/<int:dog_id>/feedings', methods=['POST'])
+@jwt_required()
+@handle_errors
+def create_feedings(dog_id):
+    current_user_id = get_jwt_identity()
+    # Query to retrieve the current user
+    # This query fetches the User object for the authenticated user
+    # If the user doesn't exist, it will raise a 404 error
+    current_user = User.query.get_or_404(current_user_id)
+
+    error = _dog_history_access(dog_id, current_user_id, current_user, 'log', 'feedings')
+    if error:
+        return error
+
+    # Example request body:
+    # {"items": [{"recipe_id": 3, "grams": 250, "fed_at": "2024-05-01T08:00:00Z"}, ...]}
+    items, errors = _parse_feeding_items(request.json)
+
+    # Query to retrieve the recipes referenced by the batch that the user can see
+    # This query selects only the IDs, in one statement for the whole batch
+    recipe_ids = {item['recipe_id'] for item in items if item['recipe_id'] is not None}
+    if recipe_ids:
+        visible = db.select(Recipe.id).where(Recipe.id.in_(recipe_ids))
+        if not current_user.is_admin:
+            visible = visible.where((Recipe.user_id == current_user_id) | (Recipe.is_public == True))
+        missing = recipe_ids - set(db.session.execute(visible).scalars())
+        if missing:
+            errors.extend(
+                {"index": index, "error": "Recipe not found"}
+                for index, item in enumerate(request.json['items'])
+                if isinstance(item, dict) and item.get('recipe_id') in missing
+            )
+
+    # The log is append-only, so a batch is either recorded in full or not at all
+    if errors:
+        return jsonify({"error": "Validation error", "results": sorted(errors, key=lambda e: e['index'])}), 400
+
+    feedings = FeedingLogService.record(dog_id, items)
+    db.session.commit()
+    return jsonify({"dog_id": dog_id, "recorded": len(feedings), "feedings": feedings}), 201
+
+@bp.route('/<int:dog_id>/feedings', methods=['GET'])
+@jwt_required()
+@handle_errors
+def get_feedings(dog_id):
+    current_user_id = get_jwt_identity()
+    # Query to retrieve the current user
+    # This query fetches the User object for the authenticated user
+    # If the user doesn't exist, it will raise a 404 error
+    current_user = User.query.get_or_404(current_user_id)
+
+    error = _dog_history_access(dog_id, current_user_id, current_user, 'view', 'feedings')
+    if error:
+        return error
+
+    # Example request:
+    # GET /dogs/1/feedings?from=2024-05-01T00:00:00&to=2024-05-08T00:00:00&limit=50
+    start = FeedingLogService.parse_timestamp(request.args['from'], 'from') if request.args.get('from') else None
+    end = FeedingLogService.parse_timestamp(request.args['to'], 'to') if request.args.get('to') else None
+    try:
+        limit = int(request.args.get('limit', 100))
+    except ValueError:
+        raise ValueError("Invalid limit. Must be an integer between 1 and 1000.")
+    if not 1 <= limit <= 1000:
+        raise ValueError("Invalid limit. Must be an integer between 1 and 1000.")
+
+    feedings = FeedingLogService.feedings(dog_id, start, end, limit)
+    return jsonify({"dog_id": dog_id, "feedings": feedings}), 200
+
+@bp.route('/<int:dog_id>/feedings/history', methods=['GET'])
+@jwt_required()
+@handle_errors
+def get_feeding_history(dog_id):
+    current_user_id = get_jwt_identity()
+    # Query to retrieve the current user
+    # This query fetches the User object for the authenticated user
+    # If the user doesn't exist, it will raise a 404 error
+    current_user = User.query.get_or_404(current_user_id)
+
+    error = _dog_history_access(dog_id, current_user_id, current_user, 'view', 'feedings')
+    if error:
+        return error
+
+    # Example request:
+    # GET /dogs/1/feedings/history?resolution=week&from=2024-04-01&to=2024-06-30
+    resolution = request.args.get('resolution', 'day')
+    dates = {}
+    for arg in ('from', 'to'):
+        value = request.args.get(arg)
+        if value is None:
+            dates[arg] = None
+        elif not validate_date_format(value):
+            raise ValueError(f"Invalid {arg} date. Use YYYY-MM-DD.")
+        else:
+            dates[arg] = datetime.strptime(value, '%Y-%m-%d').date()
+
+    history = FeedingLogService.history(dog_id, resolution, dates['from'], dates['to'])
+    return jsonify({"dog_id": dog_id, "resolution": resolution, "history": history}), 200
+
+@bp.route('/<int:dog_id>/weights', methods=['POST'])
+@jwt_required()
+@handle_errors
+def create_weight(dog_id):
+    current_user_id = get_jwt_identity()
+    # Query to retrieve the current user
+    # This query fetches the User object for the authenticated user
+    # If the user doesn't exist, it will raise a 404 error
+    current_user = User.query.get_or_404(current_user_id)
+
+    error = _dog_history_access(dog_id, current_user_id, current_user, 'add to', 'weight history')
+    if error:
+        return error
+
+    # Example request body:
+    # {"weight": 21.4, "measured_at": "2024-05-06T08:00:00Z"}
+    data = request.json
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be an object.")
+    weight = data.get('weight')
+    if isinstance(weight, bool) or not validate_weight(weight):
+        return jsonify({"error": "Invalid weight. Weight must be a positive number less than 200 (assuming kg)."}), 400
+    if data.get('measured_at') is None:
+        measured_at = datetime.utcnow()
+    else:
+        measured_at = FeedingLogService.parse_timestamp(data['measured_at'], 'measured_at')
+        if measured_at > datetime.utcnow():
+            raise ValueError("Invalid measured_at. A weigh-in can't be in the future.")
+
+    is_current = WeightHistoryService.record(dog_id, weight, measured_at)
+    db.session.commit()
+    return jsonify({
+        "dog_id": dog_id,
+        "weight": float(weight),
+        "measured_at": measured_at.isoformat(),
+        "is_current": is_current
+    }), 201
+
+@bp.route('/<int:dog_id>/weights', methods=['GET'])
+@jwt_required()
+@handle_errors
+def get_weights(dog_id):
+    current_user_id = get_jwt_identity()
+    # Query to retrieve the current user
+    # This query fetches the User object for the authenticated user
+    # If the user doesn't exist, it will raise a 404 error
+    current_user = User.query.get_or_404(current_user_id)
+
+    error = _dog_history_access(dog_id, current_user_id, current_user, 'view', 'weight history')
+    if error:
+        return error
+
+    # Example request:
+    # GET /dogs/1/weights?from=2015-01-01&to=2024-12-31&resolution=week
+    resolution = request.args.get('resolution', 'auto')
+    dates = {}
+    for arg in ('from', 'to'):
+        value = request.args.get(arg)
+        if value is None:
+            dates[arg] = None
+        elif not validate_date_format(value):
+            raise ValueError(f"Invalid {arg} date. Use YYYY-MM-DD.")
+        else:
+            dates[arg] = datetime.strptime(value, '%Y-%m-%d').date()
+
+    resolution, points = WeightHistoryService.series(
+        dog_id, dates['from'], dates['to'], resolution, current_app.config['WEIGHT_HISTORY_MAX_POINTS']
+    )
+    return jsonify({"dog_id": dog_id, "resolution": resolution, "points": points}), 200
@@ -1,9 +1,12 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from app.models.ingredient import Ingredient
 from ..schemas.ingredient_schema import ingredient_schema, ingredients_schema
 from app.utils.route_helpers import handle_errors
-from app.utils.validators import validate_ingredient_id
+from app.utils.validators import validate_ingredient_id, validate_quantity
 from app.utils.route_helpers import validate_request_data
+from app.services.ReadModelService import ReadModelService
+from app.services.NutrientService import NutrientService
+from app.services.SubstitutionService import SubstitutionService
 
 bp = Blueprint('ingredients', __name__, url_prefix='/ingredients')
 
@@ -12,17 +15,22 @@ bp = Blueprint('ingredients', __name__, url_prefix='/ingredients')
 def get_ingredients():
     try:
         # Query to retrieve all ingredients from the database
-        # This query fetches all Ingredient records without any filtering
+        # This query selects the serialized Ingredient columns without any filtering
         # It's used to provide a complete list of available ingredients
-        # The query is executed lazily, meaning it only hits the database when the results are accessed
-        ingredients = Ingredient.query.all()
+        # The rows are turned straight into JSON-serializable dicts matching the ingredients_schema
+        ingredients = ReadModelService.ingredients()
 
-        # Serialize the ingredients using the ingredients_schema
-        # This converts the SQLAlchemy objects into a JSON-serializable format
-        return jsonify(ingredients_schema.dump(ingredients))
+        return jsonify(ingredients)
     except Exception as e:
         return jsonify({"error": "An unexpected error occurred", "details": str(e)}), 500
 
+@bp.route('/nutrients', methods=['GET'])
+@handle_errors
+def get_nutrient_vocabulary():
+    # The canonical micronutrient keys and units used by every micronutrient total
+    # Keys in Ingredient.vitamins and Ingredient.minerals are mapped onto this vocabulary
+    return jsonify(NutrientService.vocabulary()), 200
+
 @bp.route('/<int:ingredient_id>', methods=['GET'])
 @handle_errors
 def get_ingredient(ingredient_id):
@@ -40,4 +48,29 @@ def get_ingredient(ingredient_id):
         # This converts the SQLAlchemy object into a JSON-serializable format
         return jsonify(ingredient_schema.dump(ingredient))
     except Exception as e:
-        return jsonify({"error": "An unexpected error occurred", "details": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": "An unexpected error occurred", "details": str(e)}), 500
+
+@bp.route('/<int:ingredient_id>/substitutes', methods=['GET'])
+@handle_errors
+def get_ingredient_substitutes(ingredient_id):
+    if not validate_ingredient_id(ingredient_id):
+        return jsonify({"error": "Invalid ingredient_id. Must be a positive integer."}), 400
+
+    # Example request:
+    # GET /ingredients/1/substitutes?quantity=250&k=3
+    # 'quantity' is the amount being replaced, each substitute's quantity supplies the same calories
+    try:
+        quantity = float(request.args.get('quantity', 100))
+        k = int(request.args.get('k', 5))
+    except ValueError:
+        raise ValueError("Invalid quantity or k. Both must be numbers.")
+    if not validate_quantity(quantity):
+        raise ValueError("Invalid quantity. Must be a positive number.")
+    if not 1 <= k <= 20:
+        raise ValueError("Invalid k. Must be an integer between 1 and 20.")
+
+    # The search runs over an in-memory index of the catalog, rebuilt only when ingredients change
+    substitutes = SubstitutionService.substitutes(ingredient_id, quantity, k)
+    if substitutes is None:
+        return jsonify({"error": "Resource not found"}), 404
+    return jsonify({"ingredient_id": ingredient_id, "quantity": quantity, "substitutes": substitutes}), 200
@@ -0,0 +1,146 @@
+from flask import Blueprint, request, jsonify, current_app
+from app import db
+from app.models.meal_plan import MealPlan
+from app.models.dog import Dog
+from app.models.user import User
+from ..schemas.meal_plan_schema import meal_plan_schema, meal_plans_schema
+from flask_jwt_extended import get_jwt_identity
+from app.utils.validators import validate_user_id, validate_id_list, validate_date_format
+from app.utils.route_helpers import handle_errors, jwt_required
+from app.services.MealPlanService import MealPlanService
+from datetime import datetime, date
+
+bp = Blueprint('meal_plans', __name__, url_prefix='/meal-plans')
+
+@bp.route('/', methods=['POST'])
+@jwt_required()
+@handle_errors
+def create_meal_plan():
+    current_user_id = get_jwt_identity()
+    if not validate_user_id(current_user_id):
+        return jsonify({"error": "Invalid user_id. Must be a positive integer."}), 400
+
+    # Example request body:
+    # {"days": 7, "start_date": "2024-07-01", "dog_ids": [1, 2], "activity": "normal"}
+    # 'dog_ids' defaults to every dog the user owns, 'start_date' to today
+    data = request.json
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be a JSON object.")
+
+    days = data.get('days', 7)
+    max_days = current_app.config['MAX_MEAL_PLAN_DAYS']
+    if not isinstance(days, int) or not 1 <= days <= max_days:
+        raise ValueError(f"Invalid days. Must be an integer between 1 and {max_days}.")
+
+    start_date = data.get('start_date')
+    if start_date is None:
+        start_date = date.today()
+    elif isinstance(start_date, str) and validate_date_format(start_date):
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+    else:
+        raise ValueError("Invalid start_date. Use YYYY-MM-DD.")
+
+    activity = data.get('activity', 'normal')
+    dog_ids = data.get('dog_ids')
+    if dog_ids is not None and (not validate_id_list(dog_ids) or not dog_ids):
+        raise ValueError("Invalid dog_ids. Must be a non-empty list of integers.")
+
+    # Query to retrieve the dogs to plan for
+    # This query selects only the columns the planner needs, for the user's own dogs
+    dog_query = db.select(Dog.id, Dog.name, Dog.weight, Dog.date_of_birth).where(Dog.user_id == current_user_id).order_by(Dog.id)
+    if dog_ids is not None:
+        dog_query = dog_query.where(Dog.id.in_(dog_ids))
+    dogs = db.session.execute(dog_query).all()
+
+    if dog_ids is not None and len(dogs) != len(set(dog_ids)):
+        missing_ids = sorted(set(dog_ids) - {dog.id for dog in dogs})
+        return jsonify({
+            "error": "Access denied",
+            "message": f"The following dogs do not exist or do not belong to you: {missing_ids}"
+        }), 403
+    if not dogs:
+        return jsonify({"error": "No dogs found. Add a dog before creating a meal plan."}), 404
+
+    plan, shopping_list = MealPlanService.generate(dogs, days, start_date, current_user_id, activity)
+
+    # The plan is stored as generated, so fetching it again doesn't recompute anything
+    # It is serialized after the flush so the committed row doesn't need to be reloaded
+    meal_plan = MealPlan(
+        user_id=current_user_id,
+        start_date=start_date,
+        days=days,
+        activity=activity,
+        plan=plan,
+        shopping_list=shopping_list
+    )
+    db.session.add(meal_plan)
+    db.session.flush()
+    result = meal_plan_schema.dump(meal_plan)
+    db.session.commit()
+
+    return jsonify(result), 201
+
+@bp.route('/', methods=['GET'])
+@jwt_required()
+@handle_errors
+def get_meal_plans():
+    current_user_id = get_jwt_identity()
+
+    # Query to retrieve the current user's meal plans
+    # The plan and shopping list columns are left out of the listing, fetch a single plan for those
+    meal_plans = (
+        MealPlan.query
+        .options(db.load_only(MealPlan.id, MealPlan.user_id, MealPlan.start_date, MealPlan.days, MealPlan.activity, MealPlan.created_at))
+        .filter(MealPlan.user_id == current_user_id)
+        .order_by(MealPlan.created_at.desc(), MealPlan.id.desc())
+        .all()
+    )
+    return jsonify(meal_plans_schema.dump(meal_plans)), 200
+
+@bp.route('/<int:meal_plan_id>', methods=['GET'])
+@jwt_required()
+@handle_errors
+def get_meal_plan(meal_plan_id):
+    current_user_id = get_jwt_identity()
+    # Query to retrieve the current user
+    # This query fetches the User object for the authenticated user
+    # If the user doesn't exist, it will raise a 404 error
+    current_user = User.query.get_or_404(current_user_id)
+
+    # Query to retrieve the stored meal plan
+    # This is a single primary key lookup, the plan and shopping list were stored when it was created
+    meal_plan = db.session.get(MealPlan, meal_plan_id)
+    if meal_plan is None:
+        return jsonify({"error": "Resource not found"}), 404
+    if not (current_user.is_admin or meal_plan.user_id == current_user_id):
+        return jsonify({
+            "error": "Access denied",
+            "message": "You do not have permission to view this meal plan. You can only view your own meal plans."
+        }), 403
+
+    return jsonify(meal_plan_schema.dump(meal_plan)), 200
+
+@bp.route('/<int:meal_plan_id>', methods=['DELETE'])
+@jwt_required()
+@handle_errors
+def delete_meal_plan(meal_plan_id):
+    current_user_id = get_jwt_identity()
+    # Query to retrieve the current user
+    # This query fetches the User object for the authenticated user
+    # If the user doesn't exist, it will raise a 404 error
+    current_user = User.query.get_or_404(current_user_id)
+
+    # Query to retrieve the owner of the meal plan
+    # This query selects only the user_id column instead of loading the stored plan
+    owner_id = db.session.execute(db.select(MealPlan.user_id).where(MealPlan.id == meal_plan_id)).scalar()
+    if owner_id is None:
+        return jsonify({"error": "Resource not found"}), 404
+    if not (current_user.is_admin or owner_id == current_user_id):
+        return jsonify({
+            "error": "Access denied",
+            "message": "You do not have permission to delete this meal plan. You can only delete your own meal plans."
+        }), 403
+
+    db.session.execute(db.delete(MealPlan).where(MealPlan.id == meal_plan_id))
+    db.session.commit()
+    return jsonify({"msg": "Meal plan deleted"}), 200
@@ -1,9 +1,9 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app import db
 from app.models.recipe import Recipe
 from app.models.recipe_ingredient import RecipeIngredient
 from ..schemas.recipe_schema import recipe_schema, recipes_schema
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import get_jwt_identity
 from app.utils.validators import (
     validate_recipe_name, validate_quantity, validate_ingredient_name, 
     validate_recipe_instructions, validate_recipe_description, validate_id_list,
@@ -13,68 +13,103 @@ from app.utils.validators import (
 from app.models.user import User
 from app.models.dog import Dog
 from app.models.ingredient import Ingredient
-from app.utils.route_helpers import handle_errors, validate_request_data
+from app.models.tombstone import Tombstone
+from app.services.SyncService import SyncService
+from app.services.DeletionService import DeletionService
+from app.services.ReadModelService import ReadModelService
+from app.services.NutrientService import NutrientService
+from app.services.SimilarityService import SimilarityService
+from app.services.PortionService import PortionService
+from app.services.FeedingService import FeedingService
+from app.services.RecipeOptimizerService import RecipeOptimizerService, MACROS
+from app.utils.route_helpers import handle_errors, validate_request_data, parse_batch_request, parse_days_arg, BATCH_MODE_ALL_OR_NOTHING, jwt_required
+from app.utils.idempotency import idempotent
+from datetime import datetime
 
 bp = Blueprint('recipes', __name__, url_prefix='/recipes')
 
-@bp.route('/', methods=['POST'])
-@jwt_required()
-@handle_errors
-def create_recipe():
-    user_id = get_jwt_identity()
-    if not validate_user_id(user_id):
-        return jsonify({"error": "Invalid user_id. Must be a positive integer."}), 400
-    # Query to retrieve the current user
-    # This query fetches the User object for the authenticated user
-    # If the user doesn't exist, it will raise a 404 error
-    current_user = User.query.get_or_404(user_id)
-    
-    # Set the user_id in the validated data
-    validated_data = request.json
-    validated_data['user_id'] = user_id
-
-    name = validated_data['name']
-    description = validated_data.get('description')
-    instructions = validated_data['instructions']
-    is_public = validated_data.get('is_public', False)
-    ingredients = validated_data['ingredients']
-    dog_ids = validated_data.get('dog_ids', [])
+def _resolve_references(items):
+    """
+    Resolve every ingredient and dog referenced by a set of recipe payloads.
+
+    Each model is fetched with a single IN query instead of one query per reference.
+
+    Args:
+        items (list): The recipe request payloads.
+
+    Returns:
+        tuple: Dicts mapping IDs to Ingredient objects and to Dog objects.
+    """
+    ingredient_ids = set()
+    dog_ids = set()
+    for item in items:
+        ingredients = item.get('ingredients')
+        if isinstance(ingredients, list):
+            ingredient_ids.update(
+                ingredient['ingredient_id'] for ingredient in ingredients
+                if isinstance(ingredient, dict) and isinstance(ingredient.get('ingredient_id'), int)
+            )
+        item_dog_ids = item.get('dog_ids')
+        if isinstance(item_dog_ids, list):
+            dog_ids.update(dog_id for dog_id in item_dog_ids if isinstance(dog_id, int))
+
+    # Query to retrieve all referenced ingredients
+    # This query fetches every Ingredient whose ID appears in any of the payloads
+    ingredients_by_id = {
+        ingredient.id: ingredient
+        for ingredient in Ingredient.query.filter(Ingredient.id.in_(ingredient_ids)).all()
+    } if ingredient_ids else {}
+
+    # Query to retrieve all referenced dogs
+    # This query fetches every Dog whose ID appears in any of the payloads
+    dogs_by_id = {dog.id: dog for dog in Dog.query.filter(Dog.id.in_(dog_ids)).all()} if dog_ids else {}
+
+    return ingredients_by_id, dogs_by_id
+
+def _build_recipe(data, current_user, ingredients_by_id, dogs_by_id):
+    """
+    Validate a recipe payload and build the Recipe with its ingredients and dogs.
+
+    Args:
+        data (dict): The request data for a single recipe.
+        current_user (User): The authenticated user creating the recipe.
+        ingredients_by_id (dict): Pre-fetched Ingredient objects keyed by ID.
+        dogs_by_id (dict): Pre-fetched Dog objects keyed by ID.
+
+    Returns:
+        tuple: The new Recipe, an error message and an HTTP status code.
+        The Recipe is None when validation fails.
+
+    Raises:
+        KeyError: If a required field is missing.
+    """
+    name = data['name']
+    description = data.get('description')
+    instructions = data['instructions']
+    is_public = data.get('is_public', False)
+    ingredients = data['ingredients']
+    dog_ids = data.get('dog_ids', [])
 
     if not dog_ids:
-        return jsonify({
-            "error": "At least one dog must be associated with the recipe."
-        }), 400
+        return None, "At least one dog must be associated with the recipe.", 400
 
     if not validate_recipe_name(name):
-        return jsonify({
-            "error": "Invalid recipe name. Recipe name should be 3-100 characters long."
-        }), 400
+        return None, "Invalid recipe name. Recipe name should be 3-100 characters long.", 400
 
     if not validate_recipe_instructions(instructions):
-        return jsonify({
-            "error": "Invalid recipe instructions. Must be a non-empty string."
-        }), 400
+        return None, "Invalid recipe instructions. Must be a non-empty string.", 400
 
     if description and not validate_recipe_description(description):
-        return jsonify({
-            "error": "Invalid recipe description. Must be a string."
-        }), 400
+        return None, "Invalid recipe description. Must be a string.", 400
 
     if not validate_id_list(dog_ids):
-        return jsonify({
-            "error": "Invalid dog_ids. Must be a non-empty list of integers."
-        }), 400
+        return None, "Invalid dog_ids. Must be a non-empty list of integers.", 400
 
     if not validate_is_public(is_public):
-        return jsonify({"error": "is_public must be a boolean value."}), 400
+        return None, "is_public must be a boolean value.", 400
 
     if not validate_ingredients_list(ingredients):
-        return jsonify({"error": "Invalid ingredients list. Each ingredient must have a valid ingredient_id, quantity, and unit."}), 400
-
-    # Create a new Recipe instance
-    # This creates a new Recipe object in memory, but doesn't save it to the database yet
-    new_recipe = Recipe(name=name, description=description, instructions=instructions,
-                        is_public=is_public, user_id=user_id)
+        return None, "Invalid ingredients list. Each ingredient must have a valid ingredient_id, quantity, and unit.", 400
 
     for ingredient in ingredients:
         ingredient_id = ingredient['ingredient_id']
@@ -82,62 +117,305 @@ def create_recipe():
         unit = ingredient['unit']
 
         if not validate_ingredient_id(ingredient_id):
-            return jsonify({
-                "error": f"Invalid ingredient_id: {ingredient_id}. Must be a positive integer."
-            }), 400
+            return None, f"Invalid ingredient_id: {ingredient_id}. Must be a positive integer.", 400
 
         if not validate_unit(unit):
-            return jsonify({
-                "error": f"Invalid unit for ingredient {ingredient_id}. Must be a valid unit of measurement."
-            }), 400
+            return None, f"Invalid unit for ingredient {ingredient_id}. Must be a valid unit of measurement.", 400
 
         if not validate_quantity(quantity):
-            return jsonify({
-                "error": f"Invalid quantity for ingredient {ingredient_id}. Quantity must be a positive number."
-            }), 400
-
-        # Query to retrieve the ingredient from the database
-        # This query fetches the Ingredient object with the given ID
-        # If the ingredient doesn't exist, db_ingredient will be None
-        db_ingredient = Ingredient.query.get(ingredient_id)
+            return None, f"Invalid quantity for ingredient {ingredient_id}. Quantity must be a positive number.", 400
+
+        db_ingredient = ingredients_by_id.get(ingredient_id)
         if not db_ingredient:
-            return jsonify({
-                "error": f"Ingredient with id {ingredient_id} not found. Please use a valid ingredient ID."
-            }), 400
-        
+            return None, f"Ingredient with id {ingredient_id} not found. Please use a valid ingredient ID.", 400
+
         if not validate_ingredient_name(db_ingredient.name):
-            return jsonify({
-                "error": f"Invalid ingredient name for id {ingredient_id}. Ingredient name should be 2-50 characters long and contain only letters, numbers, spaces, and hyphens."
-            }), 400
+            return None, f"Invalid ingredient name for id {ingredient_id}. Ingredient name should be 2-50 characters long and contain only letters, numbers, spaces, and hyphens.", 400
 
-        unit = sanitize_string(ingredient['unit'])
+    for dog_id in dog_ids:
+        dog = dogs_by_id.get(dog_id)
+        if not dog:
+            return None, f"Dog with id {dog_id} not found", 400
+        if not current_user.is_admin and dog.user_id != current_user.id:
+            return None, f"You don't have permission to assign dog with id {dog_id} to this recipe", 403
+
+    # Create a new Recipe instance only once the whole payload is valid
+    # This creates a new Recipe object in memory, but doesn't save it to the database yet
+    # Nothing is attached to the pre-fetched ingredients or dogs for a rejected payload
+    new_recipe = Recipe(name=name, description=description, instructions=instructions,
+                        is_public=is_public, user_id=current_user.id)
+
+    for ingredient in ingredients:
         # Create a new RecipeIngredient instance and append it to the recipe
-        # This creates a new RecipeIngredient object and associates it with the new recipe
-        recipe_ingredient = RecipeIngredient(
-            ingredient_id=ingredient_id,
-            quantity=quantity,
-            unit=unit
-        )
-        new_recipe.ingredients.append(recipe_ingredient)
+        # The ingredient is attached directly so serialization doesn't need to load it again
+        new_recipe.ingredients.append(RecipeIngredient(
+            ingredient=ingredients_by_id[ingredient['ingredient_id']],
+            quantity=ingredient['quantity'],
+            unit=sanitize_string(ingredient['unit'])
+        ))
 
     for dog_id in dog_ids:
-        # Query to retrieve the dog from the database
-        # This query fetches the Dog object with the given ID
-        # If the dog doesn't exist, dog will be None
-        dog = Dog.query.get(dog_id)
-        if not dog:
-            return jsonify({"error": f"Dog with id {dog_id} not found"}), 400
-        if not current_user.is_admin and dog.user_id != user_id:
-            return jsonify({"error": f"You don't have permission to assign dog with id {dog_id} to this recipe"}), 403
-        new_recipe.dogs.append(dog)
+        new_recipe.dogs.append(dogs_by_id[dog_id])
+
+    return new_recipe, None, None
+
+def _scale_pairs(pairs, current_user, activity):
+    """
+    Scale recipes for dogs, checking access to every recipe and dog.
+
+    Every recipe, dog, ingredient line and recipe total is fetched with one query per kind,
+    however many pairs there are.
+
+    Args:
+        pairs (list): Dicts with 'recipe_id', 'dog_id' and 'days'.
+        current_user (User): The authenticated user.
+        activity (str): The activity level used for the feeding requirements.
+
+    Returns:
+        list: One result per pair; pairs that can't be scaled get a 'status' and an 'error'.
+
+    Raises:
+        ValueError: If the activity level is not recognised.
+    """
+    recipe_ids = {pair['recipe_id'] for pair in pairs}
+    dog_ids = {pair['dog_id'] for pair in pairs}
+
+    # Query to compute the totals of every requested recipe the user can see
+    # The visibility check is part of the aggregate query
+    recipe_condition = None
+    if not current_user.is_admin:
+        recipe_condition = (Recipe.user_id == current_user.id) | (Recipe.is_public == True)
+    nutrition = ReadModelService.recipe_nutrition(recipe_ids, recipe_condition)
+
+    # Query to retrieve the requested dogs the user owns
+    # This query selects only the columns the feeding requirements need
+    dog_query = db.select(Dog.id, Dog.weight, Dog.date_of_birth).where(Dog.id.in_(dog_ids))
+    if not current_user.is_admin:
+        dog_query = dog_query.where(Dog.user_id == current_user.id)
+    dogs = db.session.execute(dog_query).all()
+    requirements = FeedingService.calculate_requirements(dogs, activity)
+    lines = PortionService.load_recipe_lines(nutrition)
+
+    scalable = []
+    results = []
+    for index, pair in enumerate(pairs):
+        if pair['recipe_id'] not in nutrition:
+            results.append({"index": index, "status": 404, "error": f"Recipe {pair['recipe_id']} not found or not accessible."})
+        elif pair['dog_id'] not in requirements:
+            results.append({"index": index, "status": 404, "error": f"Dog {pair['dog_id']} not found or not accessible."})
+        else:
+            scalable.append((index, pair))
+            results.append(None)
+
+    scaled = PortionService.scale_recipes([pair for _, pair in scalable], requirements, lines, nutrition)
+    for (index, pair), result in zip(scalable, scaled):
+        if result['scale'] is None:
+            results[index] = {
+                "index": index, "status": 422,
+                "error": f"Recipe {pair['recipe_id']} has no ingredients measured by mass, so it can't be scaled."
+            }
+        else:
+            results[index] = {"index": index, "status": 200, **result}
+    return results
+
+@bp.route('/', methods=['POST'])
+@jwt_required()
+@handle_errors
+@idempotent
+def create_recipe():
+    user_id = get_jwt_identity()
+    if not validate_user_id(user_id):
+        return jsonify({"error": "Invalid user_id. Must be a positive integer."}), 400
+    # Query to retrieve the current user
+    # This query fetches the User object for the authenticated user
+    # If the user doesn't exist, it will raise a 404 error
+    current_user = User.query.get_or_404(user_id)
+    
+    # Set the user_id in the validated data
+    validated_data = request.json
+    validated_data['user_id'] = user_id
+
+    ingredients_by_id, dogs_by_id = _resolve_references([validated_data])
+    new_recipe, error, status_code = _build_recipe(validated_data, current_user, ingredients_by_id, dogs_by_id)
+    if error:
+        return jsonify({"error": error}), status_code
 
     # Add the new recipe to the database session and commit the transaction
     # This saves the new recipe and all its associations to the database
     db.session.add(new_recipe)
+    # The linked dogs' recipe lists changed, so move them forward in the change feed
+    SyncService.touch_dogs(new_recipe.dog_ids)
     db.session.commit()
 
     return jsonify(recipe_schema.dump(new_recipe)), 201
 
+@bp.route('/batch', methods=['POST'])
+@jwt_required()
+@handle_errors
+def create_recipes_batch():
+    user_id = get_jwt_identity()
+    if not validate_user_id(user_id):
+        return jsonify({"error": "Invalid user_id. Must be a positive integer."}), 400
+    # Query to retrieve the current user
+    # This query fetches the User object for the authenticated user once for the whole batch
+    current_user = User.query.get_or_404(user_id)
+
+    # Example request body:
+    # {"mode": "all_or_nothing", "items": [{"name": "Chicken Mix", "ingredients": [...], "dog_ids": [1]}, ...]}
+    items, mode = parse_batch_request(request.json)
+
+    # Resolve every referenced ingredient and dog with one query per model,
+    # then validate every item in one pass before anything is written
+    ingredients_by_id, dogs_by_id = _resolve_references(items)
+    results = []
+    new_recipes = []
+    for index, item in enumerate(items):
+        try:
+            new_recipe, error, status_code = _build_recipe(item, current_user, ingredients_by_id, dogs_by_id)
+        except KeyError as e:
+            new_recipe, error, status_code = None, f"Missing required field: {e.args[0]}", 400
+        if error:
+            results.append({"index": index, "status": status_code, "error": error})
+        else:
+            new_recipes.append((index, new_recipe))
+
+    if len(new_recipes) != len(items) and mode == BATCH_MODE_ALL_OR_NOTHING:
+        # Roll back so the recipes built for the valid items are dropped from the dogs' collections
+        db.session.rollback()
+        return jsonify({
+            "error": "Validation error",
+            "message": "No recipes were created because one or more items are invalid.",
+            "results": results
+        }), 400
+
+    # Add all valid recipes and commit them in a single transaction
+    # The unit of work batches the recipe, recipe_ingredient and dog_recipe rows into one INSERT per table
+    # Results are serialized after the flush so the committed recipes don't need to be reloaded
+    db.session.add_all([new_recipe for _, new_recipe in new_recipes])
+    db.session.flush()
+    SyncService.touch_dogs({dog_id for _, new_recipe in new_recipes for dog_id in new_recipe.dog_ids})
+    results.extend({"index": index, "status": 201, "recipe": recipe_schema.dump(new_recipe)} for index, new_recipe in new_recipes)
+    db.session.commit()
+
+    results.sort(key=lambda result: result['index'])
+    return jsonify({"mode": mode, "results": results}), 201 if len(new_recipes) == len(items) else 207
+
+@bp.route('/optimize', methods=['POST'])
+@jwt_required()
+@handle_errors
+def optimize_recipe():
+    # Example request body:
+    # {
+    #     "targets": {"protein": 0.5, "fat": 0.45, "carbohydrates": 0.05},
+    #     "total_mass": 1000,
+    #     "include_ingredient_ids": [1],
+    #     "exclude_ingredient_ids": [3],
+    #     "category_bounds": {"Organ Meat": {"max": 0.1}}
+    # }
+    # Nothing is written; the response is a draft that can be posted to /recipes/
+    data = request.json
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be a JSON object.")
+
+    targets = data.get('targets')
+    if not isinstance(targets, dict) or not targets or any(macro not in MACROS for macro in targets):
+        raise ValueError(f"Invalid targets. Must be an object with shares for: {', '.join(MACROS)}.")
+    if any(not isinstance(share, (int, float)) or share < 0 for share in targets.values()):
+        raise ValueError("Invalid targets. Shares must be non-negative numbers.")
+    target_sum = sum(targets.values())
+    if target_sum <= 0:
+        raise ValueError("Invalid targets. At least one share must be positive.")
+    # Shares are normalised, so {"protein": 2, "fat": 1} means two thirds protein
+    targets = {macro: share / target_sum for macro, share in targets.items()}
+
+    total_mass = data.get('total_mass')
+    if not isinstance(total_mass, (int, float)) or not validate_quantity(total_mass):
+        raise ValueError("Invalid total_mass. Must be a positive number of grams.")
+
+    ingredient_ids = data.get('ingredient_ids', [])
+    include_ids = data.get('include_ingredient_ids', [])
+    exclude_ids = data.get('exclude_ingredient_ids', [])
+    for field, ids in (('ingredient_ids', ingredient_ids), ('include_ingredient_ids', include_ids),
+                       ('exclude_ingredient_ids', exclude_ids)):
+        if not validate_id_list(ids):
+            raise ValueError(f"Invalid {field}. Must be a list of integers.")
+    if set(include_ids) & set(exclude_ids):
+        raise ValueError("An ingredient cannot be both included and excluded.")
+
+    category_bounds = data.get('category_bounds', {})
+    if not isinstance(category_bounds, dict):
+        raise ValueError("Invalid category_bounds. Must be an object keyed by category.")
+    for category, bound in category_bounds.items():
+        if not isinstance(bound, dict) or set(bound) - {'min', 'max'} or any(
+            not isinstance(share, (int, float)) or not 0 <= share <= 1 for share in bound.values()
+        ):
+            raise ValueError(f"Invalid bounds for category '{category}'. Use 'min' and 'max' shares between 0 and 1.")
+
+    time_budget_ms = data.get('time_budget_ms', current_app.config['OPTIMIZER_TIME_BUDGET_MS'])
+    if not isinstance(time_budget_ms, int) or time_budget_ms <= 0:
+        raise ValueError("Invalid time_budget_ms. Must be a positive integer.")
+    time_budget_ms = min(time_budget_ms, current_app.config['OPTIMIZER_MAX_TIME_BUDGET_MS'])
+
+    # Query to retrieve the candidate ingredients
+    # This query selects only the nutrient columns of the pool, minus the excluded ingredients
+    candidates = RecipeOptimizerService.load_candidates(ingredient_ids, include_ids, exclude_ids)
+    missing_ids = set(include_ids) - {candidate.id for candidate in candidates}
+    if missing_ids:
+        return jsonify({"error": f"Ingredients not found: {sorted(missing_ids)}"}), 404
+    if not candidates:
+        return jsonify({"error": "No candidate ingredients available."}), 404
+
+    draft = RecipeOptimizerService.optimize(
+        candidates, targets, float(total_mass),
+        include_ids=include_ids, category_bounds=category_bounds, time_budget_ms=time_budget_ms
+    )
+    return jsonify(draft), 200
+
+@bp.route('/nutrition', methods=['POST'])
+@jwt_required()
+@handle_errors
+def get_recipes_nutrition():
+    current_user_id = get_jwt_identity()
+    # Query to retrieve the current user
+    # This query fetches the User object for the authenticated user
+    # If the user doesn't exist, it will raise a 404 error
+    current_user = User.query.get_or_404(current_user_id)
+
+    # Example request body:
+    # {"recipe_ids": [1, 2, 3], "include_micronutrients": true}
+    data = request.json
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be a JSON object.")
+    recipe_ids = data.get('recipe_ids')
+    if not validate_id_list(recipe_ids) or not recipe_ids:
+        raise ValueError("Invalid recipe_ids. Must be a non-empty list of integers.")
+    max_size = current_app.config['MAX_NUTRITION_BATCH_SIZE']
+    if len(recipe_ids) > max_size:
+        raise ValueError(f"Too many recipe_ids. At most {max_size} recipes can be requested at once.")
+    include_micronutrients = data.get('include_micronutrients', True)
+    if not isinstance(include_micronutrients, bool):
+        raise ValueError("Invalid include_micronutrients. Must be a boolean.")
+
+    # Query to compute the macro totals of every requested recipe
+    # This single aggregate query joins recipe_ingredient and ingredient and groups by recipe
+    # For non-admin users the visibility check is part of the same query, so recipes they
+    # cannot see are never read
+    condition = None
+    if not current_user.is_admin:
+        condition = (Recipe.user_id == current_user_id) | (Recipe.is_public == True)
+    nutrition = ReadModelService.recipe_nutrition(set(recipe_ids), condition)
+
+    if include_micronutrients and nutrition:
+        for recipe_id, micronutrients in NutrientService.recipe_totals(list(nutrition)).items():
+            nutrition[recipe_id]['micronutrients'] = micronutrients
+
+    # Missing and inaccessible recipes are reported together, so the response doesn't
+    # reveal which IDs belong to other users' private recipes
+    return jsonify({
+        "recipes": [nutrition[recipe_id] for recipe_id in sorted(nutrition)],
+        "unavailable_ids": sorted(set(recipe_ids) - set(nutrition))
+    }), 200
+
 @bp.route('/', methods=['GET'])
 @jwt_required()
 @handle_errors
@@ -151,20 +429,77 @@ def get_recipes():
 
         if current_user.is_admin:
             # Query to retrieve all recipes for admin users
-            # This query fetches all Recipe objects from the database
-            recipes = Recipe.query.all()
+            # This query selects only the serialized columns of every recipe, without building ORM objects
+            recipes = ReadModelService.recipes()
         else:
             # Query to retrieve recipes for non-admin users
-            # This query fetches Recipe objects that are either owned by the current user or are public
-            recipes = Recipe.query.filter((Recipe.user_id == current_user_id) | (Recipe.is_public == True)).all()
+            # This query selects the recipes that are either owned by the current user or are public
+            recipes = ReadModelService.recipes((Recipe.user_id == current_user_id) | (Recipe.is_public == True))
 
         if not recipes:
             return jsonify({"message": "No recipes found. You have no recipes, and there are no public recipes available."}), 404
 
-        return jsonify(recipes_schema.dump(recipes))
+        return jsonify(recipes)
     except Exception as e:
         return jsonify({"error": "An unexpected error occurred", "details": str(e)}), 500
 
+@bp.route('/changes', methods=['GET'])
+@jwt_required()
+@handle_errors
+def get_recipe_changes():
+    current_user_id = get_jwt_identity()
+    # Query to retrieve the current user
+    # This query fetches the User object for the authenticated user
+    # If the user doesn't exist, it will raise a 404 error
+    current_user = User.query.get_or_404(current_user_id)
+
+    # Example request:
+    # GET /recipes/changes?since=2024-07-01T10:15:30.123456
+    # Omitting 'since' returns every visible recipe as 'created'
+    since = SyncService.parse_cursor(request.args.get('since'))
+    cursor = SyncService.new_cursor()
+
+    # Query to retrieve the visible recipes touched since the cursor
+    # This query uses the index on Recipe.updated_at, so it scales with the change rate
+    # Non-admin users only read their own recipes and public recipes
+    recipes_query = Recipe.query
+    if not current_user.is_admin:
+        recipes_query = recipes_query.filter((Recipe.user_id == current_user_id) | (Recipe.is_public == True))
+    if since:
+        recipes_query = recipes_query.filter(Recipe.updated_at >= SyncService.window_start(since))
+    recipes = recipes_query.all()
+
+    created, updated = [], []
+    for recipe in recipes:
+        if since is None or recipe.created_at >= since:
+            created.append(recipe)
+        else:
+            updated.append(recipe)
+
+    deleted = set()
+    if since:
+        # Query to retrieve recipe tombstones recorded since the cursor
+        # Tombstones are written when a recipe is deleted and when a public recipe is made private
+        # Non-admin users only see tombstones for their own recipes or recipes that were public
+        tombstones_query = Tombstone.query.filter(
+            Tombstone.entity_type == 'recipe',
+            Tombstone.deleted_at >= SyncService.window_start(since)
+        )
+        if not current_user.is_admin:
+            tombstones_query = tombstones_query.filter(
+                (Tombstone.user_id == current_user_id) | (Tombstone.is_public == True)
+            )
+        # A recipe made private that is still visible to this user (its owner, an admin, or
+        # made public again) is reported as changed instead
+        deleted = {tombstone.entity_id for tombstone in tombstones_query.all()} - {recipe.id for recipe in recipes}
+
+    return jsonify({
+        "cursor": cursor.isoformat(),
+        "created": recipes_schema.dump(created),
+        "updated": recipes_schema.dump(updated),
+        "deleted": sorted(deleted)
+    }), 200
+
 @bp.route('/<int:recipe_id>', methods=['GET'])
 @jwt_required()
 @handle_errors
@@ -190,6 +525,131 @@ def get_recipe(recipe_id):
             "message": "You do not have permission to view this recipe. You can only view your own recipes or public recipes."
         }), 403
 
+@bp.route('/<int:recipe_id>/nutrients', methods=['GET'])
+@jwt_required()
+@handle_errors
+def get_recipe_nutrients(recipe_id):
+    current_user_id = get_jwt_identity()
+    # Query to retrieve the current user
+    # This query fetches the User object for the authenticated user
+    # If the user doesn't exist, it will raise a 404 error
+    current_user = User.query.get_or_404(current_user_id)
+
+    # Query to retrieve the recipe's owner and visibility
+    # This query selects only the two columns needed for the access check
+    recipe = db.session.execute(
+        db.select(Recipe.user_id, Recipe.is_public).where(Recipe.id == recipe_id)
+    ).first()
+    if recipe is None:
+        return jsonify({"error": "Resource not found"}), 404
+    if not (current_user.is_admin or recipe.user_id == current_user_id or recipe.is_public):
+        return jsonify({
+            "error": "Access denied",
+            "message": "You do not have permission to view this recipe. You can only view your own recipes or public recipes."
+        }), 403
+
+    # The totals are computed from the recipe's lines and the cached nutrient matrix
+    # Lines without a mass unit can't be counted, so they are reported alongside
+    micronutrients = NutrientService.recipe_totals([recipe_id])[recipe_id]
+    unconvertible = ReadModelService.unconvertible_lines([recipe_id]).get(recipe_id, [])
+    return jsonify({"recipe_id": recipe_id, "micronutrients": micronutrients, "unconvertible": unconvertible}), 200
+
+@bp.route('/<int:recipe_id>/similar', methods=['GET'])
+@jwt_required()
+@handle_errors
+def get_similar_recipes(recipe_id):
+    current_user_id = get_jwt_identity()
+    # Query to retrieve the current user
+    # This query fetches the User object for the authenticated user
+    # If the user doesn't exist, it will raise a 404 error
+    current_user = User.query.get_or_404(current_user_id)
+
+    k = request.args.get('k', 10)
+    try:
+        k = int(k)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid k. Must be an integer between 1 and 50.")
+    if not 1 <= k <= 50:
+        raise ValueError("Invalid k. Must be an integer between 1 and 50.")
+
+    # Query to retrieve the recipe's owner and visibility
+    # This query selects only the two columns needed for the access check
+    recipe = db.session.execute(
+        db.select(Recipe.user_id, Recipe.is_public).where(Recipe.id == recipe_id)
+    ).first()
+    if recipe is None:
+        return jsonify({"error": "Resource not found"}), 404
+    if not (current_user.is_admin or recipe.user_id == current_user_id or recipe.is_public):
+        return jsonify({
+            "error": "Access denied",
+            "message": "You do not have permission to view this recipe. You can only view your own recipes or public recipes."
+        }), 403
+
+    # The search runs over the precomputed recipe vectors, restricted to recipes the user can see
+    similar = SimilarityService.similar(recipe_id, current_user_id, current_user.is_admin, k)
+    if similar is None:
+        return jsonify({"error": "Resource not found"}), 404
+    return jsonify({"recipe_id": recipe_id, "similar": similar}), 200
+
+@bp.route('/<int:recipe_id>/scaled', methods=['GET'])
+@jwt_required()
+@handle_errors
+def get_scaled_recipe(recipe_id):
+    current_user_id = get_jwt_identity()
+    # Query to retrieve the current user
+    # This query fetches the User object for the authenticated user
+    # If the user doesn't exist, it will raise a 404 error
+    current_user = User.query.get_or_404(current_user_id)
+
+    # Example request:
+    # GET /recipes/1/scaled?dog_id=2&days=7&activity=normal
+    dog_id = request.args.get('dog_id', type=int)
+    if dog_id is None:
+        raise ValueError("Missing or invalid dog_id. Must be an integer.")
+    days = parse_days_arg(default=1)
+
+    result = _scale_pairs(
+        [{"recipe_id": recipe_id, "dog_id": dog_id, "days": days}],
+        current_user,
+        request.args.get('activity', 'normal')
+    )[0]
+    status_code = result.pop('status')
+    result.pop('index')
+    return jsonify(result), status_code
+
+@bp.route('/scaled', methods=['POST'])
+@jwt_required()
+@handle_errors
+def get_scaled_recipes():
+    current_user_id = get_jwt_identity()
+    # Query to retrieve the current user
+    # This query fetches the User object for the authenticated user
+    # If the user doesn't exist, it will raise a 404 error
+    current_user = User.query.get_or_404(current_user_id)
+
+    # Example request body:
+    # {"activity": "normal", "items": [{"recipe_id": 1, "dog_id": 2, "days": 7}, ...]}
+    data = request.json
+    if not isinstance(data, dict) or not isinstance(data.get('items'), list):
+        raise ValueError("Request body must be an object with an 'items' list.")
+    items = data['items']
+    max_items = current_app.config['MAX_BATCH_SIZE']
+    if not items or len(items) > max_items:
+        raise ValueError(f"A batch must contain between 1 and {max_items} items.")
+    max_days = current_app.config['MAX_MEAL_PLAN_DAYS']
+    pairs = []
+    for item in items:
+        if not isinstance(item, dict) or not validate_id_list([item.get('recipe_id'), item.get('dog_id')]):
+            raise ValueError("Every item must have an integer 'recipe_id' and 'dog_id'.")
+        days = item.get('days', 1)
+        if not isinstance(days, int) or not 1 <= days <= max_days:
+            raise ValueError(f"Invalid days. Must be an integer between 1 and {max_days}.")
+        pairs.append({"recipe_id": item['recipe_id'], "dog_id": item['dog_id'], "days": days})
+
+    results = _scale_pairs(pairs, current_user, data.get('activity', 'normal'))
+    all_ok = all(result['status'] == 200 for result in results)
+    return jsonify({"results": results}), 200 if all_ok else 207
+
 @bp.route('/<int:recipe_id>', methods=['PUT', 'PATCH'])
 @jwt_required()
 @handle_errors
@@ -217,36 +677,25 @@ def update_recipe(recipe_id):
     validated_data = request.json
     validated_data['user_id'] = current_user_id
 
-    if 'name' in validated_data:
-        new_name = validated_data['name']
-        if not validate_recipe_name(new_name):
-            return jsonify({
-                "error": "Invalid recipe name. Recipe name should be 3-100 characters long."
-            }), 400
-        recipe.name = new_name
-
-    if 'instructions' in validated_data:
-        new_instructions = validated_data['instructions']
-        if not validate_recipe_instructions(new_instructions):
-            return jsonify({"error": "Invalid recipe instructions. Must be a non-empty string."}), 400
-        recipe.instructions = new_instructions
+    # Validate the whole request before changing anything
+    # An error return must not leave half-applied changes in the session, where the next
+    # commit in the same context (such as a later item of a /batch run) would write them
+    if 'name' in validated_data and not validate_recipe_name(validated_data['name']):
+        return jsonify({
+            "error": "Invalid recipe name. Recipe name should be 3-100 characters long."
+        }), 400
 
-    if 'description' in validated_data:
-        new_description = validated_data['description']
-        if not validate_recipe_description(new_description):
-            return jsonify({"error": "Invalid recipe description. Must be a string."}), 400
-        recipe.description = new_description
+    if 'instructions' in validated_data and not validate_recipe_instructions(validated_data['instructions']):
+        return jsonify({"error": "Invalid recipe instructions. Must be a non-empty string."}), 400
 
-    if 'is_public' in validated_data:
-        recipe.is_public = validated_data['is_public']
+    if 'description' in validated_data and not validate_recipe_description(validated_data['description']):
+        return jsonify({"error": "Invalid recipe description. Must be a string."}), 400
 
     if 'ingredients' in validated_data:
-        # Remove existing ingredients
-        recipe.ingredients = []
-        # Add new ingredients
         if not validate_ingredients_list(validated_data['ingredients']):
             return jsonify({"error": "Invalid ingredients list. Each ingredient must have a valid ingredient_id, quantity, and unit."}), 400
-        for ingredient in validated_data['ingredients']:
+        new_ingredients = validated_data['ingredients']
+        for ingredient in new_ingredients:
             ingredient_id = ingredient['ingredient_id']
             quantity = ingredient['quantity']
             unit = ingredient['unit']
@@ -266,57 +715,121 @@ def update_recipe(recipe_id):
                     "error": f"Invalid quantity for ingredient {ingredient_id}. Quantity must be a positive number."
                 }), 400
 
-            # Query to retrieve the ingredient from the database
-            # This query fetches the Ingredient object with the given ID
-            # If the ingredient doesn't exist, db_ingredient will be None
-            db_ingredient = Ingredient.query.get(ingredient_id)
+        # Query to retrieve all referenced ingredients in one go
+        # This query fetches the Ingredient objects whose IDs appear in the new list
+        # Missing IDs are reported below instead of issuing one query per ingredient
+        db_ingredients = {
+            db_ingredient.id: db_ingredient
+            for db_ingredient in Ingredient.query.filter(
+                Ingredient.id.in_({ingredient['ingredient_id'] for ingredient in new_ingredients})
+            ).all()
+        }
+        for ingredient in new_ingredients:
+            ingredient_id = ingredient['ingredient_id']
+            db_ingredient = db_ingredients.get(ingredient_id)
             if not db_ingredient:
                 return jsonify({
                     "error": f"Ingredient with id {ingredient_id} not found. Please use a valid ingredient ID."
                 }), 400
-            
+
             if not validate_ingredient_name(db_ingredient.name):
                 return jsonify({
                     "error": f"Invalid ingredient name for id {ingredient_id}. Ingredient name should be 2-50 characters long and contain only letters, numbers, spaces, and hyphens."
                 }), 400
 
-            unit = sanitize_string(ingredient['unit'])
-            # Create a new RecipeIngredient instance and append it to the recipe
-            # This creates a new RecipeIngredient object and associates it with the recipe
-            recipe_ingredient = RecipeIngredient(
-                ingredient_id=ingredient_id,
-                quantity=quantity,
-                unit=unit
-            )
-            recipe.ingredients.append(recipe_ingredient)
-
     if 'dog_ids' in validated_data:
         new_dog_ids = validated_data['dog_ids']
         if not validate_id_list(new_dog_ids):
             return jsonify({"error": "Invalid dog_ids. Must be a non-empty list of integers."}), 400
-        # Remove existing dog associations
-        recipe.dogs = []
-        # Add new dog associations
+
+        current_dogs = {dog.id: dog for dog in recipe.dogs}
+        added_dog_ids = set(new_dog_ids) - set(current_dogs)
+        removed_dog_ids = set(current_dogs) - set(new_dog_ids)
+
+        # Query to retrieve only the dogs being newly linked
+        # This query fetches the Dog objects for the added IDs in a single round trip
+        added_dogs = {dog.id: dog for dog in Dog.query.filter(Dog.id.in_(added_dog_ids)).all()} if added_dog_ids else {}
         for dog_id in new_dog_ids:
-            # Query to retrieve the dog from the database
-            # This query fetches the Dog object with the given ID
-            # If the dog doesn't exist, dog will be None
-            dog = Dog.query.get(dog_id)
+            if dog_id not in added_dog_ids:
+                continue
+            dog = added_dogs.get(dog_id)
             if not dog:
                 return jsonify({"error": f"Dog with id {dog_id} not found"}), 400
             if not current_user.is_admin and dog.user_id != current_user_id:
                 return jsonify({"error": f"You don't have permission to assign dog with id {dog_id} to this recipe"}), 403
-            recipe.dogs.append(dog)
+
+    # Everything is valid, so apply the changes
+    if 'name' in validated_data:
+        recipe.name = validated_data['name']
+
+    if 'instructions' in validated_data:
+        recipe.instructions = validated_data['instructions']
+
+    if 'description' in validated_data:
+        recipe.description = validated_data['description']
+
+    if 'is_public' in validated_data:
+        recipe.is_public = validated_data['is_public']
+
+    # Ingredient and dog changes only touch child rows, so stamp the recipe explicitly
+    # This keeps Recipe.updated_at accurate for the change feed
+    recipe.updated_at = datetime.utcnow()
+
+    if 'ingredients' in validated_data:
+        # Diff the new list against the existing RecipeIngredient rows
+        # Rows are matched on ingredient_id, so an unchanged line issues no statement,
+        # a changed quantity or unit becomes an UPDATE, and only unmatched lines are inserted or deleted
+        existing_rows = {}
+        for recipe_ingredient in recipe.ingredients:
+            existing_rows.setdefault(recipe_ingredient.ingredient_id, []).append(recipe_ingredient)
+
+        for ingredient in new_ingredients:
+            ingredient_id = ingredient['ingredient_id']
+            quantity = float(ingredient['quantity'])
+            unit = sanitize_string(ingredient['unit'])
+            matches = existing_rows.get(ingredient_id)
+            if matches:
+                recipe_ingredient = matches.pop(0)
+                if recipe_ingredient.quantity != quantity:
+                    recipe_ingredient.quantity = quantity
+                if recipe_ingredient.unit != unit:
+                    recipe_ingredient.unit = unit
+            else:
+                # Create a new RecipeIngredient instance and append it to the recipe
+                # The ingredient is attached directly so serialization doesn't need to load it again
+                recipe.ingredients.append(RecipeIngredient(
+                    ingredient=db_ingredients[ingredient_id],
+                    quantity=quantity,
+                    unit=unit
+                ))
+
+        # Any existing rows left unmatched are removed from the collection
+        # The delete-orphan cascade turns these into DELETE statements on flush
+        for leftover_rows in existing_rows.values():
+            for recipe_ingredient in leftover_rows:
+                recipe.ingredients.remove(recipe_ingredient)
+
+    if 'dog_ids' in validated_data:
+        # Only the changed associations are written, as single 'dog_recipe' INSERTs and DELETEs
+        for dog_id in removed_dog_ids:
+            recipe.dogs.remove(current_dogs[dog_id])
+        for dog_id in new_dog_ids:
+            if dog_id in added_dogs and added_dogs[dog_id] not in recipe.dogs:
+                recipe.dogs.append(added_dogs[dog_id])
+
+        # Only the dogs that gained or lost this recipe move forward in the change feed
+        SyncService.touch_dogs(added_dog_ids | removed_dog_ids)
+
+    # Flush the pending changes and serialize the recipe from the session
+    # The flush assigns IDs to new rows, so the response can be built without reloading the recipe
+    db.session.flush()
+    result = recipe_schema.dump(recipe)
 
     # Commit the changes to the database
     # This saves all the modifications to the recipe and its associations
     db.session.commit()
 
-    # Refresh the recipe object to ensure all relationships are up-to-date
-    # This reloads the recipe object from the database to reflect any changes made during the transaction
-    db.session.refresh(recipe)
-
-    return jsonify(recipe_schema.dump(recipe)), 200
+    return jsonify(result), 200
 
 @bp.route('/<int:recipe_id>', methods=['DELETE'])
 @jwt_required()
@@ -340,8 +853,9 @@ def delete_recipe(recipe_id):
         }), 403
 
     # Delete the recipe from the database
-    # This removes the recipe and all its associated data (due to cascade delete settings)
-    db.session.delete(recipe)
+    # This removes the recipe, its ingredients and its dog associations with set-based DELETE statements
+    # so no RecipeIngredient objects are loaded; see DeletionService.py for the individual statements
+    DeletionService.delete_recipes([recipe.id])
     db.session.commit()
 
     return jsonify({"message": "Recipe deleted successfully"}), 200
\ No newline at end of file
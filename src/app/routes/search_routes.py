@@ -1,15 +1,25 @@
 from flask import Blueprint, request, jsonify
+from app import db
 from app.models.recipe import Recipe
 from app.models.user import User
 from app.models.ingredient import Ingredient
 from ..schemas.recipe_schema import recipes_schema
 from ..schemas.ingredient_schema import ingredients_schema
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.utils.route_helpers import handle_errors
+from flask_jwt_extended import get_jwt_identity
+from app.utils.route_helpers import handle_errors, jwt_required
 from app.utils.validators import validate_user_id, validate_ingredient_id
+from app.services.ReadModelService import ReadModelService
+from app.services.AutocompleteService import AutocompleteService, MAX_SUGGESTIONS
+from app.services.SearchCacheService import SearchCacheService, normalise_query
 
 bp = Blueprint('search', __name__, url_prefix='/search')
 
+def _visible(condition, visibility):
+    """
+    Combine a condition with an optional visibility condition.
+    """
+    return condition if visibility is None else condition & visibility
+
 @bp.route('/recipes', methods=['GET'])
 @jwt_required()
 @handle_errors
@@ -26,27 +36,26 @@ def search_recipes():
     # Example request:
     # GET /search/recipes?q=chicken
     
-    if not query:
+    if not query.strip():
         return jsonify({
             "error": "Invalid search",
             "message": "Please provide a search query using the 'q' parameter."
         }), 400
 
-    if current_user.is_admin:
-        # Query to retrieve all recipes matching the search query for admin users
-        # This query uses case-insensitive matching (ilike) on recipe name and description
-        # It returns all matching recipes regardless of ownership or public status
-        recipes = Recipe.query.filter(
-            Recipe.name.ilike(f'%{query}%') | Recipe.description.ilike(f'%{query}%')
-        ).all()
-    else:
-        # Query to retrieve recipes matching the search query for non-admin users
-        # This query uses case-insensitive matching (ilike) on recipe name and description
-        # It only returns recipes that are either owned by the current user or are public
-        recipes = Recipe.query.filter(
-            (Recipe.name.ilike(f'%{query}%') | Recipe.description.ilike(f'%{query}%')) &
-            ((Recipe.user_id == current_user_id) | (Recipe.is_public == True))
-        ).all()
+    # Equivalent spellings of a query ("Chicken ", "chicken") share one cached result
+    query = normalise_query(query)
+    condition = Recipe.name.ilike(f'%{query}%') | Recipe.description.ilike(f'%{query}%')
+    visibility = None
+    if not current_user.is_admin:
+        # Non-admin users only see recipes that are either their own or public
+        visibility = (Recipe.user_id == current_user_id) | (Recipe.is_public == True)
+
+    # Query to retrieve the IDs of the recipes matching the search query
+    # This query uses case-insensitive matching (ilike) on recipe name and description
+    # The public matches are cached per normalised query, shared by every user, until a recipe or ingredient changes
+    recipe_ids = SearchCacheService.recipe_ids('recipes', query, condition, current_user_id, current_user.is_admin)
+    # The cached IDs may be up to 30 seconds old, so visibility is checked again when loading the recipes
+    recipes = ReadModelService.recipes(_visible(Recipe.id.in_(recipe_ids), visibility)) if recipe_ids else []
     
     if not recipes:
         return jsonify({
@@ -54,7 +63,7 @@ def search_recipes():
             "details": "Your search did not match any recipes. Try different keywords or check your permissions."
         }), 404
 
-    return jsonify(recipes_schema.dump(recipes))
+    return jsonify(recipes)
 
 @bp.route('/ingredients', methods=['GET'])
 @handle_errors
@@ -65,18 +74,29 @@ def search_ingredients():
     # Example request:
     # GET /search/ingredients?q=tomato&category=vegetable
     
+    # Equivalent spellings of a query ("Chicken ", "chicken") share one cached result
+    query = normalise_query(query)
+    category = category.strip()
+
     # Query to retrieve ingredients matching the search query
     # This query uses case-insensitive matching (ilike) on ingredient name
-    ingredients_query = Ingredient.query.filter(Ingredient.name.ilike(f'%{query}%'))
+    condition = Ingredient.name.ilike(f'%{query}%')
     
     if category:
         # If a category is provided, further filter the query to match the category
-        ingredients_query = ingredients_query.filter(Ingredient.category == category)
+        condition = condition & (Ingredient.category == category)
     
-    # Execute the query and retrieve all matching ingredients
-    ingredients = ingredients_query.all()
+    # The matching IDs are cached per normalised query and filters until an ingredient changes
+    ingredient_ids = SearchCacheService.ids(
+        'ingredients', query, None,
+        lambda: db.session.execute(db.select(Ingredient.id).where(condition).order_by(Ingredient.id)).scalars().all(),
+        category=category
+    )
+
+    # Retrieve the matching ingredients as plain dicts
+    ingredients = ReadModelService.ingredients(Ingredient.id.in_(ingredient_ids)) if ingredient_ids else []
     
-    return jsonify(ingredients_schema.dump(ingredients))
+    return jsonify(ingredients)
 
 @bp.route('/recipes/by_ingredient', methods=['GET'])
 @jwt_required()
@@ -100,27 +120,28 @@ def search_recipes_by_ingredient():
             "message": "Ingredient ID is required. Please provide an 'ingredient_id' parameter in your request."
         }), 400
     
+    # Query parameters are strings, so convert the ID before validating it
+    ingredient_id = int(ingredient_id) if ingredient_id.isdigit() else None
     if not validate_ingredient_id(ingredient_id):
         return jsonify({
             "error": "Invalid ingredient_id",
             "message": "The provided ingredient_id must be a positive integer."
         }), 400
 
-    if current_user.is_admin:
-        # Query to retrieve all recipes containing the specified ingredient for admin users
-        # This query joins the Recipe and RecipeIngredient tables and filters by ingredient_id
-        # It returns all matching recipes regardless of ownership or public status
-        recipes = Recipe.query.join(Recipe.ingredients).filter(
-            Recipe.ingredients.any(ingredient_id=ingredient_id)
-        ).all()
-    else:
-        # Query to retrieve recipes containing the specified ingredient for non-admin users
-        # This query joins the Recipe and RecipeIngredient tables and filters by ingredient_id
-        # It only returns recipes that are either owned by the current user or are public
-        recipes = Recipe.query.join(Recipe.ingredients).filter(
-            Recipe.ingredients.any(ingredient_id=ingredient_id) &
-            ((Recipe.user_id == current_user_id) | (Recipe.is_public == True))
-        ).all()
+    condition = Recipe.ingredients.any(ingredient_id=ingredient_id)
+    visibility = None
+    if not current_user.is_admin:
+        # Non-admin users only see recipes that are either their own or public
+        visibility = (Recipe.user_id == current_user_id) | (Recipe.is_public == True)
+
+    # Query to retrieve the IDs of the recipes containing the specified ingredient
+    # This query checks RecipeIngredient with an EXISTS subquery on ingredient_id
+    # The public matches are cached per ingredient, shared by every user, until a recipe or ingredient changes
+    recipe_ids = SearchCacheService.recipe_ids(
+        'recipes_by_ingredient', ingredient_id, condition, current_user_id, current_user.is_admin
+    )
+    # The cached IDs may be up to 30 seconds old, so visibility is checked again when loading the recipes
+    recipes = ReadModelService.recipes(_visible(Recipe.id.in_(recipe_ids), visibility)) if recipe_ids else []
     
     if not recipes:
         return jsonify({
@@ -128,4 +149,38 @@ def search_recipes_by_ingredient():
             "details": "No recipes were found with the specified ingredient. This could be because the ingredient doesn't exist, or you don't have permission to view recipes using this ingredient."
         }), 404
 
-    return jsonify(recipes_schema.dump(recipes))
\ No newline at end of file
+    return jsonify(recipes)
+
+@bp.route('/autocomplete', methods=['GET'])
+@jwt_required(optional=True)
+@handle_errors
+def autocomplete():
+    query = request.args.get('q', '')
+    kind = request.args.get('type', 'ingredient')
+
+    # Example request:
+    # GET /search/autocomplete?q=chi&type=recipe&k=5
+
+    if not query.strip():
+        return jsonify({
+            "error": "Invalid search",
+            "message": "Please provide a search query using the 'q' parameter."
+        }), 400
+
+    try:
+        k = int(request.args.get('k', 10))
+    except ValueError:
+        raise ValueError(f"Invalid k. Must be an integer between 1 and {MAX_SUGGESTIONS}.")
+    if not 1 <= k <= MAX_SUGGESTIONS:
+        raise ValueError(f"Invalid k. Must be an integer between 1 and {MAX_SUGGESTIONS}.")
+
+    # Recipe suggestions follow the usual visibility rules; anonymous users only see public recipes
+    current_user_id = get_jwt_identity()
+    is_admin = False
+    if kind == 'recipe' and current_user_id is not None:
+        # Query to retrieve the admin flag of the current user
+        # This query selects a single column instead of loading the User object
+        is_admin = bool(db.session.execute(db.select(User.is_admin).where(User.id == current_user_id)).scalar())
+
+    suggestions = AutocompleteService.suggest(query, kind, k, current_user_id, is_admin)
+    return jsonify({"query": query, "type": kind, "suggestions": suggestions})
@@ -1,9 +1,15 @@
 from flask import Blueprint, request, jsonify
+from app import db
 from app.models.recipe import Recipe
 from app.models.user import User
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.utils.route_helpers import handle_errors
-from app.utils.validators import validate_user_id, validate_id_list, validate_ingredient_id, validate_quantity
+from app.models.dog import Dog
+from app.models.dog_recipe import dog_recipe
+from flask_jwt_extended import get_jwt_identity
+from app.utils.route_helpers import handle_errors, parse_days_arg, jwt_required
+from app.services.NutrientService import NutrientService
+from app.services.ShoppingListService import ShoppingListService
+from app.utils.validators import validate_user_id, validate_id_list
+from app.utils.units import to_grams
 
 bp = Blueprint('shopping_list', __name__, url_prefix='/shopping-list')
 
@@ -33,22 +39,18 @@ def get_shopping_list():
             }), 400
 
         # Fetch recipes
-        if current_user.is_admin:
-            # Query to retrieve all recipes with IDs in the recipe_ids list for admin users
-            # This query uses the `in_` operator to match multiple IDs
-            # It returns all matching recipes regardless of ownership or public status
-            recipes = Recipe.query.filter(Recipe.id.in_(recipe_ids)).all()
-        else:
+        # Only the ID and 'updated_at' of each recipe are read; together with the ingredient
+        # catalog version they are the shopping list cache key
+        recipe_query = db.select(Recipe.id, Recipe.updated_at).where(Recipe.id.in_(recipe_ids))
+        if not current_user.is_admin:
             # Query to retrieve recipes for non-admin users
             # This query filters recipes based on three conditions:
             # 1. The recipe ID is in the provided recipe_ids list
             # 2. The recipe is owned by the current user OR
             # 3. The recipe is public
             # It ensures that users can only access their own recipes or public recipes
-            recipes = Recipe.query.filter(
-                Recipe.id.in_(recipe_ids),
-                ((Recipe.user_id == current_user_id) | (Recipe.is_public == True))
-            ).all()
+            recipe_query = recipe_query.where((Recipe.user_id == current_user_id) | (Recipe.is_public == True))
+        recipes = db.session.execute(recipe_query).all()
 
         if len(recipes) != len(recipe_ids):
             inaccessible_ids = set(recipe_ids) - set(recipe.id for recipe in recipes)
@@ -59,47 +61,48 @@ def get_shopping_list():
             }), 403
 
         # Aggregate ingredients
-        shopping_list = {}
-        for recipe in recipes:
-            # Iterate through the recipe_ingredient relationship
-            # This accesses the 'ingredients' relationship of each Recipe object
-            # It retrieves all RecipeIngredient objects associated with the recipe
-            for recipe_ingredient in recipe.ingredients:
-                # Access the Ingredient object through the RecipeIngredient relationship
-                ingredient = recipe_ingredient.ingredient
-                if not validate_ingredient_id(ingredient.id):
-                    return jsonify({
-                        "error": f"Invalid ingredient_id: {ingredient.id}. Must be a positive integer."
-                    }), 400
-                if ingredient.id in shopping_list:
-                    new_quantity = shopping_list[ingredient.id]['quantity'] + recipe_ingredient.quantity
-                    if not validate_quantity(new_quantity):
-                        return jsonify({
-                            "error": f"Invalid quantity for ingredient {ingredient.id}. Quantity must be a positive number."
-                        }), 400
-                    shopping_list[ingredient.id]['quantity'] = new_quantity
-                else:
-                    if not validate_quantity(recipe_ingredient.quantity):
-                        return jsonify({
-                            "error": f"Invalid quantity for ingredient {ingredient.id}. Quantity must be a positive number."
-                        }), 400
-                    shopping_list[ingredient.id] = {
-                        'name': ingredient.name,
-                        'quantity': recipe_ingredient.quantity,
-                        'unit': recipe_ingredient.unit
-                    }
+        # Repeated requests for the same recipes are served from the cache without reading recipe_ingredient
+        shopping_list_result = ShoppingListService.get(recipes)
 
-        # Convert dictionary to list for JSON response
-        shopping_list_result = [
-            {
-                'ingredient_id': ingredient_id,
-                'name': item['name'],
-                'quantity': item['quantity'],
-                'unit': item['unit']
-            }
-            for ingredient_id, item in shopping_list.items()
-        ]
+        # Example request:
+        # GET /shopping-list/?recipe_ids=1&recipe_ids=2&include=micronutrients
+        # Adds the micronutrient totals of the whole list, computed from its quantities and the nutrient matrix
+        if 'micronutrients' in request.args.get('include', '').split(','):
+            grams = {}
+            unconvertible = []
+            for item in shopping_list_result:
+                # Items without a mass unit can't be counted and are reported instead, see app/utils/units.py
+                item_grams = to_grams(item['quantity'], item['unit'])
+                if item_grams is None:
+                    unconvertible.append(item)
+                else:
+                    grams[item['ingredient_id']] = grams.get(item['ingredient_id'], 0.0) + item_grams
+            micronutrients = NutrientService.totals(grams)
+            return jsonify({"items": shopping_list_result, "micronutrients": micronutrients, "unconvertible": unconvertible}), 200
 
         return jsonify(shopping_list_result), 200
     except Exception as e:
-        return jsonify({"error": "An unexpected error occurred", "details": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": "An unexpected error occurred", "details": str(e)}), 500
+
+@bp.route('/household', methods=['GET'])
+@jwt_required()
+@handle_errors
+def get_household_shopping_list():
+    current_user_id = get_jwt_identity()
+    if not validate_user_id(current_user_id):
+        return jsonify({"error": "Invalid user_id. Must be a positive integer."}), 400
+
+    # Example request:
+    # GET /shopping-list/household?days=7
+    days = parse_days_arg()
+
+    # Query to aggregate the shopping list for every dog the user owns
+    # The dogs are matched with a subquery, so their recipes are resolved through dog_recipe
+    # and summed in the same statement; only recipes the user can see are included
+    dog_ids = db.select(Dog.id).where(Dog.user_id == current_user_id)
+    items = ShoppingListService.for_dogs(
+        dog_recipe.c.dog_id.in_(dog_ids),
+        days,
+        (Recipe.user_id == current_user_id) | (Recipe.is_public == True)
+    )
+    return jsonify({"days": days, "items": items}), 200
@@ -1,10 +1,14 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from app.models.user import User
+from datetime import datetime
 from ..schemas.user_schema import user_schema, users_schema
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import get_jwt_identity
 from app.utils.validators import validate_password, validate_username, validate_user_id, sanitize_string, validate_is_admin, validate_and_sanitize_email, validate_url
-from app.utils.route_helpers import handle_errors, validate_request_data
+from app.utils.route_helpers import handle_errors, validate_request_data, admin_required, jwt_required
+from app.services.DeletionService import DeletionService
+from app.services.ReadModelService import ReadModelService
+from app.services.TokenRevocationService import TokenRevocationService
 
 bp = Blueprint('users', __name__, url_prefix='/users')
 
@@ -24,19 +28,10 @@ def get_users():
         
         if current_user.is_admin:
             # Query to retrieve all users
-            # This query fetches all User objects from the database
+            # This query selects only the serialized user columns, without building ORM objects
             # It's only executed for admin users to get a list of all users
-            users = User.query.all()
-            result = users_schema.dump(users)
-            for user, user_data in zip(users, result):
-                if include_dogs:
-                    # Access the 'dogs' relationship of each User object
-                    # This retrieves all Dog objects associated with the user
-                    user_data['dog_ids'] = [dog.id for dog in user.dogs]
-                if include_recipes:
-                    # Access the 'recipes' relationship of each User object
-                    # This retrieves all Recipe objects associated with the user
-                    user_data['recipe_ids'] = [recipe.id for recipe in user.recipes]
+            # Dog and recipe IDs are fetched with one query each rather than one per user
+            result = ReadModelService.users(include_dogs=include_dogs, include_recipes=include_recipes)
             return jsonify(result)
         else:
             # For non-admin users, only return their own user data
@@ -53,6 +48,80 @@ def get_users():
     except Exception as e:
         return jsonify({"error": "An unexpected error occurred", "details": str(e)}), 500
 
+# Columns the admin user listing can be sorted by
+# Each of them is indexed, so a sorted page is read from the index instead of sorting every user
+ADMIN_SORT_COLUMNS = {
+    'id': User.id,
+    'username': User.username,
+    'dog_count': User.dog_count,
+    'recipe_count': User.recipe_count,
+    'last_active_at': User.last_active_at
+}
+
+@bp.route('/admin', methods=['GET'])
+@admin_required
+@handle_errors
+def get_users_admin():
+    # Example request:
+    # GET /users/admin?sort=dog_count&order=desc&min_dogs=2&active_since=2024-07-01&page=1&per_page=50
+    sort = request.args.get('sort', 'id')
+    order = request.args.get('order', 'asc').lower()
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 50, type=int)
+
+    if sort not in ADMIN_SORT_COLUMNS:
+        return jsonify({"error": f"Invalid sort. Must be one of: {', '.join(ADMIN_SORT_COLUMNS)}."}), 400
+    if order not in ('asc', 'desc'):
+        return jsonify({"error": "Invalid order. Must be 'asc' or 'desc'."}), 400
+    if page < 1 or not 1 <= per_page <= 100:
+        return jsonify({"error": "Invalid pagination. 'page' must be at least 1 and 'per_page' between 1 and 100."}), 400
+
+    # Build the filter from the counter columns
+    # These compare against precomputed values, so no per-user count queries are needed
+    conditions = []
+    for param, column, operator in (
+        ('min_dogs', User.dog_count, '__ge__'),
+        ('max_dogs', User.dog_count, '__le__'),
+        ('min_recipes', User.recipe_count, '__ge__'),
+        ('max_recipes', User.recipe_count, '__le__')
+    ):
+        if param in request.args:
+            value = request.args.get(param, type=int)
+            if value is None or value < 0:
+                return jsonify({"error": f"Invalid {param}. Must be a non-negative integer."}), 400
+            conditions.append(getattr(column, operator)(value))
+    if 'active_since' in request.args:
+        try:
+            active_since = datetime.fromisoformat(request.args['active_since'])
+        except ValueError:
+            return jsonify({"error": "Invalid active_since. Use YYYY-MM-DD or an ISO 8601 timestamp."}), 400
+        conditions.append(User.last_active_at >= active_since)
+    condition = db.and_(*conditions) if conditions else None
+
+    sort_column = ADMIN_SORT_COLUMNS[sort]
+    sort_expression = sort_column.desc().nulls_last() if order == 'desc' else sort_column.asc().nulls_last()
+
+    # Query to count the users matching the filter for the pagination metadata
+    total_query = db.select(db.func.count(User.id))
+    if condition is not None:
+        total_query = total_query.where(condition)
+    total = db.session.scalar(total_query)
+
+    # Query to retrieve one page of users, sorted by the indexed column
+    users = ReadModelService.users(
+        condition,
+        order_by=[sort_expression],
+        limit=per_page,
+        offset=(page - 1) * per_page
+    )
+
+    return jsonify({
+        "page": page,
+        "per_page": per_page,
+        "total": total,
+        "users": users
+    }), 200
+
 @bp.route('/<int:user_id>', methods=['GET'])
 @jwt_required()
 @handle_errors
@@ -171,9 +240,43 @@ def delete_user(user_id):
     if current_user.id != user_to_delete.id and not current_user.is_admin:
         return jsonify({"error": "Unauthorized. You can only delete your own account."}), 403
 
-    # Delete the user from the database
-    # This removes the user and all associated data (due to cascade delete settings)
-    db.session.delete(user_to_delete)
+    # Example request:
+    # DELETE /users/5?async=true
+    # Very large accounts can be deleted in the background, returning 202 straight away
+    if request.args.get('async', 'false').lower() == 'true':
+        DeletionService.delete_user_in_background(user_to_delete.id)
+        return jsonify({"message": "User deletion scheduled"}), 202
+
+    # Delete the user and all associated data from the database
+    # This removes the user's recipes, dogs and their association rows with set-based DELETE statements
+    # See DeletionService.py for the individual statements
+    DeletionService.delete_user(user_to_delete.id)
     db.session.commit()
 
-    return jsonify({"message": "User deleted successfully"}), 200
\ No newline at end of file
+    return jsonify({"message": "User deleted successfully"}), 200
+
+@bp.route('/<int:user_id>/revoke_tokens', methods=['POST'])
+@jwt_required()
+@handle_errors
+def revoke_user_tokens(user_id):
+    current_user_id = get_jwt_identity()
+    # Query to retrieve the current user
+    # This query fetches the User object for the authenticated user
+    # If the user doesn't exist, it will raise a 404 error
+    current_user = User.query.get_or_404(current_user_id)
+
+    if not validate_user_id(user_id):
+        return jsonify({"error": "Invalid user_id. Must be a positive integer."}), 400
+
+    if current_user.id != user_id and not current_user.is_admin:
+        return jsonify({"error": "Unauthorized. You can only revoke your own tokens."}), 403
+
+    # Query to check that the user exists
+    # This query fetches the User object for the specified user_id
+    if db.session.get(User, user_id) is None:
+        return jsonify({"error": "User not found"}), 404
+
+    # Revoke every token issued to the user so far, including the one used for this request
+    # This writes a single row to the revocation list, however many tokens the user holds
+    TokenRevocationService.revoke_all(user_id)
+    return jsonify({"message": "All tokens revoked successfully"}), 200
@@ -5,6 +5,8 @@ class IngredientSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Ingredient
         load_instance = True
+        # Only used to detect catalog changes, not part of the API
+        exclude = ('updated_at',)
 
 ingredient_schema = IngredientSchema()
 ingredients_schema = IngredientSchema(many=True)
\ No newline at end of file
@@ -0,0 +1,11 @@
+from ..extensions import ma
+from ..models.meal_plan import MealPlan
+
+class MealPlanSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = MealPlan
+        load_instance = True
+        include_fk = True
+
+meal_plan_schema = MealPlanSchema()
+meal_plans_schema = MealPlanSchema(many=True, exclude=('plan', 'shopping_list'))
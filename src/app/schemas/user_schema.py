@@ -5,7 +5,7 @@ class UserSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = User
         load_instance = True
-        exclude = ('password_hash',)
+        exclude = ('password_hash', 'token_generation')
 
 user_schema = UserSchema()
 users_schema = UserSchema(many=True)
\ No newline at end of file
@@ -1,7 +1,9 @@
 from flask_jwt_extended import create_access_token
 from app.models.user import User
+from app.services.TokenRevocationService import GENERATION_CLAIM
 from app import db
 from sqlalchemy.exc import IntegrityError
+from datetime import datetime
 
 class AuthService:
     @staticmethod
@@ -16,9 +18,16 @@ class AuthService:
             # The check_password method is a custom method on the User model
             # that compares the given password with the stored hash
             if user and user.check_password(password):
+                # Record the login as the user's latest activity for the admin user listing
+                user.last_active_at = datetime.utcnow()
+                db.session.commit()
+
                 # Create a JWT access token for the authenticated user
-                # The user's ID is used as the identity in the token
-                access_token = create_access_token(identity=user.id)
+                # The user's ID is used as the identity in the token, and the token generation
+                # lets a later revoke-all reject it
+                access_token = create_access_token(
+                    identity=user.id, additional_claims={GENERATION_CLAIM: user.token_generation}
+                )
                 return {'access_token': access_token}, 200
             return {'error': 'Invalid username or password'}, 401
         except Exception as e:
@@ -0,0 +1,366 @@
+import bisect
+import heapq
+import re
+import time
+from datetime import timedelta
+from threading import Lock
+from app import db
+from app.models.recipe import Recipe, recipe_generation
+from app.models.ingredient import Ingredient, catalog_version
+from app.models.recipe_ingredient import RecipeIngredient
+from app.models.dog_recipe import dog_recipe
+from app.models.tombstone import Tombstone
+from app.services.SyncService import SyncService
+from app.utils.cache import LRUCache
+
+# Most suggestions a single request can ask for; the per-prefix top lists keep this many
+MAX_SUGGESTIONS = 20
+
+# Writes from other processes don't move this process's generation counters, so the
+# indexes are also refreshed once they are this old, in seconds
+MAX_STALENESS = 60
+
+# Rows committed slightly out of order with their 'updated_at' are still picked up,
+# because each refresh looks back this far past the previous cursor
+REFRESH_OVERLAP = timedelta(seconds=5)
+
+# Past this many changed recipes a refresh rebuilds the indexes with one sort instead of
+# inserting the rows one by one, which costs a list shift per key
+MAX_INCREMENTAL_CHANGES = 1000
+
+_WORD = re.compile(r'\w+')
+
+def normalise(text):
+    """
+    Case-fold a name or query and collapse its whitespace.
+    """
+    return ' '.join(text.casefold().split())
+
+class _PrefixIndex:
+    """
+    A sorted-array prefix index over names.
+
+    Every word of a name starts a key, so "Chicken Breast" can be found by typing "chi" or
+    "bre". Keys are kept sorted as (key, id) tuples, so the matches of a prefix are one
+    contiguous slice found with two binary searches. The best MAX_SUGGESTIONS matches of each
+    prefix that has been asked for are remembered, and forgotten again when a name starting
+    one of the prefixes is added, removed or changes popularity.
+    """
+
+    def __init__(self, cache_size=4096):
+        self.keys = []
+        self.names = {}
+        self.ranks = {}
+        self.top = LRUCache(max_size=cache_size)
+
+    @staticmethod
+    def _keys(name):
+        normalised = normalise(name)
+        return {normalised[match.start():] for match in _WORD.finditer(normalised)}
+
+    def _forget(self, keys):
+        for key in keys:
+            for length in range(1, len(key) + 1):
+                self.top.pop(key[:length])
+
+    def build(self, entries):
+        """
+        Replace the contents of the index with (id, name, popularity) entries in one sort.
+        """
+        self.names = {}
+        self.ranks = {}
+        keys = []
+        for entry_id, name, popularity in entries:
+            self.names[entry_id] = name
+            self.ranks[entry_id] = (-popularity, normalise(name), entry_id)
+            keys.extend((key, entry_id) for key in self._keys(name))
+        keys.sort()
+        self.keys = keys
+        self.top.clear()
+
+    def add(self, entry_id, name, popularity):
+        """
+        Add or replace one entry.
+        """
+        self.remove(entry_id)
+        keys = self._keys(name)
+        for key in keys:
+            bisect.insort(self.keys, (key, entry_id))
+        self.names[entry_id] = name
+        self.ranks[entry_id] = (-popularity, normalise(name), entry_id)
+        self._forget(keys)
+
+    def remove(self, entry_id):
+        """
+        Remove one entry if it is indexed.
+        """
+        name = self.names.pop(entry_id, None)
+        if name is None:
+            return
+        del self.ranks[entry_id]
+        keys = self._keys(name)
+        for key in keys:
+            position = bisect.bisect_left(self.keys, (key, entry_id))
+            if position < len(self.keys) and self.keys[position] == (key, entry_id):
+                del self.keys[position]
+        self._forget(keys)
+
+    def search(self, prefix, k):
+        """
+        Return the rank tuples of the best k entries with a word starting with the normalised prefix.
+        """
+        top = self.top.get(prefix)
+        if top is None:
+            start = bisect.bisect_left(self.keys, (prefix,))
+            end = bisect.bisect_left(self.keys, (prefix + '\U0010ffff',), start)
+            matches = {entry_id for _, entry_id in self.keys[start:end]}
+            top = heapq.nsmallest(MAX_SUGGESTIONS, (self.ranks[entry_id] for entry_id in matches))
+            self.top.set(prefix, top)
+        return top[:k]
+
+class _RecipeIndexes:
+    """
+    Prefix indexes over recipe names, one per visibility scope.
+
+    Admins search 'all', other users search 'public' merged with the index of their own
+    private recipes, so results never need filtering and the remembered top lists stay valid
+    for every user.
+    """
+
+    def __init__(self):
+        self.all = _PrefixIndex()
+        self.public = _PrefixIndex()
+        self.private = {}
+        # Scope of each indexed recipe: None for public, the owner's ID for private
+        self.scopes = {}
+
+    def build(self, rows):
+        """
+        Fill the empty indexes from rows with 'id', 'name', 'user_id', 'is_public' and 'dogs', one sort per index.
+        """
+        private = {}
+        for row in rows:
+            self.scopes[row.id] = None if row.is_public else row.user_id
+            if not row.is_public:
+                private.setdefault(row.user_id, []).append((row.id, row.name, row.dogs))
+        self.all.build((row.id, row.name, row.dogs) for row in rows)
+        self.public.build((row.id, row.name, row.dogs) for row in rows if row.is_public)
+        for user_id, entries in private.items():
+            self.private[user_id] = _PrefixIndex(cache_size=64)
+            self.private[user_id].build(entries)
+
+    def remove(self, recipe_id):
+        scope = self.scopes.pop(recipe_id, None)
+        self.all.remove(recipe_id)
+        if scope is None:
+            self.public.remove(recipe_id)
+        elif scope in self.private:
+            self.private[scope].remove(recipe_id)
+            if not self.private[scope].names:
+                del self.private[scope]
+
+    def add(self, recipe_id, name, user_id, is_public, popularity):
+        self.remove(recipe_id)
+        self.all.add(recipe_id, name, popularity)
+        if is_public:
+            self.scopes[recipe_id] = None
+            self.public.add(recipe_id, name, popularity)
+        else:
+            self.scopes[recipe_id] = user_id
+            self.private.setdefault(user_id, _PrefixIndex(cache_size=64)).add(recipe_id, name, popularity)
+
+_state = {
+    'ingredients': None, 'ingredient_version': None, 'ingredients_at': 0.0,
+    'recipes': None, 'recipe_generation': None, 'recipes_at': 0.0, 'cursor': None
+}
+# Guards _state and the indexes, and is only held for in-memory reads and writes
+_lock = Lock()
+# Held by the one request refreshing each kind of index, while it queries the database and
+# builds a replacement; other requests keep searching the current index meanwhile
+_refresh_locks = {'ingredient': Lock(), 'recipe': Lock()}
+
+class AutocompleteService:
+    @staticmethod
+    def _ingredients_fresh(version):
+        """
+        Tell whether the ingredient index is up to date with the catalog; called with _lock held.
+        """
+        return _state['ingredients'] is not None and _state['ingredient_version'] == version \
+            and time.monotonic() - _state['ingredients_at'] < MAX_STALENESS
+
+    @staticmethod
+    def _refresh_ingredients():
+        """
+        Rebuild the ingredient index when the catalog changed or the index is stale.
+
+        An ingredient's popularity is the number of recipe lines that use it. The catalog is
+        small, so the index is rebuilt from one grouped query. The new index is built without
+        holding _lock and swapped in under it.
+        """
+        version = catalog_version()
+        with _lock:
+            if AutocompleteService._ingredients_fresh(version):
+                return
+            has_index = _state['ingredients'] is not None
+        # Only a request with no index to search yet waits for another one's refresh
+        if not _refresh_locks['ingredient'].acquire(blocking=not has_index):
+            return
+        try:
+            with _lock:
+                if AutocompleteService._ingredients_fresh(version):
+                    return
+
+            # Query to retrieve every ingredient with the number of recipe lines using it
+            # This query groups recipe_ingredient once for the whole catalog
+            uses = (
+                db.select(RecipeIngredient.ingredient_id, db.func.count().label('uses'))
+                .group_by(RecipeIngredient.ingredient_id)
+                .subquery()
+            )
+            rows = db.session.execute(
+                db.select(Ingredient.id, Ingredient.name, db.func.coalesce(uses.c.uses, 0))
+                .outerjoin(uses, uses.c.ingredient_id == Ingredient.id)
+            )
+            index = _PrefixIndex()
+            index.build(rows)
+
+            with _lock:
+                _state.update(ingredients=index, ingredient_version=version, ingredients_at=time.monotonic())
+        finally:
+            _refresh_locks['ingredient'].release()
+
+    @staticmethod
+    def _load_recipes(condition):
+        """
+        Add the recipes matching a condition to the recipe indexes, with their popularity.
+
+        A recipe's popularity is the number of dogs it is linked to.
+        """
+        # Query to retrieve the recipes to (re)index with the number of dogs linked to each
+        # This query groups dog_recipe in a subquery so recipes without dogs are kept
+        links = (
+            db.select(dog_recipe.c.recipe_id, db.func.count().label('dogs'))
+            .group_by(dog_recipe.c.recipe_id)
+            .subquery()
+        )
+        query = (
+            db.select(Recipe.id, Recipe.name, Recipe.user_id, Recipe.is_public, db.func.coalesce(links.c.dogs, 0).label('dogs'))
+            .outerjoin(links, links.c.recipe_id == Recipe.id)
+        )
+        if condition is not None:
+            query = query.where(condition)
+        return db.session.execute(query).all()
+
+    @staticmethod
+    def _recipes_fresh(generation):
+        """
+        Tell whether the recipe indexes are up to date with this process's writes; called with _lock held.
+        """
+        return _state['recipes'] is not None and _state['recipe_generation'] == generation \
+            and time.monotonic() - _state['recipes_at'] < MAX_STALENESS
+
+    @staticmethod
+    def _refresh_recipes():
+        """
+        Bring the recipe indexes up to date.
+
+        The indexes are built on first use. After that, once a recipe write has been committed
+        in this process (or the indexes are older than MAX_STALENESS), only recipes whose
+        'updated_at' moved since the last refresh are re-indexed and recipes with a tombstone
+        are removed. A burst of more than MAX_INCREMENTAL_CHANGES changes rebuilds them instead. Linking or unlinking dogs touches 'updated_at', so popularity follows too.
+
+        The queries and any full rebuild run without holding _lock; it is only taken to apply
+        the changed rows to the live indexes, or to swap in rebuilt ones.
+        """
+        generation = recipe_generation()
+        with _lock:
+            if AutocompleteService._recipes_fresh(generation):
+                return
+            has_indexes = _state['recipes'] is not None
+        # Only a request with no indexes to search yet waits for another one's refresh
+        if not _refresh_locks['recipe'].acquire(blocking=not has_indexes):
+            return
+        try:
+            with _lock:
+                if AutocompleteService._recipes_fresh(generation):
+                    return
+                # Only the holder of the refresh lock changes the indexes, so they can be read here and updated below
+                indexes = _state['recipes']
+                previous_cursor = _state['cursor']
+
+            cursor = SyncService.new_cursor()
+            changed = None
+            if indexes is not None:
+                since = previous_cursor - REFRESH_OVERLAP
+                # Recipes changed since the last refresh, found through the index on Recipe.updated_at
+                changed = AutocompleteService._load_recipes(Recipe.updated_at >= since)
+
+            if changed is None or len(changed) > MAX_INCREMENTAL_CHANGES:
+                indexes = _RecipeIndexes()
+                indexes.build(AutocompleteService._load_recipes(None))
+                changed, removed = [], []
+            else:
+                # Query to retrieve the IDs of recipes deleted since the last refresh
+                # This query uses the index on (entity_type, deleted_at)
+                removed = db.session.execute(
+                    db.select(Tombstone.entity_id).where(Tombstone.entity_type == 'recipe', Tombstone.deleted_at >= since)
+                ).scalars().all()
+
+            with _lock:
+                for recipe_id in removed:
+                    indexes.remove(recipe_id)
+                for row in changed:
+                    indexes.add(row.id, row.name, row.user_id, row.is_public, row.dogs)
+                _state.update(recipes=indexes, recipe_generation=generation, recipes_at=time.monotonic(), cursor=cursor)
+        finally:
+            _refresh_locks['recipe'].release()
+
+    @staticmethod
+    def suggest(query, kind, k=10, user_id=None, is_admin=False):
+        """
+        Suggest ingredient or recipe names starting with what the user has typed so far.
+
+        Any word of a name can match, and suggestions are ordered by popularity, then by name.
+
+        Args:
+            query (str): The text typed so far.
+            kind (str): 'ingredient' or 'recipe'.
+            k (int): The maximum number of suggestions, at most MAX_SUGGESTIONS.
+            user_id (int): The user asking; only their own and public recipes are suggested.
+            is_admin (bool): Whether every recipe may be suggested.
+
+        Returns:
+            list: Dicts with the ID, name and popularity of each suggestion, best first.
+
+        Raises:
+            ValueError: If the kind is not recognised.
+        """
+        if kind not in ('ingredient', 'recipe'):
+            raise ValueError("Invalid type. Must be 'ingredient' or 'recipe'.")
+        prefix = normalise(query)
+        if not prefix:
+            return []
+
+        if kind == 'ingredient':
+            AutocompleteService._refresh_ingredients()
+        else:
+            AutocompleteService._refresh_recipes()
+
+        with _lock:
+            if kind == 'ingredient':
+                index = _state['ingredients']
+                ranked = index.search(prefix, k)
+                names = index.names
+            else:
+                indexes = _state['recipes']
+                if is_admin:
+                    ranked = indexes.all.search(prefix, k)
+                    names = indexes.all.names
+                else:
+                    scopes = [indexes.public]
+                    if user_id in indexes.private:
+                        scopes.append(indexes.private[user_id])
+                    ranked = heapq.nsmallest(k, (rank for index in scopes for rank in index.search(prefix, k)))
+                    names = indexes.all.names
+
+            return [{'id': entry_id, 'name': names[entry_id], 'popularity': -popularity} for popularity, _, entry_id in ranked]
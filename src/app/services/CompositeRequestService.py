@@ -0,0 +1,86 @@
+from flask import current_app
+from app import db
+
+# Methods a sub-request may use
+SUB_REQUEST_METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+class CompositeRequestService:
+    @staticmethod
+    def parse(items, max_requests):
+        """
+        Validate the sub-requests of a composite request.
+
+        Args:
+            items: The 'requests' list of the request body.
+            max_requests (int): The maximum number of sub-requests.
+
+        Returns:
+            list: Dicts with 'id', 'method', 'path' and 'body'.
+
+        Raises:
+            ValueError: If the list or any sub-request is malformed.
+        """
+        if not isinstance(items, list) or not 1 <= len(items) <= max_requests:
+            raise ValueError(f"'requests' must be a list of between 1 and {max_requests} sub-requests.")
+
+        sub_requests = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                raise ValueError(f"Sub-request {index} must be an object.")
+            method = str(item.get('method', 'GET')).upper()
+            if method not in SUB_REQUEST_METHODS:
+                raise ValueError(f"Sub-request {index} has an invalid method. Must be one of: {', '.join(SUB_REQUEST_METHODS)}.")
+            path = item.get('path')
+            if not isinstance(path, str) or not path.startswith('/') or path.startswith('//'):
+                raise ValueError(f"Sub-request {index} must have a 'path' starting with '/'.")
+            if path.split('?', 1)[0].rstrip('/') == '/batch':
+                raise ValueError(f"Sub-request {index} can't be another composite request.")
+            sub_requests.append({
+                'id': item.get('id', index),
+                'method': method,
+                'path': path,
+                'body': item.get('body')
+            })
+        return sub_requests
+
+    @staticmethod
+    def _dispatch(app, sub_request, headers):
+        """
+        Run one sub-request through the app's full dispatch (before/after request hooks,
+        error handlers) in a request context of its own, pushed over the current app context.
+        """
+        kwargs = {'method': sub_request['method'], 'headers': headers}
+        if sub_request['body'] is not None and sub_request['method'] != 'GET':
+            kwargs['json'] = sub_request['body']
+        with app.test_request_context(sub_request['path'], **kwargs):
+            response = app.full_dispatch_request()
+            body = response.get_json(silent=True) if response.is_json else None
+        return {'id': sub_request['id'], 'status': response.status_code, 'body': body}
+
+    @staticmethod
+    def execute(sub_requests, headers):
+        """
+        Run the sub-requests of a composite request and collect their responses in order.
+
+        Sub-requests run one after the other inside the current app context, so they share
+        its database session and its g: the token verified for the composite request is not
+        decoded or checked again, the current user is loaded once and later lookups are served
+        from the session's identity map, and each write is seen by the sub-requests after it.
+
+        Args:
+            sub_requests (list): Parsed sub-requests from CompositeRequestService.parse.
+            headers (dict): Headers passed to every sub-request, such as Authorization.
+
+        Returns:
+            list: One dict per sub-request with 'id', 'status' and 'body'.
+        """
+        app = current_app._get_current_object()
+        responses = []
+        for sub_request in sub_requests:
+            response = CompositeRequestService._dispatch(app, sub_request, headers)
+            # A failed sub-request may leave the shared session mid-transaction,
+            # so it is rolled back before the next one runs
+            if response['status'] >= 400:
+                db.session.rollback()
+            responses.append(response)
+        return responses
@@ -0,0 +1,152 @@
+import threading
+from datetime import datetime
+from flask import current_app
+from app import db
+from app.models.user import User
+from app.models.dog import Dog
+from app.models.recipe import Recipe
+from app.models.recipe_ingredient import RecipeIngredient
+from app.models.dog_recipe import dog_recipe
+from app.models.tombstone import Tombstone
+from app.models.meal_plan import MealPlan
+from app.models.feeding import Feeding, FeedingRollup
+from app.models.weight import WeightSample, WeightRollup
+
+class DeletionService:
+    @staticmethod
+    def delete_recipes(recipe_ids):
+        """
+        Delete recipes and their child rows with set-based statements.
+
+        Nothing is loaded into the session. The rows are removed with one DELETE per
+        table, children first, so the cost doesn't grow with the number of ORM objects.
+        The caller is responsible for committing.
+
+        Args:
+            recipe_ids: A list of recipe IDs, or a SELECT returning recipe IDs.
+        """
+        # Dogs linked to the recipes lose a recipe, so they move forward in the change feed
+        db.session.execute(
+            db.update(Dog)
+            .where(Dog.id.in_(db.select(dog_recipe.c.dog_id).where(dog_recipe.c.recipe_id.in_(recipe_ids))))
+            .values(updated_at=datetime.utcnow()),
+            execution_options={"synchronize_session": False}
+        )
+
+        # Record tombstones for the change feed before the rows disappear
+        # The 'after_delete' listener doesn't fire for bulk deletes, so this is done here
+        db.session.execute(db.insert(Tombstone).from_select(
+            ['entity_type', 'entity_id', 'user_id', 'is_public', 'deleted_at'],
+            db.select(
+                db.literal('recipe'), Recipe.id, Recipe.user_id, Recipe.is_public, db.literal(datetime.utcnow())
+            ).where(Recipe.id.in_(recipe_ids))
+        ))
+
+        # Bulk deletes bypass the Recipe event listeners, so the owners' counters are adjusted here
+        # with one correlated UPDATE covering every affected user
+        deleted_per_user = (
+            db.select(db.func.count(Recipe.id))
+            .where(Recipe.user_id == User.id, Recipe.id.in_(recipe_ids))
+            .scalar_subquery()
+        )
+        db.session.execute(
+            db.update(User)
+            .where(User.id.in_(db.select(Recipe.user_id).where(Recipe.id.in_(recipe_ids))))
+            .values(recipe_count=User.recipe_count - deleted_per_user, last_active_at=datetime.utcnow()),
+            execution_options={"synchronize_session": False}
+        )
+
+        # Feedings are a history of what was eaten, so they keep their totals and lose only the recipe
+        db.session.execute(
+            db.update(Feeding).where(Feeding.recipe_id.in_(recipe_ids)).values(recipe_id=None),
+            execution_options={"synchronize_session": False}
+        )
+
+        db.session.execute(db.delete(dog_recipe).where(dog_recipe.c.recipe_id.in_(recipe_ids)))
+        db.session.execute(
+            db.delete(RecipeIngredient).where(RecipeIngredient.recipe_id.in_(recipe_ids)),
+            execution_options={"synchronize_session": False}
+        )
+        db.session.execute(
+            db.delete(Recipe).where(Recipe.id.in_(recipe_ids)),
+            execution_options={"synchronize_session": False}
+        )
+
+    @staticmethod
+    def delete_user(user_id):
+        """
+        Delete a user account with all of its dogs and recipes using set-based statements.
+
+        The user's recipes, dogs, meal plans, feedings, weight history, their 'dog_recipe' links and 'recipe_ingredient' rows are
+        removed with a handful of DELETE ... WHERE statements, so deleting a large account
+        doesn't pull its objects into memory. The caller is responsible for committing.
+
+        Args:
+            user_id (int): The ID of the user to delete.
+        """
+        recipe_ids = db.select(Recipe.id).where(Recipe.user_id == user_id)
+        dog_ids = db.select(Dog.id).where(Dog.user_id == user_id)
+
+        # Other users' recipes linked to this user's dogs lose a dog, so they move forward in the change feed
+        db.session.execute(
+            db.update(Recipe)
+            .where(
+                Recipe.id.in_(db.select(dog_recipe.c.recipe_id).where(dog_recipe.c.dog_id.in_(dog_ids))),
+                Recipe.user_id != user_id
+            )
+            .values(updated_at=datetime.utcnow()),
+            execution_options={"synchronize_session": False}
+        )
+
+        DeletionService.delete_recipes(recipe_ids)
+
+        db.session.execute(db.insert(Tombstone).from_select(
+            ['entity_type', 'entity_id', 'user_id', 'is_public', 'deleted_at'],
+            db.select(
+                db.literal('dog'), Dog.id, Dog.user_id, db.literal(False), db.literal(datetime.utcnow())
+            ).where(Dog.user_id == user_id)
+        ))
+
+        db.session.execute(db.delete(dog_recipe).where(dog_recipe.c.dog_id.in_(dog_ids)))
+        db.session.execute(db.delete(Feeding).where(Feeding.dog_id.in_(dog_ids)))
+        db.session.execute(db.delete(FeedingRollup).where(FeedingRollup.dog_id.in_(dog_ids)))
+        db.session.execute(db.delete(WeightSample).where(WeightSample.dog_id.in_(dog_ids)))
+        db.session.execute(db.delete(WeightRollup).where(WeightRollup.dog_id.in_(dog_ids)))
+        db.session.execute(
+            db.delete(Dog).where(Dog.user_id == user_id),
+            execution_options={"synchronize_session": False}
+        )
+        db.session.execute(db.delete(MealPlan).where(MealPlan.user_id == user_id))
+        db.session.execute(
+            db.delete(User).where(User.id == user_id),
+            execution_options={"synchronize_session": False}
+        )
+
+    @staticmethod
+    def delete_user_in_background(user_id):
+        """
+        Delete a user account on a background thread.
+
+        Used for very large accounts so the request can return straight away. The thread
+        runs inside its own application context and therefore its own database session.
+
+        Args:
+            user_id (int): The ID of the user to delete.
+
+        Returns:
+            threading.Thread: The started worker thread.
+        """
+        app = current_app._get_current_object()
+
+        def run():
+            with app.app_context():
+                try:
+                    DeletionService.delete_user(user_id)
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.error(f"Background deletion of user {user_id} failed: {str(e)}")
+
+        worker = threading.Thread(target=run, daemon=True)
+        worker.start()
+        return worker
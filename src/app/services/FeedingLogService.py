@@ -0,0 +1,225 @@
+from datetime import datetime, timedelta, timezone
+from app import db
+from app.models.feeding import Feeding, FeedingRollup
+from app.models.ingredient import Ingredient
+from app.models.recipe_ingredient import RecipeIngredient
+from app.utils.units import grams_per_unit, PER_GRAMS
+from app.utils.rollups import upsert_rollups
+
+# Totals kept on every feeding and added up in the rollups
+FEEDING_TOTALS = ('grams', 'calories', 'protein', 'fat', 'carbohydrates')
+MACROS = ('calories', 'protein', 'fat', 'carbohydrates')
+
+# Rollup periods; a week starts on Monday
+ROLLUP_PERIODS = ('day', 'week')
+
+def period_start(period, day):
+    """
+    Return the first day of the rollup period containing a date.
+    """
+    return day if period == 'day' else day - timedelta(days=day.weekday())
+
+class FeedingLogService:
+    @staticmethod
+    def parse_timestamp(value, field='fed_at'):
+        """
+        Parse an ISO 8601 timestamp into a naive UTC datetime, the form stored in the database.
+
+        Raises:
+            ValueError: If the value is not a valid ISO 8601 timestamp.
+        """
+        try:
+            timestamp = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid {field}. Use an ISO 8601 timestamp.")
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+        return timestamp
+
+    @staticmethod
+    def macro_density(recipe_ids):
+        """
+        Work out the calories and macros in one gram of each recipe.
+
+        Catalog values are per 100 g (see app/utils/units.py), so each mass line contributes value * grams / 100 and
+        the sum is divided by the recipe's mass. Lines without a mass unit are left out.
+
+        Args:
+            recipe_ids (iterable): The IDs of the recipes.
+
+        Returns:
+            dict: Dicts of the macros per gram keyed by recipe ID. Recipes without a mass map to zeros.
+        """
+        recipe_ids = set(recipe_ids)
+        totals = {recipe_id: dict.fromkeys(('grams',) + MACROS, 0.0) for recipe_id in recipe_ids}
+        if not recipe_ids:
+            return totals
+
+        # Query to retrieve the ingredient lines of every recipe with the ingredients' macros
+        # This query selects plain columns, without loading ORM objects
+        rows = db.session.execute(
+            db.select(
+                RecipeIngredient.recipe_id, RecipeIngredient.quantity, RecipeIngredient.unit,
+                *(getattr(Ingredient, macro) for macro in MACROS)
+            )
+            .join(Ingredient, Ingredient.id == RecipeIngredient.ingredient_id)
+            .where(RecipeIngredient.recipe_id.in_(recipe_ids))
+        )
+        for row in rows:
+            factor = grams_per_unit(row.unit)
+            if factor is None:
+                continue
+            grams = float(row.quantity) * factor
+            recipe_totals = totals[row.recipe_id]
+            recipe_totals['grams'] += grams
+            for macro in MACROS:
+                recipe_totals[macro] += (getattr(row, macro) or 0) * grams / PER_GRAMS
+
+        return {
+            recipe_id: {
+                macro: recipe_totals[macro] / recipe_totals['grams'] if recipe_totals['grams'] > 0 else 0.0
+                for macro in MACROS
+            }
+            for recipe_id, recipe_totals in totals.items()
+        }
+
+    @staticmethod
+    def record(dog_id, items):
+        """
+        Append a batch of feedings for a dog and fold them into the rollups.
+
+        The feedings are written with one multi-row INSERT. Their totals are added up per
+        day and per week in memory first, then folded into the rollups with a single upsert
+        (see upsert_rollups), so concurrent batches touching the same new period don't
+        collide. The caller is responsible for committing.
+
+        Args:
+            dog_id (int): The dog that was fed.
+            items (list): Validated dicts with 'recipe_id' (or None), 'grams' and 'fed_at'.
+
+        Returns:
+            list: The recorded feedings as dicts, in the order given.
+        """
+        density = FeedingLogService.macro_density(item['recipe_id'] for item in items if item['recipe_id'] is not None)
+        created_at = datetime.utcnow()
+        rows = []
+        for item in items:
+            per_gram = density.get(item['recipe_id'])
+            row = {
+                'dog_id': dog_id,
+                'recipe_id': item['recipe_id'],
+                'fed_at': item['fed_at'],
+                'grams': item['grams'],
+                'created_at': created_at
+            }
+            for macro in MACROS:
+                row[macro] = round(per_gram[macro] * item['grams'], 2) if per_gram else 0.0
+            rows.append(row)
+
+        # Feedings are append-only, so the batch goes in with a single INSERT
+        db.session.execute(db.insert(Feeding), rows)
+
+        deltas = {}
+        for row in rows:
+            for period in ROLLUP_PERIODS:
+                key = (period, period_start(period, row['fed_at'].date()))
+                delta = deltas.get(key)
+                if delta is None:
+                    delta = deltas[key] = dict.fromkeys(FEEDING_TOTALS, 0.0)
+                    delta['feedings'] = 0
+                delta['feedings'] += 1
+                for total in FEEDING_TOTALS:
+                    delta[total] += row[total]
+
+        # Add the batch to the rollups in one upsert; a period created concurrently by
+        # another batch is added to rather than inserted twice
+        upsert_rollups(
+            db.session.connection(),
+            FeedingRollup.__table__,
+            ('dog_id', 'period', 'period_start'),
+            [
+                {'dog_id': dog_id, 'period': period, 'period_start': start, **delta}
+                for (period, start), delta in deltas.items()
+            ],
+            dict.fromkeys(('feedings',) + FEEDING_TOTALS, 'sum')
+        )
+
+        return [
+            {
+                'recipe_id': row['recipe_id'],
+                'fed_at': row['fed_at'].isoformat(),
+                **{total: row[total] for total in FEEDING_TOTALS}
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def history(dog_id, resolution='day', start=None, end=None):
+        """
+        Return a dog's feeding totals per day or per week, read from the rollups.
+
+        Args:
+            dog_id (int): The dog.
+            resolution (str): 'day' or 'week'.
+            start (date): The first day to include, or None.
+            end (date): The last day to include, or None.
+
+        Returns:
+            list: One dict per period with feedings, in date order. Periods without feedings are left out.
+
+        Raises:
+            ValueError: If the resolution is not recognised.
+        """
+        if resolution not in ROLLUP_PERIODS:
+            raise ValueError(f"Invalid resolution. Must be one of: {', '.join(ROLLUP_PERIODS)}.")
+
+        # Query to retrieve the rollup rows of the dog
+        # This query uses the unique index on (dog_id, period, period_start)
+        query = db.select(FeedingRollup).where(FeedingRollup.dog_id == dog_id, FeedingRollup.period == resolution)
+        if start is not None:
+            query = query.where(FeedingRollup.period_start >= period_start(resolution, start))
+        if end is not None:
+            query = query.where(FeedingRollup.period_start <= end)
+        rollups = db.session.execute(query.order_by(FeedingRollup.period_start)).scalars()
+        return [
+            {
+                'period_start': rollup.period_start.isoformat(),
+                'feedings': rollup.feedings,
+                **{total: round(getattr(rollup, total), 1) for total in FEEDING_TOTALS}
+            }
+            for rollup in rollups
+        ]
+
+    @staticmethod
+    def feedings(dog_id, start=None, end=None, limit=100):
+        """
+        Return a dog's raw feedings, most recent first.
+
+        Args:
+            dog_id (int): The dog.
+            start (datetime): The earliest 'fed_at' to include, or None.
+            end (datetime): The latest 'fed_at' to include, or None.
+            limit (int): The maximum number of feedings.
+
+        Returns:
+            list: Feeding dicts.
+        """
+        # Query to retrieve the dog's feedings
+        # This query walks the (dog_id, fed_at) index backwards and stops after 'limit' rows
+        query = db.select(
+            Feeding.id, Feeding.recipe_id, Feeding.fed_at, *(getattr(Feeding, total) for total in FEEDING_TOTALS)
+        ).where(Feeding.dog_id == dog_id)
+        if start is not None:
+            query = query.where(Feeding.fed_at >= start)
+        if end is not None:
+            query = query.where(Feeding.fed_at <= end)
+        rows = db.session.execute(query.order_by(Feeding.fed_at.desc(), Feeding.id.desc()).limit(limit))
+        return [
+            {
+                'id': row.id,
+                'recipe_id': row.recipe_id,
+                'fed_at': row.fed_at.isoformat(),
+                **{total: getattr(row, total) for total in FEEDING_TOTALS}
+            }
+            for row in rows
+        ]
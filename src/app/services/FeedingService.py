@@ -0,0 +1,132 @@
+from datetime import date
+from dateutil.relativedelta import relativedelta
+from app.utils.cache import LRUCache
+
+ACTIVITY_LEVELS = ('low', 'normal', 'high')
+
+# Raw feeding guidelines per life stage
+# Each stage applies up to (but excluding) 'max_age_months' and sets:
+# - the daily food mass as a fraction of body weight, per activity level
+# - the multiplier applied to the resting energy requirement (70 * kg^0.75 kcal), per activity level
+# - the protein and fat targets in grams per 1000 kcal (NRC recommended allowances)
+LIFE_STAGES = (
+    {
+        'name': 'puppy',
+        'max_age_months': 4,
+        'food_fraction': {'low': 0.08, 'normal': 0.09, 'high': 0.10},
+        'energy_factor': {'low': 3.0, 'normal': 3.0, 'high': 3.0},
+        'protein_per_1000_kcal': 56.3,
+        'fat_per_1000_kcal': 21.3
+    },
+    {
+        'name': 'junior',
+        'max_age_months': 12,
+        'food_fraction': {'low': 0.04, 'normal': 0.05, 'high': 0.06},
+        'energy_factor': {'low': 2.0, 'normal': 2.0, 'high': 2.2},
+        'protein_per_1000_kcal': 43.8,
+        'fat_per_1000_kcal': 21.3
+    },
+    {
+        'name': 'adult',
+        'max_age_months': 96,
+        'food_fraction': {'low': 0.02, 'normal': 0.025, 'high': 0.03},
+        'energy_factor': {'low': 1.4, 'normal': 1.6, 'high': 2.0},
+        'protein_per_1000_kcal': 25.0,
+        'fat_per_1000_kcal': 13.8
+    },
+    {
+        'name': 'senior',
+        'max_age_months': None,
+        'food_fraction': {'low': 0.02, 'normal': 0.02, 'high': 0.025},
+        'energy_factor': {'low': 1.2, 'normal': 1.4, 'high': 1.6},
+        'protein_per_1000_kcal': 25.0,
+        'fat_per_1000_kcal': 13.8
+    },
+)
+
+# Computed requirements keyed by (dog_id, activity)
+# Each entry stores the inputs it was computed from, so a changed weight or date of birth
+# (or a new day, which can move the dog into the next life stage) is a cache miss
+_requirements_cache = LRUCache(max_size=4096)
+
+def _age_in_months(date_of_birth, today):
+    age = relativedelta(today, date_of_birth)
+    return age.years * 12 + age.months
+
+def _life_stage(age_months):
+    for stage in LIFE_STAGES:
+        if stage['max_age_months'] is None or age_months < stage['max_age_months']:
+            return stage
+
+class FeedingService:
+    @staticmethod
+    def calculate_requirements(dogs, activity='normal'):
+        """
+        Calculate the daily feeding requirements for a batch of dogs.
+
+        Cached results are reused for dogs whose weight and date of birth haven't changed
+        since they were last computed. The rest are computed with plain Python loops over
+        the batch; an account has few dogs, so the work is in loading them, not the arithmetic.
+
+        Args:
+            dogs (list): Rows with 'id', 'weight' (kg) and 'date_of_birth' attributes.
+            activity (str): One of 'low', 'normal' or 'high'.
+
+        Returns:
+            dict: The requirements for each dog, keyed by dog ID.
+
+        Raises:
+            ValueError: If the activity level is not recognised.
+        """
+        if activity not in ACTIVITY_LEVELS:
+            raise ValueError(f"Invalid activity. Must be one of: {', '.join(ACTIVITY_LEVELS)}.")
+
+        today = date.today()
+        results = {}
+        misses = []
+        for dog in dogs:
+            fingerprint = (dog.weight, dog.date_of_birth, today)
+            cached = _requirements_cache.get((dog.id, activity))
+            if cached and cached[0] == fingerprint:
+                results[dog.id] = cached[1]
+            else:
+                misses.append(dog)
+
+        if not misses:
+            return results
+
+        # One list per value, in the order of the dogs still to compute
+        ids = [dog.id for dog in misses]
+        weights = [float(dog.weight) for dog in misses]
+        ages = [_age_in_months(dog.date_of_birth, today) for dog in misses]
+        stages = [_life_stage(age) for age in ages]
+
+        # Daily food mass as a share of body weight
+        fractions = [stage['food_fraction'][activity] for stage in stages]
+        food_grams = [weight * 1000 * fraction for weight, fraction in zip(weights, fractions)]
+
+        # Energy: resting energy requirement scaled by the life stage and activity factor
+        calories = [
+            70 * weight ** 0.75 * stage['energy_factor'][activity]
+            for weight, stage in zip(weights, stages)
+        ]
+        protein = [kcal / 1000 * stage['protein_per_1000_kcal'] for kcal, stage in zip(calories, stages)]
+        fat = [kcal / 1000 * stage['fat_per_1000_kcal'] for kcal, stage in zip(calories, stages)]
+
+        for index, dog in enumerate(misses):
+            requirement = {
+                'dog_id': ids[index],
+                'weight': weights[index],
+                'age_months': ages[index],
+                'life_stage': stages[index]['name'],
+                'activity': activity,
+                'food_percent_of_body_weight': round(fractions[index] * 100, 2),
+                'daily_food_grams': round(food_grams[index], 1),
+                'daily_calories': round(calories[index], 1),
+                'protein_grams': round(protein[index], 1),
+                'fat_grams': round(fat[index], 1)
+            }
+            _requirements_cache.set((dog.id, activity), ((dog.weight, dog.date_of_birth, today), requirement))
+            results[dog.id] = requirement
+
+        return results
@@ -0,0 +1,83 @@
+from datetime import timedelta
+from app import db
+from app.models.recipe import Recipe
+from app.models.dog_recipe import dog_recipe
+from app.services.FeedingService import FeedingService
+from app.services.PortionService import PortionService
+
+class MealPlanService:
+    @staticmethod
+    def generate(dogs, days, start_date, user_id, activity='normal'):
+        """
+        Generate a meal plan and its shopping list for a set of dogs.
+
+        Each dog rotates through the recipes linked to it through 'dog_recipe' that the user
+        can see (their own and public ones), one recipe per day, with the portion scaled to the dog's daily food requirement. Every recipe's
+        multipliers are summed while the plan is built, so the shopping list is produced in
+        one pass over the recipe lines however many dogs and days the plan covers.
+
+        Args:
+            dogs (list): Rows with 'id', 'name', 'weight' and 'date_of_birth' attributes.
+            days (int): The number of days to plan.
+            start_date (date): The first day of the plan.
+            user_id (int): The user the plan is for.
+            activity (str): The activity level used for the feeding requirements.
+
+        Returns:
+            tuple: The plan dict and the shopping list.
+
+        Raises:
+            ValueError: If the activity level is not recognised.
+        """
+        requirements = FeedingService.calculate_requirements(dogs, activity)
+        dog_ids = [dog.id for dog in dogs]
+
+        # Query to retrieve the visible recipes linked to every dog
+        # This query joins dog_recipe to recipe for the names, in one statement for the whole household
+        # A linked recipe its owner has since made private is left out, like in the household shopping list
+        links = db.session.execute(
+            db.select(dog_recipe.c.dog_id, Recipe.id, Recipe.name)
+            .join(Recipe, Recipe.id == dog_recipe.c.recipe_id)
+            .where(dog_recipe.c.dog_id.in_(dog_ids), (Recipe.user_id == user_id) | (Recipe.is_public == True))
+            .order_by(dog_recipe.c.dog_id, Recipe.id)
+        ).all()
+        recipe_names = {link.id: link.name for link in links}
+        lines_by_recipe = PortionService.load_recipe_lines(recipe_names)
+
+        # Only recipes with a mass can be scaled to a portion
+        rotations = {dog_id: [] for dog_id in dog_ids}
+        for link in links:
+            daily_grams = requirements[link.dog_id]['daily_food_grams']
+            scale = PortionService.scale_factor(daily_grams, lines_by_recipe[link.id])
+            if scale is not None:
+                rotations[link.dog_id].append((link.id, scale))
+
+        plan_days = [
+            {'day': day + 1, 'date': (start_date + timedelta(days=day)).isoformat(), 'meals': []}
+            for day in range(days)
+        ]
+        multipliers = {}
+        for dog in dogs:
+            rotation = rotations[dog.id]
+            if not rotation:
+                continue
+            portion_grams = requirements[dog.id]['daily_food_grams']
+            for day in range(days):
+                recipe_id, scale = rotation[day % len(rotation)]
+                plan_days[day]['meals'].append({
+                    'dog_id': dog.id,
+                    'dog_name': dog.name,
+                    'recipe_id': recipe_id,
+                    'recipe_name': recipe_names[recipe_id],
+                    'portion_grams': portion_grams,
+                    'scale': round(scale, 4)
+                })
+                multipliers[recipe_id] = multipliers.get(recipe_id, 0.0) + scale
+
+        plan = {
+            'days': plan_days,
+            'daily_food_grams': {str(dog_id): requirement['daily_food_grams'] for dog_id, requirement in requirements.items()},
+            # Dogs without a linked recipe that has a mass can't be planned for
+            'unassigned_dog_ids': [dog_id for dog_id in dog_ids if not rotations[dog_id]]
+        }
+        return plan, PortionService.aggregate(multipliers, lines_by_recipe)
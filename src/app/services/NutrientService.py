@@ -0,0 +1,234 @@
+import re
+from array import array
+from threading import Lock
+from app import db
+from app.models.ingredient import Ingredient, catalog_version
+from app.models.recipe_ingredient import RecipeIngredient
+from app.utils.units import to_grams, PER_GRAMS
+
+# Canonical micronutrient vocabulary
+# Every nutrient has a canonical key, the unit its values are stored in (per 100 g of ingredient),
+# the blob it usually comes from, and the alternative spellings accepted in Ingredient.vitamins
+# and Ingredient.minerals. Keys are matched after lower-casing and collapsing punctuation to '_'.
+NUTRIENTS = (
+    {'key': 'vitamin_a', 'unit': 'IU', 'group': 'vitamins', 'aliases': ('a', 'retinol')},
+    {'key': 'vitamin_b1', 'unit': 'mg', 'group': 'vitamins', 'aliases': ('b1', 'thiamin', 'thiamine')},
+    {'key': 'vitamin_b2', 'unit': 'mg', 'group': 'vitamins', 'aliases': ('b2', 'riboflavin')},
+    {'key': 'vitamin_b3', 'unit': 'mg', 'group': 'vitamins', 'aliases': ('b3', 'niacin')},
+    {'key': 'vitamin_b5', 'unit': 'mg', 'group': 'vitamins', 'aliases': ('b5', 'pantothenic_acid')},
+    {'key': 'vitamin_b6', 'unit': 'mg', 'group': 'vitamins', 'aliases': ('b6', 'pyridoxine')},
+    {'key': 'vitamin_b7', 'unit': 'ug', 'group': 'vitamins', 'aliases': ('b7', 'biotin')},
+    {'key': 'vitamin_b9', 'unit': 'ug', 'group': 'vitamins', 'aliases': ('b9', 'folate', 'folic_acid')},
+    {'key': 'vitamin_b12', 'unit': 'ug', 'group': 'vitamins', 'aliases': ('b12', 'cobalamin')},
+    {'key': 'vitamin_c', 'unit': 'mg', 'group': 'vitamins', 'aliases': ('c', 'ascorbic_acid')},
+    {'key': 'vitamin_d', 'unit': 'IU', 'group': 'vitamins', 'aliases': ('d', 'd3', 'vitamin_d3')},
+    {'key': 'vitamin_e', 'unit': 'mg', 'group': 'vitamins', 'aliases': ('e', 'tocopherol')},
+    {'key': 'vitamin_k', 'unit': 'ug', 'group': 'vitamins', 'aliases': ('k', 'k1', 'vitamin_k1')},
+    {'key': 'choline', 'unit': 'mg', 'group': 'vitamins', 'aliases': ()},
+    {'key': 'calcium', 'unit': 'mg', 'group': 'minerals', 'aliases': ('ca',)},
+    {'key': 'phosphorus', 'unit': 'mg', 'group': 'minerals', 'aliases': ('p',)},
+    {'key': 'potassium', 'unit': 'mg', 'group': 'minerals', 'aliases': ()},
+    {'key': 'sodium', 'unit': 'mg', 'group': 'minerals', 'aliases': ('na',)},
+    {'key': 'chloride', 'unit': 'mg', 'group': 'minerals', 'aliases': ('cl',)},
+    {'key': 'magnesium', 'unit': 'mg', 'group': 'minerals', 'aliases': ('mg',)},
+    {'key': 'iron', 'unit': 'mg', 'group': 'minerals', 'aliases': ('fe',)},
+    {'key': 'zinc', 'unit': 'mg', 'group': 'minerals', 'aliases': ('zn',)},
+    {'key': 'copper', 'unit': 'mg', 'group': 'minerals', 'aliases': ('cu',)},
+    {'key': 'manganese', 'unit': 'mg', 'group': 'minerals', 'aliases': ('mn',)},
+    {'key': 'selenium', 'unit': 'ug', 'group': 'minerals', 'aliases': ('se',)},
+    {'key': 'iodine', 'unit': 'ug', 'group': 'minerals', 'aliases': ('i',)},
+)
+NUTRIENT_KEYS = tuple(nutrient['key'] for nutrient in NUTRIENTS)
+
+# Column index of every accepted spelling, per blob
+# Short symbols are ambiguous, so they are resolved per blob: 'k' in the vitamins blob
+# is vitamin K, 'k' in the minerals blob is potassium. Canonical keys are accepted in either blob.
+_COLUMNS = {'vitamins': {}, 'minerals': {'k': NUTRIENT_KEYS.index('potassium')}}
+for _index, _nutrient in enumerate(NUTRIENTS):
+    for _group in _COLUMNS:
+        _COLUMNS[_group].setdefault(_nutrient['key'], _index)
+    for _alias in _nutrient['aliases']:
+        _COLUMNS[_nutrient['group']].setdefault(_alias, _index)
+
+_NUMBER = re.compile(r'^\s*([0-9]*\.?[0-9]+)')
+
+def _normalise_key(key):
+    return re.sub(r'[^a-z0-9]+', '_', str(key).lower()).strip('_')
+
+def _parse_amount(value):
+    """
+    Read an amount from a blob value, accepting numbers and strings such as '4.9 mg'.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = _NUMBER.match(value)
+        return float(match.group(1)) if match else None
+    return None
+
+def parse_micronutrients(vitamins, minerals):
+    """
+    Parse an ingredient's vitamin and mineral blobs into canonical nutrient values.
+
+    Unknown keys and values without a readable amount are skipped.
+
+    Args:
+        vitamins: The Ingredient.vitamins JSON value.
+        minerals: The Ingredient.minerals JSON value.
+
+    Returns:
+        dict: Amounts keyed by column index in NUTRIENTS.
+    """
+    values = {}
+    for group, blob in (('vitamins', vitamins), ('minerals', minerals)):
+        if not isinstance(blob, dict):
+            continue
+        for key, value in blob.items():
+            column = _COLUMNS[group].get(_normalise_key(key))
+            amount = _parse_amount(value)
+            if column is not None and amount is not None:
+                values[column] = amount
+    return values
+
+class NutrientMatrix:
+    """
+    A dense ingredients x nutrients matrix of float32 values.
+
+    Rows follow ingredient IDs (see 'rows'), columns follow NUTRIENTS. The values are stored
+    row-major in one array('f'), so the whole catalog costs 4 bytes per cell.
+    """
+
+    def __init__(self, version, ingredient_ids, values):
+        self.version = version
+        self.rows = {ingredient_id: row for row, ingredient_id in enumerate(ingredient_ids)}
+        self.width = len(NUTRIENTS)
+        self.values = values
+
+    def multiply(self, quantities):
+        """
+        Work out the nutrient totals of a sparse vector of ingredient quantities.
+
+        This is a plain Python loop over the cells of just the rows of the ingredients in
+        the vector, which for a recipe or shopping list of a dozen ingredients is far less
+        work than a dense product over the whole catalog.
+
+        Args:
+            quantities (dict): Quantities in units of 100 g (the matrix's unit), keyed by
+                ingredient ID, the sparse form of the vector.
+
+        Returns:
+            list: One total per nutrient, in NUTRIENTS order.
+        """
+        totals = [0.0] * self.width
+        width = self.width
+        values = self.values
+        for ingredient_id, quantity in quantities.items():
+            row = self.rows.get(ingredient_id)
+            if row is None or not quantity:
+                continue
+            offset = row * width
+            for column in range(width):
+                cell = values[offset + column]
+                if cell:
+                    totals[column] += cell * quantity
+        return totals
+
+_matrix = {'current': None}
+_matrix_lock = Lock()
+
+class NutrientService:
+    @staticmethod
+    def vocabulary():
+        """
+        Describe the canonical micronutrient vocabulary.
+
+        Returns:
+            list: The key, unit and group of every nutrient, in matrix column order.
+        """
+        return [{'key': nutrient['key'], 'unit': nutrient['unit'], 'group': nutrient['group']} for nutrient in NUTRIENTS]
+
+    @staticmethod
+    def matrix():
+        """
+        Return the nutrient matrix for the current ingredient catalog.
+
+        The matrix is built on first use and rebuilt only after a committed ingredient change
+        has moved the catalog version on.
+
+        Returns:
+            NutrientMatrix: The matrix for the current catalog.
+        """
+        version = catalog_version()
+        current = _matrix['current']
+        if current is not None and current.version == version:
+            return current
+
+        with _matrix_lock:
+            current = _matrix['current']
+            if current is not None and current.version == version:
+                return current
+
+            # Query to retrieve the micronutrient blobs of every ingredient
+            # This query selects only the ID and the two JSON columns
+            rows = db.session.execute(
+                db.select(Ingredient.id, Ingredient.vitamins, Ingredient.minerals).order_by(Ingredient.id)
+            ).all()
+            width = len(NUTRIENTS)
+            values = array('f', bytes(4 * width * len(rows)))
+            for row_index, row in enumerate(rows):
+                offset = row_index * width
+                for column, amount in parse_micronutrients(row.vitamins, row.minerals).items():
+                    values[offset + column] = amount
+
+            current = NutrientMatrix(version, [row.id for row in rows], values)
+            _matrix['current'] = current
+            return current
+
+    @staticmethod
+    def totals(quantities):
+        """
+        Calculate micronutrient totals for a set of ingredient masses.
+
+        Totals follow the nutrition convention in app/utils/units.py: each ingredient's
+        value per 100 g times its mass in grams, divided by 100. Nutrients with no data in
+        any of the ingredients are left out.
+
+        Args:
+            quantities (dict): Masses in grams keyed by ingredient ID.
+
+        Returns:
+            dict: Totals keyed by canonical nutrient key.
+        """
+        totals = NutrientService.matrix().multiply({
+            ingredient_id: grams / PER_GRAMS for ingredient_id, grams in quantities.items()
+        })
+        return {key: round(total, 3) for key, total in zip(NUTRIENT_KEYS, totals) if total}
+
+    @staticmethod
+    def recipe_totals(recipe_ids):
+        """
+        Calculate micronutrient totals for several recipes.
+
+        Args:
+            recipe_ids (list): The IDs of the recipes, already checked for access.
+
+        Returns:
+            dict: Totals keyed by recipe ID, then by canonical nutrient key.
+        """
+        # Query to retrieve the ingredient lines of every recipe
+        # This query selects only the recipe_ingredient columns, without loading ORM objects
+        rows = db.session.execute(
+            db.select(RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id, RecipeIngredient.quantity, RecipeIngredient.unit)
+            .where(RecipeIngredient.recipe_id.in_(recipe_ids))
+        )
+        quantities = {recipe_id: {} for recipe_id in recipe_ids}
+        for row in rows:
+            # Lines without a mass unit are left out, see app/utils/units.py
+            grams = to_grams(row.quantity, row.unit)
+            if grams is None:
+                continue
+            recipe_quantities = quantities[row.recipe_id]
+            recipe_quantities[row.ingredient_id] = recipe_quantities.get(row.ingredient_id, 0.0) + grams
+        return {recipe_id: NutrientService.totals(recipe_quantities) for recipe_id, recipe_quantities in quantities.items()}
@@ -0,0 +1,157 @@
+from app import db
+from app.models.ingredient import Ingredient
+from app.models.recipe_ingredient import RecipeIngredient
+from app.utils.units import grams_per_unit
+
+# Recipe totals scaled alongside the quantities, as returned by ReadModelService.recipe_nutrition
+NUTRITION_TOTALS = ('total_calories', 'total_protein', 'total_fat', 'total_carbohydrates', 'total_fiber')
+
+class PortionService:
+    @staticmethod
+    def load_recipe_lines(recipe_ids):
+        """
+        Load the ingredient lines of several recipes in one query.
+
+        Each line carries its mass in grams when the unit is a mass unit, so recipes can
+        be scaled to a target amount of food without converting units again.
+
+        Args:
+            recipe_ids (iterable): The IDs of the recipes.
+
+        Returns:
+            dict: Lists of line dicts keyed by recipe ID.
+        """
+        recipe_ids = set(recipe_ids)
+        lines = {recipe_id: [] for recipe_id in recipe_ids}
+        if not recipe_ids:
+            return lines
+
+        # Query to retrieve the ingredient lines of every recipe
+        # This query joins recipe_ingredient to ingredient for the names, without loading ORM objects
+        rows = db.session.execute(
+            db.select(
+                RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id, RecipeIngredient.quantity,
+                RecipeIngredient.unit, Ingredient.name
+            )
+            .join(Ingredient, Ingredient.id == RecipeIngredient.ingredient_id)
+            .where(RecipeIngredient.recipe_id.in_(recipe_ids))
+            .order_by(RecipeIngredient.id)
+        )
+        for row in rows:
+            factor = grams_per_unit(row.unit)
+            quantity = float(row.quantity)
+            lines[row.recipe_id].append({
+                'ingredient_id': row.ingredient_id,
+                'name': row.name,
+                'quantity': quantity,
+                'unit': row.unit,
+                'grams': quantity * factor if factor is not None else None
+            })
+        return lines
+
+    @staticmethod
+    def recipe_mass(lines):
+        """
+        Return the total mass in grams of a recipe's lines, ignoring lines without a mass unit.
+        """
+        return sum(line['grams'] for line in lines if line['grams'] is not None)
+
+    @staticmethod
+    def scale_factor(target_grams, lines):
+        """
+        Return the multiplier that turns a recipe into 'target_grams' of food.
+
+        Args:
+            target_grams (float): The amount of food wanted, in grams.
+            lines (list): The recipe's lines from load_recipe_lines.
+
+        Returns:
+            float: The multiplier, or None if the recipe has no mass to scale.
+        """
+        mass = PortionService.recipe_mass(lines)
+        return target_grams / mass if mass > 0 else None
+
+    @staticmethod
+    def aggregate(multipliers, lines_by_recipe):
+        """
+        Build a shopping list from how many times each recipe is needed.
+
+        Mass lines are scaled by the multiplier and added up in grams. Lines in other units
+        can't be scaled by a factor worked out from mass, so each recipe's quantity is added
+        once as written, per unit, and the item is flagged 'unconvertible'.
+
+        Args:
+            multipliers (dict): The total multiplier of each recipe, keyed by recipe ID.
+            lines_by_recipe (dict): The recipes' lines from load_recipe_lines.
+
+        Returns:
+            list: Shopping list items sorted by ingredient ID.
+        """
+        items = {}
+        for recipe_id, multiplier in multipliers.items():
+            for line in lines_by_recipe.get(recipe_id, []):
+                if line['grams'] is not None:
+                    key, amount, unit = (line['ingredient_id'], 'grams'), line['grams'] * multiplier, 'grams'
+                else:
+                    key, amount, unit = (line['ingredient_id'], line['unit']), line['quantity'], line['unit']
+                if key in items:
+                    items[key]['quantity'] += amount
+                else:
+                    items[key] = {'ingredient_id': line['ingredient_id'], 'name': line['name'], 'quantity': amount,
+                                  'unit': unit, 'unconvertible': line['grams'] is None}
+
+        shopping_list = sorted(items.values(), key=lambda item: (item['ingredient_id'], item['unit']))
+        for item in shopping_list:
+            item['quantity'] = round(item['quantity'], 1)
+        return shopping_list
+
+    @staticmethod
+    def scale_recipes(pairs, requirements, lines_by_recipe, nutrition_by_recipe):
+        """
+        Scale recipes to the food a dog needs over a number of days.
+
+        The factor is the target amount divided by the recipe's mass, so it only applies to
+        mass lines; lines in other units are returned as written and flagged 'unconvertible'.
+        The nutrition totals only count mass lines too, so they are scaled by the same factor.
+        Nothing is written.
+
+        Args:
+            pairs (list): Dicts with 'recipe_id', 'dog_id' and 'days'.
+            requirements (dict): Feeding requirements keyed by dog ID, from FeedingService.
+            lines_by_recipe (dict): The recipes' lines from load_recipe_lines.
+            nutrition_by_recipe (dict): The recipes' totals from ReadModelService.recipe_nutrition.
+
+        Returns:
+            list: One result per pair, in order. A result without a mass to scale has 'scale' None.
+        """
+        results = []
+        for pair in pairs:
+            lines = lines_by_recipe[pair['recipe_id']]
+            daily_grams = requirements[pair['dog_id']]['daily_food_grams']
+            target_grams = daily_grams * pair['days']
+            factor = PortionService.scale_factor(target_grams, lines)
+            nutrition = nutrition_by_recipe[pair['recipe_id']]
+            results.append({
+                'recipe_id': pair['recipe_id'],
+                'dog_id': pair['dog_id'],
+                'days': pair['days'],
+                'daily_food_grams': daily_grams,
+                'recipe_grams': round(PortionService.recipe_mass(lines), 1),
+                'target_grams': round(target_grams, 1),
+                'scale': round(factor, 4) if factor is not None else None,
+                'ingredients': [
+                    {
+                        'ingredient_id': line['ingredient_id'],
+                        'name': line['name'],
+                        'quantity': round(line['quantity'] * factor, 3) if line['grams'] is not None else line['quantity'],
+                        'unit': line['unit'],
+                        'unconvertible': line['grams'] is None
+                    }
+                    for line in lines
+                ] if factor is not None else [],
+                'nutrition': {
+                    total: round(nutrition[total] * factor, 1) if factor is not None else None
+                    for total in NUTRITION_TOTALS
+                }
+            })
+        return results
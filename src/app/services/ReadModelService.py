@@ -0,0 +1,379 @@
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from app import db
+from app.models.user import User
+from app.models.dog import Dog
+from app.models.recipe import Recipe
+from app.models.ingredient import Ingredient
+from app.models.recipe_ingredient import RecipeIngredient
+from app.models.dog_recipe import dog_recipe
+from app.utils.units import grams_expression, grams_per_unit_expression, PER_GRAMS
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+def _float(value):
+    return float(value) if value is not None else None
+
+def _aggregate_ids(column):
+    """
+    Aggregate a column of IDs per group in the dialect's native form.
+
+    PostgreSQL returns an ordered array, other databases a comma separated string.
+    Groups without any non-null values aggregate to NULL either way.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        return db.func.array_agg(aggregate_order_by(column, column)).filter(column.isnot(None))
+    return db.func.group_concat(column)
+
+def _split_ids(value):
+    """
+    Turn the output of _aggregate_ids into a sorted list of integers.
+    """
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return sorted(int(item) for item in value)
+
+class ReadModelService:
+    """
+    Lightweight read models for the list and search endpoints.
+
+    Each method runs Core select() statements over just the columns the schemas
+    serialize and builds the response dicts straight from the result rows, so no
+    ORM objects are created or tracked in the identity map. The output matches
+    what the corresponding marshmallow schema produces.
+    """
+
+    @staticmethod
+    def recipes(condition=None):
+        """
+        Build the serialized form of every recipe matching a condition.
+
+        Args:
+            condition: An optional SQL expression over the Recipe columns.
+
+        Returns:
+            list: Dicts matching the RecipeSchema output.
+        """
+        recipe_query = db.select(
+            Recipe.id, Recipe.name, Recipe.description, Recipe.instructions, Recipe.is_public,
+            Recipe.created_at, Recipe.updated_at, Recipe.user_id
+        ).order_by(Recipe.id)
+        if condition is not None:
+            recipe_query = recipe_query.where(condition)
+
+        recipes = {}
+        for row in db.session.execute(recipe_query):
+            recipes[row.id] = {
+                'id': row.id,
+                'name': row.name,
+                'description': row.description,
+                'instructions': row.instructions,
+                'is_public': row.is_public,
+                'created_at': _isoformat(row.created_at),
+                'updated_at': _isoformat(row.updated_at),
+                'user_id': row.user_id,
+                'dog_ids': [],
+                'ingredients': []
+            }
+        if not recipes:
+            return []
+
+        # The child rows are fetched with the same filter as a subquery,
+        # so the statement size doesn't grow with the number of recipes
+        recipe_ids = recipe_query.with_only_columns(Recipe.id).order_by(None)
+
+        ingredient_rows = db.session.execute(
+            db.select(
+                RecipeIngredient.id, RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id,
+                RecipeIngredient.quantity, RecipeIngredient.unit, Ingredient.name.label('ingredient_name')
+            )
+            .join(Ingredient, Ingredient.id == RecipeIngredient.ingredient_id)
+            .where(RecipeIngredient.recipe_id.in_(recipe_ids))
+            .order_by(RecipeIngredient.id)
+        )
+        for row in ingredient_rows:
+            recipes[row.recipe_id]['ingredients'].append({
+                'id': row.id,
+                'recipe_id': row.recipe_id,
+                'ingredient_id': row.ingredient_id,
+                'ingredient_name': row.ingredient_name,
+                'quantity': _float(row.quantity),
+                'unit': row.unit
+            })
+
+        dog_rows = db.session.execute(
+            db.select(dog_recipe.c.recipe_id, dog_recipe.c.dog_id)
+            .where(dog_recipe.c.recipe_id.in_(recipe_ids))
+            .order_by(dog_recipe.c.dog_id)
+        )
+        for recipe_id, dog_id in dog_rows:
+            recipes[recipe_id]['dog_ids'].append(dog_id)
+
+        return list(recipes.values())
+
+    @staticmethod
+    def dogs(condition=None, include_recipe_summaries=False):
+        """
+        Build the serialized form of every dog matching a condition, with its recipe IDs.
+
+        The recipe IDs are aggregated in SQL over 'dog_recipe' (array_agg on PostgreSQL,
+        group_concat elsewhere), so the dogs and their links come back in a single query
+        without loading any Recipe rows.
+
+        Args:
+            condition: An optional SQL expression over the Dog columns.
+            include_recipe_summaries (bool): Whether to add a 'recipe_summaries' list
+                with the name and total calories of each linked recipe.
+
+        Returns:
+            list: Dicts matching the DogSchema output plus a 'recipes' list of IDs.
+        """
+        dog_query = (
+            db.select(
+                Dog.id, Dog.name, Dog.breed, Dog.date_of_birth, Dog.weight, Dog.profile_image,
+                Dog.user_id, Dog.age, Dog.created_at, Dog.updated_at,
+                _aggregate_ids(dog_recipe.c.recipe_id).label('recipe_ids')
+            )
+            .outerjoin(dog_recipe, dog_recipe.c.dog_id == Dog.id)
+            .group_by(Dog.id)
+            .order_by(Dog.id)
+        )
+        if condition is not None:
+            dog_query = dog_query.where(condition)
+
+        dogs = {}
+        for row in db.session.execute(dog_query):
+            dogs[row.id] = {
+                'id': row.id,
+                'name': row.name,
+                'breed': row.breed,
+                'date_of_birth': _isoformat(row.date_of_birth),
+                'weight': _float(row.weight),
+                'profile_image': row.profile_image,
+                'user_id': row.user_id,
+                'age': row.age,
+                'created_at': _isoformat(row.created_at),
+                'updated_at': _isoformat(row.updated_at),
+                'recipes': _split_ids(row.recipe_ids)
+            }
+
+        if include_recipe_summaries and dogs:
+            for dog in dogs.values():
+                dog['recipe_summaries'] = []
+            # Query to compute the calorie total of every linked recipe in one aggregate
+            # This joins dog_recipe to recipe_ingredient and ingredient and sums calories * grams / 100 per recipe
+            # Lines without a mass unit aren't in the total, so they are counted instead
+            dog_ids = (
+                db.select(Dog.id).where(condition) if condition is not None else db.select(Dog.id)
+            )
+            summary_rows = db.session.execute(
+                db.select(
+                    dog_recipe.c.dog_id, Recipe.id, Recipe.name,
+                    db.func.coalesce(db.func.sum(Ingredient.calories * grams_expression(RecipeIngredient.quantity, RecipeIngredient.unit) / PER_GRAMS), 0).label('total_calories'),
+                    (db.func.count(RecipeIngredient.id) - db.func.count(grams_per_unit_expression(RecipeIngredient.unit))).label('unconvertible_lines')
+                )
+                .join(Recipe, Recipe.id == dog_recipe.c.recipe_id)
+                .outerjoin(RecipeIngredient, RecipeIngredient.recipe_id == Recipe.id)
+                .outerjoin(Ingredient, Ingredient.id == RecipeIngredient.ingredient_id)
+                .where(dog_recipe.c.dog_id.in_(dog_ids))
+                .group_by(dog_recipe.c.dog_id, Recipe.id, Recipe.name)
+                .order_by(dog_recipe.c.dog_id, Recipe.id)
+            )
+            for row in summary_rows:
+                dogs[row.dog_id]['recipe_summaries'].append({
+                    'id': row.id,
+                    'name': row.name,
+                    'total_calories': _float(row.total_calories),
+                    'unconvertible_lines': row.unconvertible_lines
+                })
+
+        return list(dogs.values())
+
+    @staticmethod
+    def users(condition=None, include_dogs=False, include_recipes=False, order_by=None, limit=None, offset=None):
+        """
+        Build the serialized form of every user matching a condition.
+
+        Args:
+            condition: An optional SQL expression over the User columns.
+            include_dogs (bool): Whether to add a 'dog_ids' list to each user.
+            include_recipes (bool): Whether to add a 'recipe_ids' list to each user.
+            order_by (list): Optional ORDER BY expressions, the user ID is always the final tie-breaker.
+            limit (int): Optional maximum number of users to return.
+            offset (int): Optional number of users to skip.
+
+        Returns:
+            list: Dicts matching the UserSchema output.
+        """
+        user_query = db.select(
+            User.id, User.username, User.email, User.is_admin,
+            User.dog_count, User.recipe_count, User.last_active_at
+        ).order_by(*(order_by or []), User.id)
+        if condition is not None:
+            user_query = user_query.where(condition)
+        if limit is not None:
+            user_query = user_query.limit(limit).offset(offset or 0)
+
+        users = {}
+        for row in db.session.execute(user_query):
+            users[row.id] = {
+                'id': row.id,
+                'username': row.username,
+                'email': row.email,
+                'is_admin': row.is_admin,
+                'dog_count': row.dog_count,
+                'recipe_count': row.recipe_count,
+                'last_active_at': _isoformat(row.last_active_at)
+            }
+        if not users:
+            return []
+
+        # The owned IDs are fetched with one query per relationship instead of one per user
+        # A page of users is matched by its IDs, a full listing by the same filter as a subquery
+        if limit is not None:
+            user_ids = list(users)
+        else:
+            user_ids = user_query.with_only_columns(User.id).order_by(None)
+        if include_dogs:
+            for user in users.values():
+                user['dog_ids'] = []
+            for user_id, dog_id in db.session.execute(
+                db.select(Dog.user_id, Dog.id).where(Dog.user_id.in_(user_ids)).order_by(Dog.id)
+            ):
+                users[user_id]['dog_ids'].append(dog_id)
+        if include_recipes:
+            for user in users.values():
+                user['recipe_ids'] = []
+            for user_id, recipe_id in db.session.execute(
+                db.select(Recipe.user_id, Recipe.id).where(Recipe.user_id.in_(user_ids)).order_by(Recipe.id)
+            ):
+                users[user_id]['recipe_ids'].append(recipe_id)
+
+        return list(users.values())
+
+    @staticmethod
+    def ingredients(condition=None):
+        """
+        Build the serialized form of every ingredient matching a condition.
+
+        Args:
+            condition: An optional SQL expression over the Ingredient columns.
+
+        Returns:
+            list: Dicts matching the IngredientSchema output.
+        """
+        ingredient_query = db.select(
+            Ingredient.id, Ingredient.name, Ingredient.category, Ingredient.calories, Ingredient.protein,
+            Ingredient.fat, Ingredient.carbohydrates, Ingredient.fiber, Ingredient.vitamins, Ingredient.minerals
+        ).order_by(Ingredient.id)
+        if condition is not None:
+            ingredient_query = ingredient_query.where(condition)
+
+        return [
+            {
+                'id': row.id,
+                'name': row.name,
+                'category': row.category,
+                'calories': _float(row.calories),
+                'protein': _float(row.protein),
+                'fat': _float(row.fat),
+                'carbohydrates': _float(row.carbohydrates),
+                'fiber': _float(row.fiber),
+                'vitamins': row.vitamins,
+                'minerals': row.minerals
+            }
+            for row in db.session.execute(ingredient_query)
+        ]
+
+    @staticmethod
+    def recipe_nutrition(recipe_ids, condition=None):
+        """
+        Calculate the macro totals of several recipes in one aggregate query.
+
+        'recipe' is outer joined to 'recipe_ingredient' and 'ingredient' and grouped by recipe,
+        so every total is summed in the database. Lines are converted to grams in SQL and
+        follow the nutrition convention in app/utils/units.py, so the totals match the
+        Recipe.total_* properties. Lines without a mass unit are listed under 'unconvertible'.
+
+        Args:
+            recipe_ids (list): The IDs of the recipes.
+            condition: An optional SQL expression over the Recipe columns, such as a visibility check.
+
+        Returns:
+            dict: The totals of every matching recipe, keyed by recipe ID.
+        """
+        grams = grams_expression(RecipeIngredient.quantity, RecipeIngredient.unit)
+
+        def total(column):
+            return db.func.coalesce(db.func.sum(column * grams / PER_GRAMS), 0)
+
+        nutrition_query = (
+            db.select(
+                Recipe.id, Recipe.name,
+                db.func.count(RecipeIngredient.id).label('ingredient_count'),
+                total(Ingredient.calories).label('total_calories'),
+                total(Ingredient.protein).label('total_protein'),
+                total(Ingredient.fat).label('total_fat'),
+                total(Ingredient.carbohydrates).label('total_carbohydrates'),
+                total(Ingredient.fiber).label('total_fiber')
+            )
+            .outerjoin(RecipeIngredient, RecipeIngredient.recipe_id == Recipe.id)
+            .outerjoin(Ingredient, Ingredient.id == RecipeIngredient.ingredient_id)
+            .where(Recipe.id.in_(recipe_ids))
+            .group_by(Recipe.id, Recipe.name)
+            .order_by(Recipe.id)
+        )
+        if condition is not None:
+            nutrition_query = nutrition_query.where(condition)
+
+        nutrition = {
+            row.id: {
+                'recipe_id': row.id,
+                'name': row.name,
+                'ingredient_count': row.ingredient_count,
+                'total_calories': _float(row.total_calories),
+                'total_protein': _float(row.total_protein),
+                'total_fat': _float(row.total_fat),
+                'total_carbohydrates': _float(row.total_carbohydrates),
+                'total_fiber': _float(row.total_fiber)
+            }
+            for row in db.session.execute(nutrition_query)
+        }
+        unconvertible = ReadModelService.unconvertible_lines(list(nutrition)) if nutrition else {}
+        for recipe_id, recipe_nutrition in nutrition.items():
+            recipe_nutrition['unconvertible'] = unconvertible.get(recipe_id, [])
+        return nutrition
+
+    @staticmethod
+    def unconvertible_lines(recipe_ids):
+        """
+        Find the ingredient lines of several recipes that no nutrition total can count.
+
+        Totals only count lines with a mass unit (see app/utils/units.py). The other lines,
+        such as '2 cups', are returned so responses can report them instead of silently
+        leaving them out.
+
+        Args:
+            recipe_ids (list): The IDs of the recipes.
+
+        Returns:
+            dict: Lists of {'ingredient_id', 'quantity', 'unit'} keyed by recipe ID; recipes
+            without such lines are left out.
+        """
+        # Query to retrieve the lines whose unit has no mass
+        # The unit is matched in SQL the same way as the totals match it
+        rows = db.session.execute(
+            db.select(RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id, RecipeIngredient.quantity, RecipeIngredient.unit)
+            .where(RecipeIngredient.recipe_id.in_(recipe_ids), grams_per_unit_expression(RecipeIngredient.unit).is_(None))
+            .order_by(RecipeIngredient.recipe_id, RecipeIngredient.id)
+        )
+        lines = {}
+        for row in rows:
+            lines.setdefault(row.recipe_id, []).append({
+                'ingredient_id': row.ingredient_id,
+                'quantity': _float(row.quantity),
+                'unit': row.unit
+            })
+        return lines
@@ -0,0 +1,222 @@
+import time
+from app import db
+from app.models.ingredient import Ingredient
+from app.utils.units import PER_GRAMS
+
+# Energy in kcal per gram of each macronutrient
+MACRO_ENERGY = {'protein': 4.0, 'fat': 9.0, 'carbohydrates': 4.0}
+MACROS = tuple(MACRO_ENERGY)
+
+UNCATEGORISED = 'Uncategorised'
+
+class RecipeOptimizerService:
+    """
+    Formulates draft recipes from the ingredient catalog.
+
+    The problem is solved over mass shares w (one per candidate ingredient, summing to 1):
+    minimise the squared distance between the recipe's macro energy ratios and the targets,
+    subject to per-ingredient minimum shares and per-category share bounds.
+
+    The solver is Frank-Wolfe (conditional gradient). Its linear subproblem over the
+    feasible set has an exact greedy solution because every ingredient belongs to exactly
+    one category, so no external LP library is needed. Iterations stop once the duality
+    gap is small or the time budget runs out, whichever comes first.
+    """
+
+    @staticmethod
+    def load_candidates(ingredient_ids=None, include_ids=(), exclude_ids=()):
+        """
+        Load the nutrient columns of the candidate ingredients.
+
+        Args:
+            ingredient_ids (list): Optional pool to choose from, defaults to the whole catalog.
+            include_ids (list): Ingredients that must appear in the recipe.
+            exclude_ids (list): Ingredients that must not appear in the recipe.
+
+        Returns:
+            list: Rows with id, name, category and the macro columns.
+        """
+        # Query to retrieve only the columns the optimizer needs
+        query = db.select(
+            Ingredient.id, Ingredient.name, Ingredient.category, Ingredient.calories,
+            Ingredient.protein, Ingredient.fat, Ingredient.carbohydrates, Ingredient.fiber
+        ).order_by(Ingredient.id)
+        if ingredient_ids:
+            query = query.where(Ingredient.id.in_(set(ingredient_ids) | set(include_ids)))
+        if exclude_ids:
+            query = query.where(Ingredient.id.not_in(set(exclude_ids)))
+        return db.session.execute(query).all()
+
+    @staticmethod
+    def optimize(candidates, targets, total_mass, include_ids=(), category_bounds=None,
+                 min_include_share=0.05, time_budget_ms=200, tolerance=1e-6):
+        """
+        Solve for ingredient quantities that match the target macro ratios.
+
+        Args:
+            candidates (list): Ingredient rows from load_candidates.
+            targets (dict): Target share of macro energy per macro, e.g. {'protein': 0.5, 'fat': 0.45}.
+            total_mass (float): Total recipe mass in grams.
+            include_ids (list): Ingredients that must get at least 'min_include_share' of the mass.
+            category_bounds (dict): Optional {'category': {'min': share, 'max': share}} bounds.
+            min_include_share (float): Minimum mass share for each included ingredient.
+            time_budget_ms (int): Maximum solver time in milliseconds.
+            tolerance (float): Duality gap at which the solver stops early.
+
+        Returns:
+            dict: The draft recipe with quantities, achieved ratios and solver statistics.
+
+        Raises:
+            ValueError: If the constraints cannot be satisfied.
+        """
+        deadline = time.perf_counter() + time_budget_ms / 1000
+        category_bounds = category_bounds or {}
+        include_ids = set(include_ids)
+
+        n = len(candidates)
+        categories = [candidate.category or UNCATEGORISED for candidate in candidates]
+        # Macro energy per gram of each ingredient (catalog values are per 100 g, see app/utils/units.py)
+        energy = [
+            [(getattr(candidate, macro) or 0) * MACRO_ENERGY[macro] / PER_GRAMS for candidate in candidates]
+            for macro in MACROS
+        ]
+        total_energy = [sum(energy[k][i] for k in range(len(MACROS))) for i in range(n)]
+        target = [targets.get(macro, 0.0) for macro in MACROS]
+
+        lower = [min_include_share if candidate.id in include_ids else 0.0 for candidate in candidates]
+        members = {}
+        for i, category in enumerate(categories):
+            members.setdefault(category, []).append(i)
+        bounds = {}
+        for category, indices in members.items():
+            category_min = category_bounds.get(category, {}).get('min', 0.0)
+            category_max = category_bounds.get(category, {}).get('max', 1.0)
+            category_min = max(category_min, sum(lower[i] for i in indices))
+            if category_min > category_max + 1e-9:
+                raise ValueError(f"Category '{category}' cannot satisfy its bounds with the included ingredients.")
+            bounds[category] = (category_min, category_max)
+        for category, bound in category_bounds.items():
+            if category not in members and bound.get('min', 0.0) > 0:
+                raise ValueError(f"Category '{category}' has a minimum share but no candidate ingredients.")
+        if sum(low for low, _ in bounds.values()) > 1 + 1e-9 or sum(high for _, high in bounds.values()) < 1 - 1e-9:
+            raise ValueError("The category bounds cannot add up to the total mass.")
+
+        def linear_oracle(gradient):
+            # Exact minimiser of gradient . s over the feasible set:
+            # every ingredient starts at its lower bound, each category is filled to its minimum,
+            # and the remaining mass goes to the categories with the cheapest ingredient
+            s = list(lower)
+            best = {category: min(indices, key=lambda i: gradient[i]) for category, indices in members.items()}
+            allocated = {}
+            for category, indices in members.items():
+                extra = bounds[category][0] - sum(lower[i] for i in indices)
+                s[best[category]] += extra
+                allocated[category] = bounds[category][0]
+            remaining = 1 - sum(allocated.values())
+            for category in sorted(members, key=lambda c: gradient[best[c]]):
+                if remaining <= 0:
+                    break
+                room = min(bounds[category][1] - allocated[category], remaining)
+                s[best[category]] += room
+                allocated[category] += room
+                remaining -= room
+            return s
+
+        def ratios(w):
+            macro_energy = [sum(energy[k][i] * w[i] for i in range(n)) for k in range(len(MACROS))]
+            total = sum(macro_energy)
+            return macro_energy, total
+
+        def objective(w):
+            macro_energy, total = ratios(w)
+            if total <= 0:
+                return float('inf')
+            return sum((macro_energy[k] / total - target[k]) ** 2 for k in range(len(MACROS)))
+
+        def gradient(w):
+            macro_energy, total = ratios(w)
+            if total <= 0:
+                return [-value for value in total_energy]
+            residual = [macro_energy[k] / total - target[k] for k in range(len(MACROS))]
+            return [
+                sum(
+                    2 * residual[k] * (energy[k][i] * total - macro_energy[k] * total_energy[i]) / total ** 2
+                    for k in range(len(MACROS))
+                )
+                for i in range(n)
+            ]
+
+        # Start from an even spread over the feasible set: each category is filled to its
+        # minimum, the rest is shared out in proportion to the room left under each maximum,
+        # and every category's mass is split evenly between its ingredients
+        shares = {category: bounds[category][0] for category in members}
+        remaining = 1 - sum(shares.values())
+        room = {category: bounds[category][1] - shares[category] for category in members}
+        total_room = sum(room.values())
+        if remaining > 0 and total_room > 0:
+            for category in members:
+                shares[category] += room[category] * remaining / total_room
+        w = list(lower)
+        for category, indices in members.items():
+            extra = (shares[category] - sum(lower[i] for i in indices)) / len(indices)
+            for i in indices:
+                w[i] += extra
+        value = objective(w)
+
+        iterations = 0
+        converged = False
+        while time.perf_counter() < deadline:
+            iterations += 1
+            g = gradient(w)
+            s = linear_oracle(g)
+            direction = [s[i] - w[i] for i in range(n)]
+            gap = -sum(g[i] * direction[i] for i in range(n))
+            if gap <= tolerance:
+                converged = True
+                break
+            # Backtracking line search along the Frank-Wolfe direction
+            step = 1.0
+            improved = False
+            while step > 1e-4:
+                candidate_w = [w[i] + step * direction[i] for i in range(n)]
+                candidate_value = objective(candidate_w)
+                if candidate_value < value:
+                    w, value, improved = candidate_w, candidate_value, True
+                    break
+                step /= 2
+            if not improved:
+                converged = True
+                break
+
+        macro_energy, total = ratios(w)
+        ingredients = []
+        totals = {'calories': 0.0, 'protein': 0.0, 'fat': 0.0, 'carbohydrates': 0.0, 'fiber': 0.0}
+        for i, candidate in enumerate(candidates):
+            quantity = round(w[i] * total_mass, 1)
+            if quantity <= 0:
+                continue
+            ingredients.append({
+                'ingredient_id': candidate.id,
+                'ingredient_name': candidate.name,
+                'category': categories[i],
+                'quantity': quantity,
+                'unit': 'grams'
+            })
+            for nutrient in totals:
+                totals[nutrient] += (getattr(candidate, nutrient) or 0) * quantity / PER_GRAMS
+
+        return {
+            'total_mass': total_mass,
+            'ingredients': ingredients,
+            'target_ratios': dict(zip(MACROS, target)),
+            'achieved_ratios': {
+                macro: round(macro_energy[k] / total, 4) if total > 0 else 0.0
+                for k, macro in enumerate(MACROS)
+            },
+            'totals': {nutrient: round(amount, 1) for nutrient, amount in totals.items()},
+            'solver': {
+                'iterations': iterations,
+                'converged': converged,
+                'objective': round(value, 6)
+            }
+        }
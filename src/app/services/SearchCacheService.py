@@ -0,0 +1,94 @@
+import time
+from app import db
+from app.models.recipe import Recipe, recipe_generation
+from app.models.ingredient import catalog_version
+from app.utils.cache import LRUCache
+
+# Result ID lists of recent searches
+# A key holds the kind of search, the normalised query and filters, the scope ('all' for
+# admins, 'public' for everyone else, None for ingredients) and the generation of the data searched, so any committed recipe or ingredient write in this
+# process produces new keys instead of stale hits
+_search_cache = LRUCache(max_size=2048)
+
+# Writes from other processes don't move this process's generation counters, so entries
+# are also dropped once they are this old, in seconds
+MAX_AGE = 30
+
+# Searches matching more rows than this aren't cached; their ID lists would be as costly to
+# filter on as the search itself
+MAX_CACHED_IDS = 1000
+
+def normalise_query(query):
+    """
+    Normalise a search query so equivalent spellings share a cache entry.
+
+    The query is trimmed, its whitespace collapsed and it is lower-cased, which doesn't change
+    what a case-insensitive ILIKE matches. The search itself must run with the normalised query.
+    """
+    return ' '.join(query.split()).lower()
+
+def search_generation():
+    """
+    Return the generation of the data searched, which moves on every committed recipe or ingredient write.
+
+    Returns:
+        tuple: The recipe generation and the ingredient catalog version.
+    """
+    return recipe_generation(), catalog_version()
+
+class SearchCacheService:
+    @staticmethod
+    def ids(kind, query, scope, search, **filters):
+        """
+        Return the IDs matched by a search, from the cache when possible.
+
+        Args:
+            kind (str): The kind of search, such as 'recipes' or 'ingredients'.
+            query: The normalised query, or any hashable search parameter.
+            scope: 'all' or 'public' for recipe searches, or None for data every user sees.
+            search (callable): Runs the search and returns the matching IDs in result order.
+            **filters: Further filters that change the results, such as a category.
+
+        Returns:
+            list: The matching IDs.
+        """
+        key = (kind, query, tuple(sorted(filters.items())), scope, search_generation())
+        entry = _search_cache.get(key)
+        if entry is not None and time.monotonic() - entry[1] < MAX_AGE:
+            return entry[0]
+
+        ids = search()
+        if len(ids) <= MAX_CACHED_IDS:
+            _search_cache.set(key, (ids, time.monotonic()))
+        return ids
+
+    @staticmethod
+    def recipe_ids(kind, query, condition, user_id, is_admin):
+        """
+        Return the IDs of the recipes matching a search that the user can see.
+
+        Admins share one cached list of every match. For other users only the public matches
+        are cached, under a scope every user shares, and their own private matches are queried
+        on each call and merged in, so no cache entry belongs to a single user.
+
+        Args:
+            kind (str): The kind of search, such as 'recipes'.
+            query: The normalised query, or any hashable search parameter.
+            condition: The SQL condition of the search, without any visibility check.
+            user_id (int): The ID of the user searching.
+            is_admin (bool): Whether the user is an admin.
+
+        Returns:
+            list: The matching IDs, sorted.
+        """
+        def search(where):
+            return lambda: db.session.execute(db.select(Recipe.id).where(where).order_by(Recipe.id)).scalars().all()
+
+        if is_admin:
+            return SearchCacheService.ids(kind, query, 'all', search(condition))
+
+        public_ids = SearchCacheService.ids(kind, query, 'public', search(condition & (Recipe.is_public == True)))
+        # Query to retrieve the user's own private recipes matching the search
+        # This query runs on every search; caching it would mean one entry per user again
+        own_ids = search(condition & (Recipe.user_id == user_id) & (Recipe.is_public == False))()
+        return sorted(set(public_ids).union(own_ids))
@@ -0,0 +1,141 @@
+from app import db
+from app.models.ingredient import Ingredient, catalog_version
+from app.models.recipe_ingredient import RecipeIngredient
+from app.models.recipe import Recipe
+from app.models.dog_recipe import dog_recipe
+from app.utils.cache import LRUCache
+
+# Shopping lists keyed by the recipes they were built from and the versions of their inputs
+# A key holds the sorted recipe IDs, each recipe's 'updated_at' and the ingredient catalog
+# version, so editing a recipe or an ingredient produces a new key instead of a stale hit
+_shopping_list_cache = LRUCache(max_size=1024)
+
+class ShoppingListService:
+    @staticmethod
+    def cache_key(recipes):
+        """
+        Build the cache key for a shopping list.
+
+        Args:
+            recipes (list): Rows with 'id' and 'updated_at' attributes.
+
+        Returns:
+            tuple: The key for the list built from those recipes.
+        """
+        ordered = sorted(recipes, key=lambda recipe: recipe.id)
+        return (
+            tuple(recipe.id for recipe in ordered),
+            tuple(recipe.updated_at for recipe in ordered),
+            catalog_version()
+        )
+
+    @staticmethod
+    def build(recipe_ids):
+        """
+        Add up the ingredients of several recipes.
+
+        Quantities of the same ingredient are summed and keep the unit of the first line seen.
+
+        Args:
+            recipe_ids (list): The IDs of the recipes, already checked for access.
+
+        Returns:
+            list: Shopping list items in the order the ingredients were first seen.
+        """
+        # Query to retrieve the ingredient lines of every recipe
+        # This query joins recipe_ingredient to ingredient for the names, without loading ORM objects
+        rows = db.session.execute(
+            db.select(
+                RecipeIngredient.ingredient_id, RecipeIngredient.quantity, RecipeIngredient.unit,
+                Ingredient.name
+            )
+            .join(Ingredient, Ingredient.id == RecipeIngredient.ingredient_id)
+            .where(RecipeIngredient.recipe_id.in_(recipe_ids))
+            .order_by(RecipeIngredient.recipe_id, RecipeIngredient.id)
+        )
+        shopping_list = {}
+        for row in rows:
+            if row.ingredient_id in shopping_list:
+                shopping_list[row.ingredient_id]['quantity'] += row.quantity
+            else:
+                shopping_list[row.ingredient_id] = {
+                    'ingredient_id': row.ingredient_id,
+                    'name': row.name,
+                    'quantity': row.quantity,
+                    'unit': row.unit
+                }
+        return list(shopping_list.values())
+
+    @staticmethod
+    def get(recipes):
+        """
+        Return the shopping list for a set of recipes, from the cache when possible.
+
+        A hit doesn't touch 'recipe_ingredient'; the caller has already read the recipes'
+        'updated_at' values for the access check, and those are all the key needs.
+
+        Args:
+            recipes (list): Rows with 'id' and 'updated_at' attributes, already checked for access.
+
+        Returns:
+            list: Shopping list items.
+        """
+        key = ShoppingListService.cache_key(recipes)
+        shopping_list = _shopping_list_cache.get(key)
+        if shopping_list is None:
+            shopping_list = ShoppingListService.build(list(key[0]))
+            _shopping_list_cache.set(key, shopping_list)
+        return shopping_list
+
+    @staticmethod
+    def for_dogs(dog_condition, days, recipe_condition=None):
+        """
+        Build the shopping list that feeds a set of dogs for a number of days.
+
+        Each dog rotates through the recipes linked to it in 'dog_recipe', one recipe per day,
+        so over 'days' days every linked recipe is needed days / (recipes linked to that dog)
+        times. The links are resolved, weighted and summed per ingredient and unit in a single
+        SQL statement, without loading any dogs or recipes.
+
+        Args:
+            dog_condition: An SQL expression over the 'dog_recipe' columns selecting the dogs.
+            days (int): The number of days to shop for.
+            recipe_condition: An optional SQL expression over the Recipe columns, such as a visibility check.
+
+        Returns:
+            list: Shopping list items sorted by ingredient ID and unit.
+        """
+        links = (
+            db.select(
+                dog_recipe.c.dog_id,
+                dog_recipe.c.recipe_id,
+                db.func.count().over(partition_by=dog_recipe.c.dog_id).label('recipe_count')
+            )
+            .join(Recipe, Recipe.id == dog_recipe.c.recipe_id)
+            .where(dog_condition)
+        )
+        if recipe_condition is not None:
+            links = links.where(recipe_condition)
+        links = links.subquery()
+
+        # Query to aggregate the ingredients of every linked recipe
+        # This single statement joins the weighted links to recipe_ingredient and ingredient
+        # and sums the scaled quantities per ingredient and unit
+        quantity = db.func.sum(RecipeIngredient.quantity * days / links.c.recipe_count)
+        rows = db.session.execute(
+            db.select(RecipeIngredient.ingredient_id, Ingredient.name, RecipeIngredient.unit, quantity.label('quantity'))
+            .select_from(links)
+            .join(RecipeIngredient, RecipeIngredient.recipe_id == links.c.recipe_id)
+            .join(Ingredient, Ingredient.id == RecipeIngredient.ingredient_id)
+            .group_by(RecipeIngredient.ingredient_id, Ingredient.name, RecipeIngredient.unit)
+            .order_by(RecipeIngredient.ingredient_id, RecipeIngredient.unit)
+        )
+        return [
+            {
+                'ingredient_id': row.ingredient_id,
+                'name': row.name,
+                'quantity': round(float(row.quantity), 1),
+                'unit': row.unit
+            }
+            for row in rows
+        ]
@@ -0,0 +1,194 @@
+import heapq
+import math
+from datetime import timedelta
+from threading import Lock
+from app import db
+from app.models.recipe import Recipe
+from app.models.ingredient import Ingredient, catalog_version
+from app.models.recipe_ingredient import RecipeIngredient
+from app.models.tombstone import Tombstone
+from app.services.SyncService import SyncService
+from app.utils.units import to_grams, PER_GRAMS
+
+# Weight of each part of a recipe vector in the similarity score
+# The two parts are unit vectors, so the score is a weighted sum of two cosine similarities
+# and stays between 0 and 1
+INGREDIENT_WEIGHT = 0.7
+MACRO_WEIGHT = 0.3
+
+# Energy in kcal per gram of protein, fat and carbohydrates
+MACRO_ENERGY = (4.0, 9.0, 4.0)
+
+# Rows committed slightly out of order with their 'updated_at' are still picked up,
+# because each refresh looks back this far past the previous cursor
+REFRESH_OVERLAP = timedelta(seconds=5)
+
+def _normalise(values):
+    norm = math.sqrt(sum(value * value for value in values))
+    return [value / norm for value in values] if norm else [0.0 for _ in values]
+
+class _VectorStore:
+    """
+    The precomputed vectors of every recipe.
+
+    Each recipe has a sparse ingredient vector (quantity per ingredient) and a dense
+    macro profile (energy from protein, fat and carbohydrates), both normalised to unit
+    length. An inverted index maps each ingredient to the recipes that use it, so the
+    ingredient part of a query only visits recipes that share an ingredient.
+
+    Entries are (name, user_id, is_public, ingredients, protein, fat, carbohydrates).
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.version = None
+        self.cursor = None
+        self.recipes = {}
+        self.inverted = {}
+
+    def remove(self, recipe_id):
+        entry = self.recipes.pop(recipe_id, None)
+        if entry is None:
+            return
+        for ingredient_id in entry[3]:
+            postings = self.inverted.get(ingredient_id)
+            if postings is not None:
+                postings.pop(recipe_id, None)
+                if not postings:
+                    del self.inverted[ingredient_id]
+
+    def add(self, recipe_id, name, user_id, is_public, quantities, macros):
+        self.remove(recipe_id)
+        ingredient_ids = list(quantities)
+        weights = _normalise([quantities[ingredient_id] for ingredient_id in ingredient_ids])
+        ingredients = dict(zip(ingredient_ids, weights))
+        protein, fat, carbohydrates = _normalise(macros)
+        # Entries are plain tuples so the scan over every recipe stays cheap
+        self.recipes[recipe_id] = (name, user_id, bool(is_public), ingredients, protein, fat, carbohydrates)
+        for ingredient_id, weight in ingredients.items():
+            self.inverted.setdefault(ingredient_id, {})[recipe_id] = weight
+
+_store = _VectorStore()
+
+class SimilarityService:
+    @staticmethod
+    def _load(condition):
+        """
+        Compute the vectors of every recipe matching a condition and add them to the store.
+        """
+        # Query to retrieve the recipes to (re)index
+        # This query selects only the columns kept in the store
+        recipe_query = db.select(Recipe.id, Recipe.name, Recipe.user_id, Recipe.is_public)
+        if condition is not None:
+            recipe_query = recipe_query.where(condition)
+        recipes = {row.id: row for row in db.session.execute(recipe_query)}
+        if not recipes:
+            return
+
+        # Query to retrieve the macros of every ingredient
+        # The catalog is small, so each ingredient's energy per macro is computed once up front
+        energy = {
+            row.id: ((row.protein or 0) * MACRO_ENERGY[0], (row.fat or 0) * MACRO_ENERGY[1], (row.carbohydrates or 0) * MACRO_ENERGY[2])
+            for row in db.session.execute(db.select(Ingredient.id, Ingredient.protein, Ingredient.fat, Ingredient.carbohydrates))
+        }
+
+        # Query to retrieve the ingredient quantities of those recipes
+        # The recipes are matched by the same filter as a subquery, so a full build is one statement
+        recipe_ids = recipe_query.with_only_columns(Recipe.id)
+        rows = db.session.execute(
+            db.select(RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id, RecipeIngredient.quantity, RecipeIngredient.unit)
+            .where(RecipeIngredient.recipe_id.in_(recipe_ids))
+        )
+        quantities = {recipe_id: {} for recipe_id in recipes}
+        macros = {recipe_id: [0.0, 0.0, 0.0] for recipe_id in recipes}
+        for recipe_id, ingredient_id, quantity, unit in rows:
+            recipe_quantities = quantities[recipe_id]
+            recipe_quantities[ingredient_id] = recipe_quantities.get(ingredient_id, 0.0) + quantity
+            # The energy profile follows the nutrition convention in app/utils/units.py:
+            # catalog values are per 100 g and lines without a mass unit are left out
+            grams = to_grams(quantity, unit)
+            if grams is None:
+                continue
+            protein, fat, carbohydrates = energy[ingredient_id]
+            recipe_macros = macros[recipe_id]
+            recipe_macros[0] += protein * grams / PER_GRAMS
+            recipe_macros[1] += fat * grams / PER_GRAMS
+            recipe_macros[2] += carbohydrates * grams / PER_GRAMS
+
+        for recipe_id, row in recipes.items():
+            _store.add(recipe_id, row.name, row.user_id, row.is_public, quantities[recipe_id], macros[recipe_id])
+
+    @staticmethod
+    def refresh():
+        """
+        Bring the vector store up to date.
+
+        The store is built from scratch on first use and whenever the ingredient catalog
+        changes (the macro profiles depend on it). Otherwise only recipes whose 'updated_at'
+        moved since the last refresh are re-vectorised, and recipes with a tombstone are removed.
+        The caller must hold the store lock.
+        """
+        version = catalog_version()
+        cursor = SyncService.new_cursor()
+        if _store.version != version:
+            _store.recipes.clear()
+            _store.inverted.clear()
+            SimilarityService._load(None)
+        else:
+            since = _store.cursor - REFRESH_OVERLAP
+            # Query to retrieve the IDs of recipes deleted since the last refresh
+            # This query uses the index on (entity_type, deleted_at)
+            for (recipe_id,) in db.session.execute(
+                db.select(Tombstone.entity_id).where(Tombstone.entity_type == 'recipe', Tombstone.deleted_at >= since)
+            ):
+                _store.remove(recipe_id)
+            # Recipes changed since the last refresh, found through the index on Recipe.updated_at
+            SimilarityService._load(Recipe.updated_at >= since)
+        _store.version = version
+        _store.cursor = cursor
+
+    @staticmethod
+    def similar(recipe_id, user_id=None, is_admin=False, k=10):
+        """
+        Find the recipes most similar to a recipe.
+
+        Args:
+            recipe_id (int): The recipe to compare against.
+            user_id (int): The user asking; only their own and public recipes are returned.
+            is_admin (bool): Whether every recipe may be returned.
+            k (int): The maximum number of results.
+
+        Returns:
+            list: Up to k dicts with the recipe ID, name and similarity score, best first.
+            None if the recipe is not in the store.
+        """
+        with _store.lock:
+            SimilarityService.refresh()
+            target = _store.recipes.get(recipe_id)
+            if target is None:
+                return None
+
+            # Ingredient part: sparse dot products through the inverted index
+            ingredient_scores = {}
+            for ingredient_id, weight in target[3].items():
+                for other_id, other_weight in _store.inverted.get(ingredient_id, {}).items():
+                    ingredient_scores[other_id] = ingredient_scores.get(other_id, 0.0) + weight * other_weight
+
+            # Macro part: dense dot products over every visible recipe
+            protein, fat, carbohydrates = target[4:]
+            get_ingredient_score = ingredient_scores.get
+            scores = []
+            for other_id, (_, owner_id, is_public, _, other_protein, other_fat, other_carbohydrates) in _store.recipes.items():
+                if other_id == recipe_id or not (is_admin or is_public or owner_id == user_id):
+                    continue
+                score = (
+                    INGREDIENT_WEIGHT * get_ingredient_score(other_id, 0.0)
+                    + MACRO_WEIGHT * (protein * other_protein + fat * other_fat + carbohydrates * other_carbohydrates)
+                )
+                scores.append((score, -other_id, other_id))
+
+            best = heapq.nlargest(k, scores)
+            return [
+                {'recipe_id': other_id, 'name': _store.recipes[other_id][0], 'score': round(score, 4)}
+                for score, _, other_id in best
+            ]
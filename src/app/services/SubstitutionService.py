@@ -0,0 +1,109 @@
+import heapq
+import math
+from threading import Lock
+from app import db
+from app.models.ingredient import Ingredient, catalog_version
+
+# Features compared between ingredients, each standardised over the whole catalog
+FEATURES = ('calories', 'protein', 'fat', 'carbohydrates', 'fiber')
+
+# Distance added to substitutes from a different category, roughly one standard
+# deviation on one feature, so a much closer match can still outrank the category
+CATEGORY_PENALTY = 1.0
+
+class _SubstituteIndex:
+    """
+    Standardised feature vectors of every ingredient, built from one catalog version.
+    """
+
+    def __init__(self, version, rows):
+        self.version = version
+        columns = [[float(getattr(row, feature) or 0) for row in rows] for feature in FEATURES]
+        scales = []
+        for values in columns:
+            mean = sum(values) / len(values) if values else 0.0
+            spread = math.sqrt(sum((value - mean) ** 2 for value in values) / len(values)) if values else 0.0
+            scales.append((mean, spread or 1.0))
+        self.ingredients = {}
+        for index, row in enumerate(rows):
+            vector = tuple((columns[f][index] - scales[f][0]) / scales[f][1] for f in range(len(FEATURES)))
+            self.ingredients[row.id] = (row.name, row.category, float(row.calories or 0), vector)
+
+_index = {'current': None}
+_index_lock = Lock()
+
+class SubstitutionService:
+    @staticmethod
+    def index():
+        """
+        Return the substitute index for the current ingredient catalog.
+
+        The index is built on first use and rebuilt only after a committed ingredient change.
+
+        Returns:
+            _SubstituteIndex: The index for the current catalog.
+        """
+        version = catalog_version()
+        current = _index['current']
+        if current is not None and current.version == version:
+            return current
+
+        with _index_lock:
+            current = _index['current']
+            if current is not None and current.version == version:
+                return current
+            # Query to retrieve the compared columns of every ingredient
+            rows = db.session.execute(
+                db.select(Ingredient.id, Ingredient.name, Ingredient.category, *(getattr(Ingredient, f) for f in FEATURES))
+                .order_by(Ingredient.id)
+            ).all()
+            current = _SubstituteIndex(version, rows)
+            _index['current'] = current
+            return current
+
+    @staticmethod
+    def substitutes(ingredient_id, quantity=100.0, k=5):
+        """
+        Find the ingredients with the closest macro profile to an ingredient.
+
+        The catalog is small, so every ingredient is compared (brute-force nearest neighbours)
+        using the Euclidean distance between standardised features. Ingredients from another
+        category are pushed back by CATEGORY_PENALTY.
+
+        Args:
+            ingredient_id (int): The ingredient to replace.
+            quantity (float): The quantity of the ingredient to replace.
+            k (int): The maximum number of substitutes.
+
+        Returns:
+            list: Up to k substitutes, best first, each with the quantity that supplies the
+            same calories. None if the ingredient doesn't exist.
+        """
+        index = SubstitutionService.index()
+        target = index.ingredients.get(ingredient_id)
+        if target is None:
+            return None
+        _, category, calories, vector = target
+
+        candidates = []
+        for other_id, (other_name, other_category, other_calories, other_vector) in index.ingredients.items():
+            if other_id == ingredient_id:
+                continue
+            distance = math.sqrt(sum((a - b) ** 2 for a, b in zip(vector, other_vector)))
+            same_category = other_category == category
+            score = distance if same_category else distance + CATEGORY_PENALTY
+            candidates.append((score, other_id, distance, same_category))
+
+        substitutes = []
+        for score, other_id, distance, same_category in heapq.nsmallest(k, candidates):
+            other_name, other_category, other_calories, _ = index.ingredients[other_id]
+            substitutes.append({
+                'ingredient_id': other_id,
+                'name': other_name,
+                'category': other_category,
+                'same_category': same_category,
+                'distance': round(distance, 4),
+                # Scale the quantity so the substitute supplies the same calories
+                'quantity': round(quantity * calories / other_calories, 1) if other_calories else None
+            })
+        return substitutes
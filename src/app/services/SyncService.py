@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models.recipe import Recipe
+from app.models.dog import Dog
+from app.models.dog_recipe import dog_recipe
+
+# 'updated_at' is set when a row is flushed, not when its transaction commits, so a change
+# can become visible after a cursor later than its timestamp was handed out. Each feed
+# therefore looks back this far past the client's cursor; a transaction that stays open
+# longer than this between flush and commit can still be missed.
+SYNC_OVERLAP = timedelta(seconds=30)
+
+class SyncService:
+    @staticmethod
+    def parse_cursor(cursor):
+        """
+        Parse a change feed cursor.
+
+        Cursors are the ISO 8601 UTC timestamps handed out by the change feed endpoints.
+        A missing cursor means the client has nothing yet and needs a full sync.
+
+        Args:
+            cursor (str): The cursor from the 'since' query parameter, or None.
+
+        Returns:
+            datetime: The parsed cursor, or None for a full sync.
+
+        Raises:
+            ValueError: If the cursor is not a valid ISO 8601 timestamp.
+        """
+        if not cursor:
+            return None
+        try:
+            return datetime.fromisoformat(cursor)
+        except ValueError:
+            raise ValueError("Invalid cursor. Use the 'cursor' value returned by the previous sync.")
+
+    @staticmethod
+    def new_cursor():
+        """
+        Create the cursor for the current sync.
+
+        The cursor is taken before any rows are read. Rows flushed before it but committed
+        after the feed was read are picked up by the next sync, because that sync reads
+        from window_start(cursor) rather than from the cursor itself.
+
+        Returns:
+            datetime: The current UTC time.
+        """
+        return datetime.utcnow()
+
+    @staticmethod
+    def window_start(since):
+        """
+        Return the earliest 'updated_at' or 'deleted_at' a feed starting at a cursor must read.
+
+        The window overlaps the previous sync by SYNC_OVERLAP, so a row may be reported by
+        two consecutive syncs; clients apply the feed idempotently.
+
+        Args:
+            since (datetime): The client's cursor.
+
+        Returns:
+            datetime: The start of the window.
+        """
+        return since - SYNC_OVERLAP
+
+    @staticmethod
+    def touch_recipes(recipe_ids):
+        """
+        Bump 'updated_at' on recipes whose dog associations changed.
+
+        Changing the 'dog_recipe' association table does not issue an UPDATE on the
+        recipe row, so the timestamp has to be moved explicitly for the change feed.
+
+        Args:
+            recipe_ids (iterable): The IDs of the recipes to touch.
+        """
+        recipe_ids = set(recipe_ids)
+        if recipe_ids:
+            db.session.execute(
+                db.update(Recipe).where(Recipe.id.in_(recipe_ids)).values(updated_at=datetime.utcnow()),
+                execution_options={"synchronize_session": False}
+            )
+
+    @staticmethod
+    def touch_dogs(dog_ids):
+        """
+        Bump 'updated_at' on dogs whose recipe associations changed.
+
+        Args:
+            dog_ids (iterable): The IDs of the dogs to touch.
+        """
+        dog_ids = set(dog_ids)
+        if dog_ids:
+            db.session.execute(
+                db.update(Dog).where(Dog.id.in_(dog_ids)).values(updated_at=datetime.utcnow()),
+                execution_options={"synchronize_session": False}
+            )
+
+    @staticmethod
+    def linked_dog_ids(recipe_id):
+        """
+        Get the IDs of the dogs linked to a recipe straight from 'dog_recipe'.
+
+        Args:
+            recipe_id (int): The ID of the recipe.
+
+        Returns:
+            list: The IDs of the linked dogs.
+        """
+        return list(db.session.scalars(
+            db.select(dog_recipe.c.dog_id).where(dog_recipe.c.recipe_id == recipe_id)
+        ))
+
+    @staticmethod
+    def linked_recipe_ids(dog_id):
+        """
+        Get the IDs of the recipes linked to a dog straight from 'dog_recipe'.
+
+        Args:
+            dog_id (int): The ID of the dog.
+
+        Returns:
+            list: The IDs of the linked recipes.
+        """
+        return list(db.session.scalars(
+            db.select(dog_recipe.c.recipe_id).where(dog_recipe.c.dog_id == dog_id)
+        ))
@@ -0,0 +1,196 @@
+import time
+from datetime import datetime
+from threading import Lock
+from flask import current_app, g
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.revoked_token import RevokedToken
+from app.models.user import User
+from app.utils.bloom import BloomFilter
+from app.utils.route_helpers import COMPOSITE_VERIFIED
+
+# Every rebuild sizes the filter for at least this many tokens, and for twice the number
+# revoked at the time, so tokens revoked by this process until the next rebuild still fit
+MIN_FILTER_CAPACITY = 1024
+
+# The access token claim holding the user's token generation at login. Tokens issued before
+# the claim existed count as generation 0, so any revoke-all covers them.
+GENERATION_CLAIM = 'gen'
+
+# 'recent' holds the revocations this process made while a rebuild was running, which the
+# rebuild's query may have missed; they are added to the new filter before it is swapped in
+_state = {'filter': None, 'generations': {}, 'built_at': 0.0, 'recent': []}
+# Guards _state, and is only held for in-memory reads and writes
+_lock = Lock()
+# Held by the one request rebuilding the filter, while it queries the database
+_refresh_lock = Lock()
+
+class TokenRevocationService:
+    @staticmethod
+    def _is_fresh():
+        """
+        Tell whether the filter was built less than TOKEN_REVOCATION_REFRESH_INTERVAL ago; called with _lock held.
+        """
+        return _state['filter'] is not None and \
+            time.monotonic() - _state['built_at'] < current_app.config['TOKEN_REVOCATION_REFRESH_INTERVAL']
+
+    @staticmethod
+    def _refresh():
+        """
+        Rebuild the in-memory view of the revocation list when it is older than
+        TOKEN_REVOCATION_REFRESH_INTERVAL.
+
+        The jti of every unexpired revoked token goes into a Bloom filter, and each user's
+        latest revoke-all generation goes into a dict. Revocations made by this process are added
+        straight away; those made by other processes are picked up by the next rebuild.
+
+        One request rebuilds at a time, and the query and the new filter are built without
+        holding _lock, which is only taken to swap them in. Other requests keep using the
+        previous filter meanwhile; only before the first build do they wait for it.
+        """
+        with _lock:
+            if TokenRevocationService._is_fresh():
+                return
+            has_filter = _state['filter'] is not None
+        if not _refresh_lock.acquire(blocking=not has_filter):
+            return
+        try:
+            with _lock:
+                if TokenRevocationService._is_fresh():
+                    return
+                _state['recent'] = []
+
+            # Query to retrieve every revocation that still covers an unexpired token
+            # This query uses the index on 'expires_at'
+            rows = db.session.execute(
+                db.select(RevokedToken.jti, RevokedToken.user_id, RevokedToken.generation)
+                .where(RevokedToken.expires_at > datetime.utcnow())
+            ).all()
+
+            jtis = [row.jti for row in rows if row.jti is not None]
+            bloom = BloomFilter(max(2 * len(jtis), MIN_FILTER_CAPACITY), current_app.config['TOKEN_REVOCATION_ERROR_RATE'])
+            for jti in jtis:
+                bloom.add(jti)
+            generations = {}
+            for row in rows:
+                if row.jti is None:
+                    generations[row.user_id] = max(generations.get(row.user_id, 0), row.generation)
+
+            with _lock:
+                for jti, user_id, generation in _state['recent']:
+                    if jti is not None:
+                        bloom.add(jti)
+                    else:
+                        generations[user_id] = max(generations.get(user_id, 0), generation)
+                _state.update(filter=bloom, generations=generations, built_at=time.monotonic(), recent=[])
+        finally:
+            _refresh_lock.release()
+
+    @staticmethod
+    def is_revoked(jwt_header, jwt_payload):
+        """
+        Tell flask_jwt_extended whether a token has been revoked.
+
+        Registered as the token_in_blocklist_loader in create_app, so it runs for every
+        request with a token. Almost no token is revoked, and for those the Bloom filter
+        answers without touching the database. Only a jti the filter may contain is looked up
+        in the 'revoked_token' table, to rule out a false positive.
+
+        Args:
+            jwt_header (dict): The token's header.
+            jwt_payload (dict): The token's claims.
+
+        Returns:
+            bool: True if the token has been revoked.
+        """
+        TokenRevocationService._refresh()
+        with _lock:
+            generation = _state['generations'].get(jwt_payload['sub'])
+            maybe_revoked = jwt_payload['jti'] in _state['filter']
+
+        # A token from before the user's latest revoke-all carries an older generation
+        if generation is not None and jwt_payload.get(GENERATION_CLAIM, 0) < generation:
+            return True
+        if not maybe_revoked:
+            return False
+
+        # Query to check whether the token is really on the revocation list
+        # This query uses the unique index on 'jti'
+        return db.session.execute(
+            db.select(RevokedToken.id).where(RevokedToken.jti == jwt_payload['jti'])
+        ).first() is not None
+
+    @staticmethod
+    def _purge_expired():
+        """
+        Delete revocations whose tokens have all expired, through the index on 'expires_at'.
+        """
+        db.session.execute(db.delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+
+    @staticmethod
+    def revoke(jwt_payload):
+        """
+        Revoke a single token, as on logout.
+
+        Args:
+            jwt_payload (dict): The claims of the token to revoke.
+        """
+        TokenRevocationService._purge_expired()
+        try:
+            db.session.add(RevokedToken(
+                jti=jwt_payload['jti'],
+                user_id=jwt_payload['sub'],
+                expires_at=datetime.utcfromtimestamp(jwt_payload['exp'])
+            ))
+            db.session.commit()
+        except IntegrityError:
+            # The token was already revoked
+            db.session.rollback()
+        # Later sub-requests of a composite request check their token again instead of trusting it
+        g.pop(COMPOSITE_VERIFIED, None)
+
+        with _lock:
+            if _state['filter'] is not None:
+                _state['filter'].add(jwt_payload['jti'])
+            if _refresh_lock.locked():
+                _state['recent'].append((jwt_payload['jti'], None, None))
+
+    @staticmethod
+    def revoke_all(user_id):
+        """
+        Revoke every token issued to a user so far, such as after a password leak.
+
+        The user's token generation is bumped, so tokens from earlier logins carry an older
+        generation than the one recorded here, while a login made straight afterwards, even
+        within the same second, gets a token with the new one. One row is written whatever the
+        number of tokens. It is kept until the last token it covers would have expired,
+        JWT_ACCESS_TOKEN_EXPIRES after the revocation.
+
+        Args:
+            user_id (int): The user whose tokens are revoked.
+        """
+        TokenRevocationService._purge_expired()
+
+        # Query to bump the user's token generation and read the new value
+        # The UPDATE is a single atomic increment, so concurrent revocations can't both read the same value
+        db.session.execute(
+            db.update(User).where(User.id == user_id).values(token_generation=User.token_generation + 1)
+        )
+        generation = db.session.execute(db.select(User.token_generation).where(User.id == user_id)).scalar_one()
+
+        revoked_at = datetime.utcnow()
+        db.session.add(RevokedToken(
+            user_id=user_id,
+            revoked_at=revoked_at,
+            generation=generation,
+            expires_at=revoked_at + current_app.config['JWT_ACCESS_TOKEN_EXPIRES']
+        ))
+        db.session.commit()
+        # Later sub-requests of a composite request check their token again instead of trusting it
+        g.pop(COMPOSITE_VERIFIED, None)
+
+        with _lock:
+            generations = _state['generations']
+            generations[user_id] = max(generations.get(user_id, 0), generation)
+            if _refresh_lock.locked():
+                _state['recent'].append((None, user_id, generation))
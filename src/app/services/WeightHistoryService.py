@@ -0,0 +1,128 @@
+from datetime import timedelta
+from app import db
+from app.models.dog import Dog
+from app.models.weight import WeightSample, WeightRollup, WEIGHT_RESOLUTIONS, period_start, record_weights
+
+# Approximate length of each resolution's periods, in days, used to pick a resolution for a range
+PERIOD_DAYS = {'day': 1, 'week': 7, 'month': 30.44}
+
+class WeightHistoryService:
+    @staticmethod
+    def record(dog_id, weight, measured_at):
+        """
+        Record a weigh-in, which may be backdated.
+
+        Dog.weight is moved to the new value only when this is the dog's most recent weigh-in,
+        with a plain UPDATE so the Dog listeners don't record the sample a second time.
+        The caller is responsible for committing.
+
+        Args:
+            dog_id (int): The dog that was weighed.
+            weight (float): The weight in kg.
+            measured_at (datetime): When the dog was weighed, in UTC.
+
+        Returns:
+            bool: Whether the sample became the dog's current weight.
+        """
+        # Query to retrieve the time of the dog's latest weigh-in
+        # This query reads the end of the (dog_id, measured_at) index
+        latest = db.session.execute(
+            db.select(db.func.max(WeightSample.measured_at)).where(WeightSample.dog_id == dog_id)
+        ).scalar()
+        record_weights(db.session.connection(), [(dog_id, weight, measured_at)])
+
+        is_current = latest is None or measured_at >= latest
+        if is_current:
+            db.session.execute(
+                db.update(Dog).where(Dog.id == dog_id).values(weight=weight),
+                execution_options={"synchronize_session": False}
+            )
+        return is_current
+
+    @staticmethod
+    def choose_resolution(start, end, max_points):
+        """
+        Pick the finest downsampled resolution that covers a date range in at most 'max_points' points.
+
+        Args:
+            start (date): The first day of the range.
+            end (date): The last day of the range.
+            max_points (int): The maximum number of points wanted.
+
+        Returns:
+            str: 'day', 'week' or 'month'. Ranges too long for monthly points still get 'month'.
+        """
+        span_days = (end - start).days + 1
+        for resolution in WEIGHT_RESOLUTIONS:
+            if span_days / PERIOD_DAYS[resolution] <= max_points:
+                return resolution
+        return WEIGHT_RESOLUTIONS[-1]
+
+    @staticmethod
+    def series(dog_id, start=None, end=None, resolution='auto', max_points=400):
+        """
+        Return a dog's weight history over a date range.
+
+        Downsampled resolutions are read from the rollups, one row per period. 'raw' returns
+        the individual samples, at most 'max_points' of them from the start of the range.
+        'auto' picks the finest downsampled resolution that fits in 'max_points' points.
+
+        Args:
+            dog_id (int): The dog.
+            start (date): The first day to include, or None for the first weigh-in.
+            end (date): The last day to include, or None for the last weigh-in.
+            resolution (str): 'auto', 'raw', 'day', 'week' or 'month'.
+            max_points (int): The point budget for 'auto' and 'raw'.
+
+        Returns:
+            tuple: The resolution used and the list of points in date order.
+
+        Raises:
+            ValueError: If the resolution is not recognised.
+        """
+        if resolution not in ('auto', 'raw') + WEIGHT_RESOLUTIONS:
+            raise ValueError(f"Invalid resolution. Must be one of: auto, raw, {', '.join(WEIGHT_RESOLUTIONS)}.")
+
+        if resolution == 'raw':
+            # Query to retrieve the dog's samples in the range
+            # This query walks the (dog_id, measured_at) index and stops after 'max_points' rows
+            query = db.select(WeightSample.measured_at, WeightSample.weight).where(WeightSample.dog_id == dog_id)
+            if start is not None:
+                query = query.where(WeightSample.measured_at >= start)
+            if end is not None:
+                query = query.where(WeightSample.measured_at < end + timedelta(days=1))
+            rows = db.session.execute(query.order_by(WeightSample.measured_at).limit(max_points))
+            return resolution, [{'measured_at': row.measured_at.isoformat(), 'weight': row.weight} for row in rows]
+
+        if resolution == 'auto':
+            if start is None or end is None:
+                # Query to retrieve the first and last weigh-in, to size a range left open
+                # This query reads both ends of the (dog_id, measured_at) index
+                first, last = db.session.execute(
+                    db.select(db.func.min(WeightSample.measured_at), db.func.max(WeightSample.measured_at))
+                    .where(WeightSample.dog_id == dog_id)
+                ).one()
+                if first is None:
+                    return WEIGHT_RESOLUTIONS[0], []
+                start = start or first.date()
+                end = end or last.date()
+            resolution = WeightHistoryService.choose_resolution(start, end, max_points) if start <= end else WEIGHT_RESOLUTIONS[0]
+
+        # Query to retrieve the dog's rollups at the chosen resolution
+        # This query uses the unique index on (dog_id, resolution, period_start)
+        query = db.select(WeightRollup).where(WeightRollup.dog_id == dog_id, WeightRollup.resolution == resolution)
+        if start is not None:
+            query = query.where(WeightRollup.period_start >= period_start(resolution, start))
+        if end is not None:
+            query = query.where(WeightRollup.period_start <= end)
+        rollups = db.session.execute(query.order_by(WeightRollup.period_start)).scalars()
+        return resolution, [
+            {
+                'period_start': rollup.period_start.isoformat(),
+                'samples': rollup.samples,
+                'average': round(rollup.weight_sum / rollup.samples, 2),
+                'min': round(rollup.weight_min, 2),
+                'max': round(rollup.weight_max, 2)
+            }
+            for rollup in rollups
+        ]
@@ -0,0 +1,70 @@
+from collections import OrderedDict
+from threading import Lock
+
+class LRUCache:
+    """
+    A small thread-safe least-recently-used cache.
+
+    Used for in-process caches that must stay bounded in memory. Once 'max_size'
+    entries are stored, adding a new entry evicts the least recently used one.
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        """
+        Return the cached value for a key and mark it as recently used.
+
+        Args:
+            key: The cache key.
+            default: The value to return when the key is not cached.
+
+        Returns:
+            The cached value, or the default.
+        """
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key, value):
+        """
+        Store a value, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key: The cache key.
+            value: The value to store.
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """
+        Remove a key from the cache.
+
+        Args:
+            key: The cache key.
+            default: The value to return when the key is not cached.
+
+        Returns:
+            The removed value, or the default.
+        """
+        with self._lock:
+            return self._entries.pop(key, default)
+
+    def clear(self):
+        """
+        Remove every entry from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import time
+from datetime import datetime
+from functools import wraps
+from flask import current_app, request, jsonify, make_response
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.idempotency_key import IdempotencyKey
+from app.utils.negotiation import msgpack, prefers_msgpack, MSGPACK_MIMETYPES
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+# When the last sweep of expired keys ran, so each process sweeps at most once per interval
+_sweep = {'at': 0.0}
+
+def _sweep_expired_keys(cutoff):
+    """
+    Delete every expired key, at most once per IDEMPOTENCY_SWEEP_INTERVAL seconds per process.
+
+    The DELETE uses the index on 'created_at', so it only touches the expired rows.
+    """
+    now = time.monotonic()
+    if now - _sweep['at'] < current_app.config['IDEMPOTENCY_SWEEP_INTERVAL']:
+        return
+    _sweep['at'] = now
+    db.session.execute(db.delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff))
+
+def _replay(record, fingerprint):
+    """
+    Build the response for a key that has already been used.
+    """
+    if record.fingerprint != fingerprint:
+        return jsonify({
+            "error": "Idempotency key reused",
+            "message": "This Idempotency-Key was already used for a different request. Use a new key for each request."
+        }), 422
+    if record.status_code is None:
+        return jsonify({
+            "error": "Request in progress",
+            "message": "A request with this Idempotency-Key is still being processed. Retry once it has finished."
+        }), 409
+    response = _stored_response(record)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def _stored_response(record):
+    """
+    Rebuild a stored response in the format the retry asks for.
+
+    The Accept header isn't part of the fingerprint, so a retry may ask for MessagePack when
+    the first request got JSON, or the other way round. Such a body is decoded and rendered
+    again through the app's JSON provider, which picks the format from the retry's Accept.
+    """
+    stored_msgpack = record.mimetype in MSGPACK_MIMETYPES
+    if (record.mimetype == 'application/json' or stored_msgpack) and stored_msgpack != prefers_msgpack():
+        data = msgpack.unpackb(record.body) if stored_msgpack else json.loads(record.body)
+        response = current_app.json.response(data)
+        response.status_code = record.status_code
+        return response
+    response = current_app.response_class(record.body, status=record.status_code, mimetype=record.mimetype)
+    if msgpack is not None and (record.mimetype == 'application/json' or stored_msgpack):
+        response.vary.add('Accept')
+    return response
+
+def idempotent(f):
+    """
+    Make a POST endpoint safe to retry with an 'Idempotency-Key' header.
+
+    Requests without the header run as usual. The first request with a key claims it in the
+    'idempotency_key' table, runs and stores its response (unless it failed with a 5xx, in
+    which case the claim is released so the request can be retried). Later requests with the
+    same key and the same method, path and body get the stored response back without running
+    the endpoint again, in the format their own Accept header asks for and marked with an
+    'Idempotent-Replayed: true' header. A retry of a request that is still running gets a 409,
+    unless the claim is older than IDEMPOTENCY_CLAIM_TIMEOUT: the worker running it is then
+    taken to have died, and the retry takes the key over and runs the endpoint. Keys are scoped
+    to the authenticated user and expire after IDEMPOTENCY_KEY_TTL.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return f(*args, **kwargs)
+        key = key.strip()
+        if not 1 <= len(key) <= 255:
+            return jsonify({"error": "Invalid Idempotency-Key. Must be 1-255 characters long."}), 400
+
+        verify_jwt_in_request(optional=True)
+        user_id = get_jwt_identity() or 0
+        fingerprint = hashlib.sha256(
+            b'\n'.join((request.method.encode(), request.path.encode(), request.get_data()))
+        ).hexdigest()
+        now = datetime.utcnow()
+        cutoff = now - current_app.config['IDEMPOTENCY_KEY_TTL']
+        lease_cutoff = now - current_app.config['IDEMPOTENCY_CLAIM_TIMEOUT']
+        scope = (IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+
+        # Query to retrieve an earlier request with the same key
+        # This query uses the unique index on (user_id, key); an expired row is removed first
+        db.session.execute(db.delete(IdempotencyKey).where(*scope, IdempotencyKey.created_at < cutoff))
+        record = db.session.execute(db.select(IdempotencyKey).where(*scope)).scalar()
+        if record is not None:
+            if not (record.status_code is None and record.fingerprint == fingerprint and record.claimed_at < lease_cutoff):
+                return _replay(record, fingerprint)
+            # Query to take over a claim whose request never finished
+            # The UPDATE only matches a claim that is still stale, so of several retries only one takes it over
+            taken = db.session.execute(
+                db.update(IdempotencyKey)
+                .where(*scope, IdempotencyKey.status_code.is_(None), IdempotencyKey.claimed_at < lease_cutoff)
+                .values(claimed_at=now)
+            ).rowcount
+            db.session.commit()
+            if not taken:
+                record = db.session.execute(db.select(IdempotencyKey).where(*scope)).scalar()
+                return _replay(record, fingerprint)
+        else:
+            # Claim the key in its own transaction, so a concurrent retry sees it straight away
+            try:
+                _sweep_expired_keys(cutoff)
+                db.session.add(IdempotencyKey(key=key, user_id=user_id, fingerprint=fingerprint, claimed_at=now))
+                db.session.commit()
+            except IntegrityError:
+                # Another request claimed the key first
+                db.session.rollback()
+                record = db.session.execute(db.select(IdempotencyKey).where(*scope)).scalar()
+                return _replay(record, fingerprint)
+
+        # The response is stored, or the key released, only while this request still holds the
+        # claim; a retry that took the key over after the lease ran out owns it from then on
+        claim = (*scope, IdempotencyKey.claimed_at == now)
+        try:
+            response = make_response(f(*args, **kwargs))
+        except Exception:
+            db.session.rollback()
+            db.session.execute(db.delete(IdempotencyKey).where(*claim))
+            db.session.commit()
+            raise
+
+        if response.status_code >= 500:
+            # Server errors are worth retrying, so the key is released instead of storing the error
+            db.session.rollback()
+            db.session.execute(db.delete(IdempotencyKey).where(*claim))
+        else:
+            db.session.execute(
+                db.update(IdempotencyKey).where(*claim).values(
+                    status_code=response.status_code, mimetype=response.mimetype, body=response.get_data()
+                )
+            )
+        db.session.commit()
+        return response
+    return decorated_function
@@ -0,0 +1,103 @@
+import gzip
+from flask import current_app, request, has_request_context
+from flask.json.provider import DefaultJSONProvider
+
+# msgpack and brotli are optional: without them responses are JSON and compression is gzip only
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+
+# Response types worth compressing; images and already-compressed bodies are left alone
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/html', 'text/plain', 'text/csv') + MSGPACK_MIMETYPES
+
+def prefers_msgpack():
+    """
+    Return whether the current request asked for MessagePack over JSON in its Accept header.
+
+    JSON is listed first, so it wins ties such as 'Accept: */*' and clients that don't ask
+    for MessagePack keep getting JSON.
+    """
+    if msgpack is None or not has_request_context():
+        return False
+    best = request.accept_mimetypes.best_match(('application/json',) + MSGPACK_MIMETYPES)
+    return best in MSGPACK_MIMETYPES
+
+class NegotiatingJSONProvider(DefaultJSONProvider):
+    """
+    The app's JSON provider, which answers with MessagePack when the client asks for it.
+
+    Every route builds its response with jsonify, which calls response() on this provider,
+    so the data the schemas produce is packed once, straight into MessagePack, without
+    being encoded as JSON first. Values JSON can't represent natively (dates, decimals,
+    UUIDs) are converted the same way as for JSON.
+    """
+
+    def response(self, *args, **kwargs):
+        if prefers_msgpack():
+            obj = self._prepare_response_obj(args, kwargs)
+            response = self._app.response_class(msgpack.packb(obj, default=self.default), mimetype=MSGPACK_MIMETYPES[0])
+            response.vary.add('Accept')
+            return response
+        response = super().response(*args, **kwargs)
+        if msgpack is not None:
+            response.vary.add('Accept')
+        return response
+
+def _choose_encoding():
+    """
+    Pick the content encoding for the current request: brotli when available and accepted
+    at least as strongly as gzip, otherwise gzip when accepted, otherwise None.
+    """
+    accepted = request.accept_encodings
+    gzip_quality = accepted['gzip']
+    if brotli is not None and accepted['br'] and accepted['br'] >= gzip_quality:
+        return 'br'
+    if gzip_quality:
+        return 'gzip'
+    return None
+
+def compress_response(response):
+    """
+    Compress a response body when the client accepts it and the body is large enough.
+
+    Registered as an 'after_request' hook in create_app, so every blueprint benefits.
+    Bodies under COMPRESSION_MIN_SIZE bytes go out as they are, since compressing them costs
+    more CPU than the bytes saved. The levels are kept moderate (COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_BROTLI_QUALITY), which gets most of the size reduction of the top levels
+    for a fraction of the CPU time.
+
+    Args:
+        response: The response returned by the view.
+
+    Returns:
+        The same response, compressed if appropriate.
+    """
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+    if (response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers
+            or response.status_code in (204, 304) or request.method == 'HEAD'):
+        return response
+
+    config = current_app.config
+    data = response.get_data()
+    if len(data) < config['COMPRESSION_MIN_SIZE']:
+        return response
+
+    encoding = _choose_encoding()
+    if encoding == 'br':
+        response.set_data(brotli.compress(data, quality=config['COMPRESSION_BROTLI_QUALITY']))
+    elif encoding == 'gzip':
+        response.set_data(gzip.compress(data, compresslevel=config['COMPRESSION_GZIP_LEVEL'], mtime=0))
+    else:
+        return response
+    response.headers['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,60 @@
+from sqlalchemy import case
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+def _merged(column, new, how):
+    """
+    Build the expression that folds a new value into a rollup column: 'sum', 'min' or 'max'.
+    """
+    if how == 'sum':
+        return column + new
+    if how == 'min':
+        return case((column > new, new), else_=column)
+    return case((column < new, new), else_=column)
+
+def upsert_rollups(connection, table, keys, rows, merge):
+    """
+    Fold pre-aggregated deltas into rollup rows, inserting the rows that don't exist yet.
+
+    On PostgreSQL and SQLite this is a single INSERT ... ON CONFLICT DO UPDATE over all the
+    rows, so two transactions creating the same period at once both succeed: the second
+    one's insert turns into an update of the row the first one created. Other databases
+    get an UPDATE per row, then an INSERT inside a savepoint when nothing was updated,
+    retrying the UPDATE if a concurrent INSERT won the race.
+
+    Args:
+        connection: The connection to write through.
+        table: The rollup Table, with a unique constraint over 'keys'.
+        keys (tuple): The names of the columns identifying a rollup row.
+        rows (list): Dicts with the key columns and the delta of every merged column.
+            Each key must appear at most once.
+        merge (dict): How each merged column combines with the stored value: 'sum', 'min' or 'max'.
+    """
+    if not rows:
+        return
+    dialect_insert = _UPSERT_INSERTS.get(connection.dialect.name)
+    if dialect_insert is not None:
+        statement = dialect_insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c[key] for key in keys],
+            set_={column: _merged(table.c[column], statement.excluded[column], how) for column, how in merge.items()}
+        )
+        connection.execute(statement, rows)
+        return
+
+    for row in rows:
+        update = (
+            table.update()
+            .where(*(table.c[key] == row[key] for key in keys))
+            .values({column: _merged(table.c[column], row[column], how) for column, how in merge.items()})
+        )
+        if connection.execute(update).rowcount:
+            continue
+        try:
+            with connection.begin_nested():
+                connection.execute(table.insert().values(row))
+        except IntegrityError:
+            connection.execute(update)
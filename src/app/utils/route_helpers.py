@@ -1,4 +1,4 @@
-from flask import jsonify, request
+from flask import jsonify, request, current_app, g
 from functools import wraps
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
 from app.models.user import User
@@ -6,10 +6,43 @@ from sqlalchemy.exc import SQLAlchemyError
 from jwt.exceptions import PyJWTError
 from marshmallow import ValidationError
 
+BATCH_MODE_ALL_OR_NOTHING = 'all_or_nothing'
+BATCH_MODE_BEST_EFFORT = 'best_effort'
+
+# Set on g by POST /batch once it has verified its token; g belongs to the app context,
+# which the batch's sub-requests share, so they run with the claims already verified
+COMPOSITE_VERIFIED = 'composite_jwt_verified'
+
+def _verify_jwt(optional=False, **kwargs):
+    """
+    Verify the request's JWT, unless this is a sub-request of a batch that already verified it.
+
+    Checks that need more than an access token (fresh or refresh) always verify the token
+    sent with the request.
+    """
+    if not any(kwargs.values()) and g.get(COMPOSITE_VERIFIED):
+        return
+    verify_jwt_in_request(optional=optional, **kwargs)
+
+def jwt_required(optional=False, fresh=False, refresh=False):
+    """
+    Protect a route with a JWT, like flask_jwt_extended's jwt_required.
+
+    Sub-requests of POST /batch skip decoding the token and the revocation check, which the
+    batch has already done, and read the identity it verified.
+    """
+    def wrapper(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            _verify_jwt(optional, fresh=fresh, refresh=refresh)
+            return current_app.ensure_sync(f)(*args, **kwargs)
+        return decorated_function
+    return wrapper
+
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        verify_jwt_in_request()
+        _verify_jwt()
         current_user_id = get_jwt_identity()
         current_user = User.query.get_or_404(current_user_id)
         if not current_user.is_admin:
@@ -48,4 +81,55 @@ def validate_request_data(schema):
             except ValidationError as e:
                 return jsonify({"error": "Validation error", "details": e.messages}), 400
         return decorated_function
-    return decorator
\ No newline at end of file
+    return decorator
+
+def parse_batch_request(data):
+    """
+    Parse the body of a batch write request.
+
+    The body must be an object with an 'items' list and an optional 'mode', which is
+    either 'all_or_nothing' (the default) or 'best_effort'.
+
+    Args:
+        data (dict): The JSON request body.
+
+    Returns:
+        tuple: The list of items and the batch mode.
+
+    Raises:
+        ValueError: If the body is malformed or the batch is empty or too large.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('items'), list):
+        raise ValueError("Request body must be an object with an 'items' list.")
+    items = data['items']
+    mode = data.get('mode', BATCH_MODE_ALL_OR_NOTHING)
+    if mode not in (BATCH_MODE_ALL_OR_NOTHING, BATCH_MODE_BEST_EFFORT):
+        raise ValueError(f"Invalid mode. Must be '{BATCH_MODE_ALL_OR_NOTHING}' or '{BATCH_MODE_BEST_EFFORT}'.")
+    max_items = current_app.config['MAX_BATCH_SIZE']
+    if not items or len(items) > max_items:
+        raise ValueError(f"A batch must contain between 1 and {max_items} items.")
+    if not all(isinstance(item, dict) for item in items):
+        raise ValueError("Every batch item must be an object.")
+    return items, mode
+
+def parse_days_arg(default=7):
+    """
+    Read the 'days' query parameter used by the planning and shopping list endpoints.
+
+    Args:
+        default (int): The value used when the parameter is missing.
+
+    Returns:
+        int: The number of days.
+
+    Raises:
+        ValueError: If the value is not an integer between 1 and MAX_MEAL_PLAN_DAYS.
+    """
+    max_days = current_app.config['MAX_MEAL_PLAN_DAYS']
+    try:
+        days = int(request.args.get('days', default))
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid days. Must be an integer between 1 and {max_days}.")
+    if not 1 <= days <= max_days:
+        raise ValueError(f"Invalid days. Must be an integer between 1 and {max_days}.")
+    return days
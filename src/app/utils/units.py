@@ -0,0 +1,63 @@
+from sqlalchemy import case, func
+
+# Nutrition convention used throughout the API
+# Ingredient values (calories, macros and micronutrients) are per 100 g of ingredient. A recipe
+# line contributes value * grams / 100, where grams is its quantity converted with grams_per_unit;
+# lines in a unit without a mass (cups, pieces, ...) contribute nothing to any nutrition total,
+# and responses with nutrition totals list them as 'unconvertible' so the client knows.
+PER_GRAMS = 100.0
+
+# Grams per unit for the mass units accepted in RecipeIngredient.unit
+# Units are matched case-insensitively after trimming; anything else (cups, pieces, ...) has no mass
+GRAMS_PER_UNIT = {
+    'g': 1.0, 'gram': 1.0, 'grams': 1.0,
+    'kg': 1000.0, 'kilogram': 1000.0, 'kilograms': 1000.0,
+    'mg': 0.001, 'milligram': 0.001, 'milligrams': 0.001,
+    'oz': 28.3495, 'ounce': 28.3495, 'ounces': 28.3495,
+    'lb': 453.592, 'lbs': 453.592, 'pound': 453.592, 'pounds': 453.592,
+}
+
+def grams_per_unit(unit):
+    """
+    Return how many grams one of a unit weighs, or None for units that aren't a mass.
+    """
+    return GRAMS_PER_UNIT.get(unit.strip().lower()) if isinstance(unit, str) else None
+
+def to_grams(quantity, unit):
+    """
+    Convert a quantity to grams, or return None for units that aren't a mass.
+    """
+    factor = grams_per_unit(unit)
+    return float(quantity) * factor if factor is not None else None
+
+def grams_per_unit_expression(unit):
+    """
+    Build the SQL counterpart of grams_per_unit for a unit column, NULL for units that aren't a mass.
+    """
+    return case(GRAMS_PER_UNIT, value=func.lower(func.trim(unit)), else_=None)
+
+def grams_expression(quantity, unit):
+    """
+    Build the SQL counterpart of to_grams for a quantity and a unit column.
+
+    The unit is matched the same way as grams_per_unit; the expression is NULL for units
+    that aren't a mass, so SUM() leaves those lines out.
+    """
+    return quantity * grams_per_unit_expression(unit)
+
+def nutrient_amount(value, quantity, unit):
+    """
+    Return how much of a nutrient a recipe line supplies, following the convention above.
+
+    Args:
+        value (float): The ingredient's value per 100 g, or None.
+        quantity (float): The line's quantity.
+        unit (str): The line's unit.
+
+    Returns:
+        float: The amount supplied, 0 for lines without a mass unit or without a value.
+    """
+    grams = to_grams(quantity, unit)
+    if grams is None or not value:
+        return 0.0
+    return value * grams / PER_GRAMS
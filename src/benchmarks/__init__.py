@@ -0,0 +1,7 @@
+"""
+Benchmarks for the performance-sensitive services.
+
+Each module builds its own fixture in a throwaway database and prints its measurements.
+Run them from the 'src' directory, e.g. 'python -m benchmarks.autocomplete'. They use an
+in-memory SQLite database unless BENCHMARK_DATABASE_URL points somewhere else.
+"""
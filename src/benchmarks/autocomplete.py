@@ -0,0 +1,74 @@
+"""
+Latency of name autocomplete over a 100k recipe catalog.
+
+Usage: python -m benchmarks.autocomplete [recipes]
+"""
+import random
+import sys
+from datetime import datetime, timedelta
+from benchmarks.common import setup_app, create_users, timed, report_latencies
+from app import db
+from app.models.recipe import Recipe
+from app.models.ingredient import Ingredient
+from app.services.AutocompleteService import AutocompleteService
+
+WORDS = ('chicken', 'beef', 'turkey', 'salmon', 'pumpkin', 'rice', 'liver', 'stew', 'bowl', 'mix',
+         'feast', 'delight', 'supreme', 'classic', 'hearty', 'carrot', 'sweet', 'potato', 'lamb', 'duck',
+         'oat', 'kale', 'spinach', 'egg', 'cheesy', 'crunchy', 'tuna', 'venison', 'apple', 'pea')
+
+def build_fixture(recipe_count, user_count=50, ingredient_count=2000):
+    """
+    Insert recipes named from three random words, spread over 'user_count' users with a third
+    of them public, and an ingredient catalog named from two.
+    """
+    user_ids = create_users(user_count)
+    # Written a day ago, so refreshes don't see the whole fixture inside their look-back window
+    now = datetime.utcnow() - timedelta(days=1)
+    db.session.execute(db.insert(Recipe), [
+        {'name': ' '.join(random.sample(WORDS, 3)) + f' {i}', 'instructions': 'Mix.', 'is_public': i % 3 == 0,
+         'user_id': random.choice(user_ids), 'created_at': now, 'updated_at': now}
+        for i in range(recipe_count)
+    ])
+    db.session.execute(db.insert(Ingredient), [
+        {'name': ' '.join(random.sample(WORDS, 2)) + f' {i}', 'calories': 100, 'protein': 10, 'fat': 5,
+         'carbohydrates': 10, 'fiber': 0}
+        for i in range(ingredient_count)
+    ])
+    db.session.commit()
+    return user_ids
+
+def run(prefixes, user_ids, kind='recipe', is_admin=False):
+    """
+    Time one suggestion per prefix, each asked by a random user.
+    """
+    return [timed(AutocompleteService.suggest, prefix, kind, 10, random.choice(user_ids), is_admin)[1]
+            for prefix in prefixes]
+
+def main():
+    recipe_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    random.seed(1)
+    setup_app()
+    user_ids = build_fixture(recipe_count)
+    print(f'{recipe_count} recipes')
+
+    _, elapsed = timed(AutocompleteService.suggest, 'ch', 'recipe', 10, user_ids[0], False)
+    print(f'first recipe query (builds the index): {elapsed:.2f} s')
+    _, elapsed = timed(AutocompleteService.suggest, 'ch', 'ingredient', 10)
+    print(f'first ingredient query (builds the index): {elapsed * 1000:.1f} ms')
+
+    prefixes = [word[:length] for word in WORDS for length in (1, 2, 3, 4, 6)]
+    report_latencies('recipe, each prefix once', run(prefixes, user_ids))
+    report_latencies('recipe, repeated prefixes', run(random.choices(prefixes, k=5000), user_ids))
+    report_latencies('recipe, admin', run(random.choices(prefixes, k=5000), user_ids, is_admin=True))
+    report_latencies('ingredient', run(random.choices(prefixes, k=5000), [None], 'ingredient'))
+
+    # Rename one recipe, so the next query refreshes the index with just that row
+    recipe = db.session.get(Recipe, 3)
+    recipe.name = 'Chicken Zeta'
+    db.session.commit()
+    _, elapsed = timed(AutocompleteService.suggest, 'chicken z', 'recipe', 3, user_ids[0], True)
+    print(f'first query after one rename: {elapsed * 1000:.1f} ms')
+    report_latencies('recipe, after the rename', run(random.choices(prefixes, k=2000), user_ids))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import os
+import time
+
+# Point the app at a throwaway database before the config is imported
+os.environ['DATABASE_URL'] = os.environ.get('BENCHMARK_DATABASE_URL', 'sqlite:///:memory:')
+os.environ.setdefault('JWT_SECRET_KEY', 'benchmark-secret-key-benchmark-secret-key')
+
+from app import create_app, db
+from app.models.user import User
+
+def setup_app():
+    """
+    Create the app, push an app context and create the tables.
+
+    Returns:
+        Flask: The app, with its context pushed for the rest of the run.
+    """
+    app = create_app()
+    app.app_context().push()
+    db.create_all()
+    return app
+
+def create_users(count):
+    """
+    Insert 'count' users with one multi-row INSERT and return their IDs.
+    """
+    db.session.execute(db.insert(User), [
+        {'username': f'bench_user_{i}', 'email': f'bench_user_{i}@example.com', 'password_hash': 'x', 'is_admin': False}
+        for i in range(count)
+    ])
+    db.session.commit()
+    return list(db.session.scalars(db.select(User.id).order_by(User.id)))
+
+def percentile(samples, fraction):
+    """
+    Return the value at a fraction (0-1) of a list of samples, using the nearest rank.
+    """
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def timed(function, *args, **kwargs):
+    """
+    Call a function and return its result with the elapsed time in seconds.
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def report_latencies(label, samples):
+    """
+    Print the p50 and p99 of latency samples given in seconds.
+    """
+    print(f'{label}: p50 {percentile(samples, 0.5) * 1000:.3f} ms, p99 {percentile(samples, 0.99) * 1000:.3f} ms ({len(samples)} queries)')
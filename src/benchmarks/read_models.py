@@ -0,0 +1,74 @@
+"""
+Peak memory and time of the recipe listing, ORM objects + schema against the read model.
+
+Usage: python -m benchmarks.read_models [recipes]
+"""
+import json
+import sys
+import tracemalloc
+from datetime import date, datetime
+from benchmarks.common import setup_app, create_users, timed
+from app import db
+from app.models.dog import Dog
+from app.models.recipe import Recipe
+from app.models.ingredient import Ingredient
+from app.models.recipe_ingredient import RecipeIngredient
+from app.models.dog_recipe import dog_recipe
+from app.schemas.recipe_schema import recipes_schema
+from app.services.ReadModelService import ReadModelService
+
+def build_fixture(recipe_count):
+    """
+    Insert recipes with long text columns, 5 ingredient lines each and one linked dog.
+    """
+    user_id = create_users(1)[0]
+    now = datetime.utcnow()
+    db.session.execute(db.insert(Ingredient), [
+        {'name': f'Ingredient {i}', 'category': 'Meat', 'calories': 150, 'protein': 20, 'fat': 5, 'carbohydrates': 1, 'fiber': 0}
+        for i in range(1, 6)
+    ])
+    db.session.execute(db.insert(Dog), [
+        {'name': f'Dog {i}', 'breed': 'Labrador', 'date_of_birth': date(2020, 1, 1), 'weight': 20, 'age': 4,
+         'user_id': user_id, 'created_at': now, 'updated_at': now}
+        for i in range(20)
+    ])
+    db.session.execute(db.insert(Recipe), [
+        {'name': f'Recipe {i}', 'description': 'desc ' * 20, 'instructions': 'step ' * 200, 'is_public': True,
+         'user_id': user_id, 'created_at': now, 'updated_at': now}
+        for i in range(recipe_count)
+    ])
+    db.session.execute(db.insert(RecipeIngredient), [
+        {'recipe_id': recipe_id, 'ingredient_id': line, 'quantity': line * 10, 'unit': 'g'}
+        for recipe_id in range(1, recipe_count + 1) for line in range(1, 6)
+    ])
+    db.session.execute(db.insert(dog_recipe), [
+        {'dog_id': recipe_id % 20 + 1, 'recipe_id': recipe_id} for recipe_id in range(1, recipe_count + 1)
+    ])
+    db.session.commit()
+
+def measure(function):
+    """
+    Run a function on a fresh session and return its result, peak traced memory in MB and time in seconds.
+    """
+    db.session.remove()
+    tracemalloc.start()
+    result, elapsed = timed(function)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak / 1e6, elapsed
+
+def main():
+    recipe_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    setup_app()
+    build_fixture(recipe_count)
+
+    orm, orm_peak, orm_time = measure(lambda: recipes_schema.dump(Recipe.query.all()))
+    read_model, read_model_peak, read_model_time = measure(ReadModelService.recipes)
+
+    print(f'{recipe_count} recipes')
+    print(f'ORM + schema: peak {orm_peak:.1f} MB, {orm_time:.2f} s')
+    print(f'read model:   peak {read_model_peak:.1f} MB, {read_model_time:.2f} s')
+    print(f'identical output: {json.dumps(orm, sort_keys=True) == json.dumps(read_model, sort_keys=True)}')
+
+if __name__ == '__main__':
+    main()
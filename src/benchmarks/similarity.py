@@ -0,0 +1,62 @@
+"""
+Latency of similar-recipe recommendations over a 100k recipe catalog.
+
+Usage: python -m benchmarks.similarity [recipes]
+"""
+import random
+import sys
+from datetime import datetime
+from benchmarks.common import setup_app, create_users, timed, report_latencies
+from app import db
+from app.models.recipe import Recipe
+from app.models.ingredient import Ingredient
+from app.models.recipe_ingredient import RecipeIngredient
+from app.services.SimilarityService import SimilarityService
+
+CATEGORIES = ('Meat', 'Fish', 'Vegetable', 'Organ Meat')
+
+def build_fixture(recipe_count, ingredient_count=200):
+    """
+    Insert a random catalog and recipes of 3 to 8 ingredient lines, a third of them public.
+    """
+    user_id = create_users(1)[0]
+    now = datetime.utcnow()
+    db.session.execute(db.insert(Ingredient), [
+        {'name': f'Ingredient {i}', 'category': random.choice(CATEGORIES), 'calories': random.uniform(20, 300),
+         'protein': random.uniform(0, 30), 'fat': random.uniform(0, 25), 'carbohydrates': random.uniform(0, 40), 'fiber': 0}
+        for i in range(ingredient_count)
+    ])
+    db.session.execute(db.insert(Recipe), [
+        {'name': f'Recipe {i}', 'instructions': 'Mix.', 'is_public': i % 3 == 0, 'user_id': user_id,
+         'created_at': now, 'updated_at': now}
+        for i in range(recipe_count)
+    ])
+    db.session.execute(db.insert(RecipeIngredient), [
+        {'recipe_id': recipe_id, 'ingredient_id': ingredient_id, 'quantity': random.uniform(50, 500), 'unit': 'g'}
+        for recipe_id in range(1, recipe_count + 1)
+        for ingredient_id in random.sample(range(1, ingredient_count + 1), random.randint(3, 8))
+    ])
+    db.session.commit()
+    return user_id
+
+def main():
+    recipe_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    random.seed(1)
+    setup_app()
+    user_id = build_fixture(recipe_count)
+    print(f'{recipe_count} recipes')
+
+    _, elapsed = timed(SimilarityService.similar, 1, user_id, False, 10)
+    print(f'first query (builds the vector store): {elapsed:.2f} s')
+
+    samples = [timed(SimilarityService.similar, random.randint(1, recipe_count), user_id, False, 10)[1] for _ in range(200)]
+    report_latencies('warm queries', samples)
+
+    # Touch 100 recipes, so the next query re-vectorises only those
+    db.session.execute(db.update(Recipe).where(Recipe.id <= 100).values(updated_at=datetime.utcnow()))
+    db.session.commit()
+    _, elapsed = timed(SimilarityService.similar, 1, user_id, False, 10)
+    print(f'first query after 100 recipes changed: {elapsed * 1000:.1f} ms')
+
+if __name__ == '__main__':
+    main()
@@ -8,4 +8,33 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    JWT_ACCESS_TOKEN_EXPIRES = timedelta(weeks=1)
\ No newline at end of file
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(weeks=1)
+    # How often (in seconds) each process reloads the token revocation list; a token revoked
+    # by another process may be accepted for up to this long
+    TOKEN_REVOCATION_REFRESH_INTERVAL = 30
+    # False positive rate of the in-memory filter over revoked tokens; each false positive costs one query
+    TOKEN_REVOCATION_ERROR_RATE = 0.001
+    MAX_BATCH_SIZE = 100
+    # Maximum number of recipe IDs accepted by POST /recipes/nutrition
+    MAX_NUTRITION_BATCH_SIZE = 500
+    # Longest meal plan POST /meal-plans will generate, in days
+    MAX_MEAL_PLAN_DAYS = 90
+    # Maximum number of feedings accepted by one POST /dogs/<id>/feedings
+    MAX_FEEDING_BATCH_SIZE = 1000
+    # Most points GET /dogs/<id>/weights returns when it picks the resolution itself
+    WEIGHT_HISTORY_MAX_POINTS = 400
+    # Most sub-requests accepted by POST /batch
+    MAX_COMPOSITE_REQUESTS = 20
+    # How long a stored Idempotency-Key response is replayed, and how often (in seconds) expired keys are swept
+    IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+    IDEMPOTENCY_SWEEP_INTERVAL = 600
+    # How long a claimed key with no response yet blocks retries; a request still running after this is taken to have died
+    IDEMPOTENCY_CLAIM_TIMEOUT = timedelta(seconds=30)
+    # Responses smaller than this many bytes are sent uncompressed
+    COMPRESSION_MIN_SIZE = 1024
+    # Moderate levels: most of the size reduction of the top levels for much less CPU time
+    COMPRESSION_GZIP_LEVEL = 5
+    COMPRESSION_BROTLI_QUALITY = 4
+    # Default and maximum solver time for POST /recipes/optimize, in milliseconds
+    OPTIMIZER_TIME_BUDGET_MS = 200
+    OPTIMIZER_MAX_TIME_BUDGET_MS = 2000
@@ -0,0 +1,96 @@
+import os
+
+# Point the app at an in-memory database before the config is imported
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ.setdefault('JWT_SECRET_KEY', 'test-secret-key-test-secret-key-test')
+
+import bcrypt
+import pytest
+from app import create_app, db
+from app.models.user import User
+from app.models.ingredient import Ingredient
+from app.models.dog import Dog
+from app.models.recipe import Recipe
+from app.models.recipe_ingredient import RecipeIngredient
+
+PASSWORD = 'Passw0rd!x'
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        yield app
+
+@pytest.fixture(autouse=True)
+def database(app):
+    """
+    Give every test empty tables and forget what the in-process caches learnt from earlier tests.
+    """
+    reset_process_state()
+    db.create_all()
+    yield
+    db.session.remove()
+    db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def reset_process_state():
+    """
+    Reset the in-process indexes and caches, which would otherwise outlive a test's database.
+    """
+    from app.models import recipe, ingredient
+    from app.services import AutocompleteService, SimilarityService, TokenRevocationService, SearchCacheService
+    recipe._recipes['generation'] += 1
+    ingredient._catalog.update(version=ingredient._catalog['version'] + 1, stamp=None, checked_at=None)
+    AutocompleteService._state.update(ingredients=None, recipes=None, cursor=None)
+    SimilarityService._store = SimilarityService._VectorStore()
+    TokenRevocationService._state.update(filter=None, generations={}, built_at=0.0)
+    SearchCacheService._search_cache = SearchCacheService.LRUCache(max_size=2048)
+
+def create_user(username, is_admin=False):
+    """
+    Insert a user directly, skipping the registration route and its e-mail DNS check.
+    """
+    # A low bcrypt cost keeps logins fast in tests
+    user = User(username=username, email=f'{username}@example.com', is_admin=is_admin,
+                password_hash=bcrypt.hashpw(PASSWORD.encode('utf-8'), bcrypt.gensalt(4)).decode('utf-8'))
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+def login(client, username):
+    """
+    Log a user in and return the headers that authenticate as them.
+    """
+    response = client.post('/auth/login', json={'username': username, 'password': PASSWORD})
+    assert response.status_code == 200, response.get_json()
+    return {'Authorization': 'Bearer ' + response.get_json()['access_token']}
+
+def create_ingredient(name, calories=100, protein=10, fat=5, carbohydrates=10):
+    ingredient = Ingredient(name=name, category='Meat', calories=calories, protein=protein, fat=fat,
+                            carbohydrates=carbohydrates, fiber=0)
+    db.session.add(ingredient)
+    db.session.commit()
+    return ingredient.id
+
+def create_dog(user_id, name='Rex', weight=20):
+    from datetime import date
+    dog = Dog(name=name, breed='Labrador', date_of_birth=date(2020, 1, 1), weight=weight, user_id=user_id)
+    db.session.add(dog)
+    db.session.commit()
+    return dog.id
+
+def create_recipe(user_id, name='Chicken Stew', is_public=False, lines=(), dog_ids=()):
+    """
+    Insert a recipe with (ingredient_id, quantity, unit) lines and linked dogs.
+    """
+    recipe = Recipe(name=name, instructions='Cook it.', is_public=is_public, user_id=user_id)
+    recipe.ingredients = [RecipeIngredient(ingredient_id=ingredient_id, quantity=quantity, unit=unit)
+                          for ingredient_id, quantity, unit in lines]
+    recipe.dogs = [db.session.get(Dog, dog_id) for dog_id in dog_ids]
+    db.session.add(recipe)
+    db.session.commit()
+    return recipe.id
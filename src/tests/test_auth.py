@@ -0,0 +1,50 @@
+from app.services import TokenRevocationService
+from tests.conftest import create_user, login, create_dog
+
+def test_logged_out_token_is_rejected(client):
+    create_dog(create_user('alice'))
+    headers = login(client, 'alice')
+    other_session = login(client, 'alice')
+
+    assert client.post('/auth/logout', headers=headers).status_code == 200
+
+    assert client.get('/dogs/', headers=headers).status_code == 401
+    assert client.get('/dogs/', headers=other_session).status_code == 200
+
+def test_revoking_every_token_rejects_earlier_logins_only(client):
+    alice = create_user('alice')
+    create_dog(alice)
+    headers = login(client, 'alice')
+    other_session = login(client, 'alice')
+
+    assert client.post(f'/users/{alice}/revoke_tokens', headers=headers).status_code == 200
+
+    assert client.get('/dogs/', headers=headers).status_code == 401
+    assert client.get('/dogs/', headers=other_session).status_code == 401
+    # A login straight afterwards gets a token with the new generation
+    assert client.get('/dogs/', headers=login(client, 'alice')).status_code == 200
+
+def test_revocations_survive_a_rebuild_of_the_filter(client):
+    alice = create_user('alice')
+    logged_out, revoked = login(client, 'alice'), login(client, 'alice')
+    client.post('/auth/logout', headers=logged_out)
+    client.post(f'/users/{alice}/revoke_tokens', headers=revoked)
+
+    # Make the filter stale, so the next check rebuilds it from the database
+    TokenRevocationService._state['built_at'] = 0.0
+
+    assert client.get('/dogs/', headers=logged_out).status_code == 401
+    assert client.get('/dogs/', headers=revoked).status_code == 401
+    assert TokenRevocationService._state['built_at'] > 0.0
+
+def test_checks_use_the_current_filter_while_another_request_rebuilds_it(client):
+    create_dog(create_user('alice'))
+    logged_out, headers = login(client, 'alice'), login(client, 'alice')
+    client.post('/auth/logout', headers=logged_out)
+    TokenRevocationService._state['built_at'] = 0.0
+
+    # Another request holds the rebuild; checks don't wait for it
+    with TokenRevocationService._refresh_lock:
+        assert client.get('/dogs/', headers=logged_out).status_code == 401
+        assert client.get('/dogs/', headers=headers).status_code == 200
+    assert TokenRevocationService._state['built_at'] == 0.0
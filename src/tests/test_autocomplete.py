@@ -0,0 +1,42 @@
+from app import db
+from app.models.recipe import Recipe
+from app.services import AutocompleteService
+from tests.conftest import create_user, login, create_recipe
+
+def suggested(client, headers, query):
+    response = client.get(f'/search/autocomplete?q={query}&type=recipe', headers=headers)
+    return [suggestion['name'] for suggestion in response.get_json()['suggestions']]
+
+def test_recipe_suggestions_follow_visibility(client):
+    alice, bob = create_user('alice'), create_user('bob')
+    create_recipe(alice, 'Chicken Stew', is_public=True)
+    create_recipe(alice, 'Chicken Secret')
+    create_recipe(bob, 'Chicken Bowl')
+
+    assert suggested(client, login(client, 'alice'), 'chi') == ['Chicken Secret', 'Chicken Stew']
+    assert suggested(client, login(client, 'bob'), 'chi') == ['Chicken Bowl', 'Chicken Stew']
+    assert suggested(client, {}, 'chi') == ['Chicken Stew']
+
+def test_renamed_recipe_is_suggested_after_the_refresh(client):
+    alice = create_user('alice')
+    recipe_id = create_recipe(alice, 'Chicken Stew', is_public=True)
+    headers = login(client, 'alice')
+    assert suggested(client, headers, 'chi') == ['Chicken Stew']
+
+    db.session.get(Recipe, recipe_id).name = 'Turkey Stew'
+    db.session.commit()
+
+    assert suggested(client, headers, 'chi') == []
+    assert suggested(client, headers, 'tur') == ['Turkey Stew']
+
+def test_suggestions_use_the_current_index_while_another_request_refreshes_it(client):
+    alice = create_user('alice')
+    create_recipe(alice, 'Chicken Stew', is_public=True)
+    headers = login(client, 'alice')
+    assert suggested(client, headers, 'chi') == ['Chicken Stew']
+    create_recipe(alice, 'Chicken Bowl', is_public=True)
+
+    # Another request holds the refresh; suggestions come from the index it will replace
+    with AutocompleteService._refresh_locks['recipe']:
+        assert suggested(client, headers, 'chi') == ['Chicken Stew']
+    assert suggested(client, headers, 'chi') == ['Chicken Bowl', 'Chicken Stew']
@@ -0,0 +1,49 @@
+import flask_jwt_extended.view_decorators
+from tests.conftest import create_user, login, create_dog
+
+NEW_DOG = {'name': 'Max', 'breed': 'Pug', 'date_of_birth': '2021-01-01', 'weight': 8}
+
+def run_batch(client, headers, *sub_requests):
+    response = client.post('/batch', headers=headers, json={'requests': list(sub_requests)})
+    assert response.status_code == 200, response.get_json()
+    return [(item['status'], item['body']) for item in response.get_json()['responses']]
+
+def test_token_is_verified_once_per_batch(client, monkeypatch):
+    alice = create_user('alice')
+    create_dog(alice)
+    headers = login(client, 'alice')
+    decode = flask_jwt_extended.view_decorators._decode_jwt_from_request
+    calls = []
+    monkeypatch.setattr(flask_jwt_extended.view_decorators, '_decode_jwt_from_request',
+                        lambda *args, **kwargs: calls.append(1) or decode(*args, **kwargs))
+
+    responses = run_batch(client, headers, {'path': '/dogs/'}, {'path': '/dogs/'}, {'path': f'/users/{alice}'})
+
+    assert [status for status, _ in responses] == [200, 200, 200]
+    assert len(calls) == 1
+
+def test_sub_requests_see_earlier_writes(client):
+    create_user('alice')
+
+    responses = run_batch(client, login(client, 'alice'),
+                          {'method': 'POST', 'path': '/dogs/', 'body': NEW_DOG}, {'path': '/dogs/'})
+
+    assert responses[0][0] == 201
+    assert [dog['name'] for dog in responses[1][1]] == ['Max']
+
+def test_sub_requests_after_logout_are_rejected(client):
+    create_user('alice')
+    headers = login(client, 'alice')
+
+    responses = run_batch(client, headers, {'method': 'POST', 'path': '/auth/logout'}, {'path': '/dogs/'})
+
+    assert [status for status, _ in responses] == [200, 401]
+    assert client.post('/batch', headers=headers, json={'requests': [{'path': '/dogs/'}]}).status_code == 401
+
+def test_sub_requests_after_revoking_every_token_are_rejected(client):
+    alice = create_user('alice')
+    headers = login(client, 'alice')
+
+    responses = run_batch(client, headers, {'method': 'POST', 'path': f'/users/{alice}/revoke_tokens'}, {'path': '/dogs/'})
+
+    assert [status for status, _ in responses] == [200, 401]
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models.dog import Dog
+from app.models.idempotency_key import IdempotencyKey
+from tests.conftest import create_user, login
+
+NEW_DOG = {'name': 'Max', 'breed': 'Pug', 'date_of_birth': '2021-01-01', 'weight': 8}
+
+def create_dog(client, headers, key, body=NEW_DOG):
+    return client.post('/dogs/', headers={**headers, 'Idempotency-Key': key}, json=body)
+
+def test_retry_replays_the_stored_response(client):
+    create_user('alice')
+    headers = login(client, 'alice')
+
+    first = create_dog(client, headers, 'key-1')
+    retry = create_dog(client, headers, 'key-1')
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.get_json() == first.get_json()
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert Dog.query.count() == 1
+
+def test_key_reused_for_another_request_is_rejected(client):
+    create_user('alice')
+    headers = login(client, 'alice')
+    create_dog(client, headers, 'key-1')
+
+    response = create_dog(client, headers, 'key-1', {**NEW_DOG, 'name': 'Rex'})
+
+    assert response.status_code == 422
+    assert Dog.query.count() == 1
+
+def test_keys_are_scoped_to_the_user(client):
+    create_user('alice')
+    create_user('bob')
+
+    create_dog(client, login(client, 'alice'), 'key-1')
+    response = create_dog(client, login(client, 'bob'), 'key-1')
+
+    assert response.status_code == 201
+    assert 'Idempotent-Replayed' not in response.headers
+
+def leave_unfinished(key, claimed_at):
+    """
+    Turn a stored response back into a bare claim, as left by a request still running or whose worker died.
+    """
+    db.session.execute(
+        db.update(IdempotencyKey).where(IdempotencyKey.key == key)
+        .values(status_code=None, mimetype=None, body=None, claimed_at=claimed_at)
+    )
+    db.session.commit()
+
+def test_retry_while_the_request_runs_is_a_conflict(client):
+    create_user('alice')
+    headers = login(client, 'alice')
+    create_dog(client, headers, 'key-1')
+    leave_unfinished('key-1', datetime.utcnow())
+
+    response = create_dog(client, headers, 'key-1')
+
+    assert response.status_code == 409
+
+def test_retry_takes_over_a_claim_past_its_lease(client, app):
+    create_user('alice')
+    headers = login(client, 'alice')
+    create_dog(client, headers, 'key-1')
+    leave_unfinished('key-1', datetime.utcnow() - app.config['IDEMPOTENCY_CLAIM_TIMEOUT'] - timedelta(seconds=1))
+
+    retry = create_dog(client, headers, 'key-1')
+    replay = create_dog(client, headers, 'key-1')
+
+    assert retry.status_code == 201
+    assert 'Idempotent-Replayed' not in retry.headers
+    # The retry completed the key, so the next one replays its response
+    assert replay.headers['Idempotent-Replayed'] == 'true'
+    assert replay.get_json() == retry.get_json()
+
+def test_stale_claim_of_another_request_is_not_taken_over(client, app):
+    create_user('alice')
+    headers = login(client, 'alice')
+    create_dog(client, headers, 'key-1')
+    leave_unfinished('key-1', datetime.utcnow() - app.config['IDEMPOTENCY_CLAIM_TIMEOUT'] - timedelta(seconds=1))
+
+    response = create_dog(client, headers, 'key-1', {**NEW_DOG, 'name': 'Rex'})
+
+    assert response.status_code == 422
@@ -0,0 +1,43 @@
+from app import db
+from app.models.recipe import Recipe
+from tests.conftest import create_user, login, create_ingredient, create_dog, create_recipe
+
+def test_plan_rotates_through_linked_recipes(client):
+    alice = create_user('alice')
+    chicken = create_ingredient('Chicken')
+    dog_id = create_dog(alice)
+    first = create_recipe(alice, 'First Stew', lines=[(chicken, 500, 'g')], dog_ids=[dog_id])
+    second = create_recipe(alice, 'Second Stew', lines=[(chicken, 250, 'g')], dog_ids=[dog_id])
+
+    response = client.post('/meal-plans/', headers=login(client, 'alice'), json={'days': 4})
+
+    assert response.status_code == 201
+    days = response.get_json()['plan']['days']
+    assert [day['meals'][0]['recipe_id'] for day in days] == [first, second, first, second]
+
+def test_plan_skips_recipes_made_private_by_another_user(client):
+    alice, bob = create_user('alice'), create_user('bob')
+    chicken, secret = create_ingredient('Chicken'), create_ingredient('Secret Herb')
+    dog_id = create_dog(alice)
+    own = create_recipe(alice, 'Own Stew', lines=[(chicken, 500, 'g')], dog_ids=[dog_id])
+    shared = create_recipe(bob, 'Shared Stew', is_public=True, lines=[(secret, 500, 'g')], dog_ids=[dog_id])
+
+    # Bob unpublishes the recipe after Alice linked it to her dog
+    db.session.get(Recipe, shared).is_public = False
+    db.session.commit()
+
+    response = client.post('/meal-plans/', headers=login(client, 'alice'), json={'days': 4})
+
+    body = response.get_json()
+    assert {meal['recipe_id'] for day in body['plan']['days'] for meal in day['meals']} == {own}
+    assert {item['ingredient_id'] for item in body['shopping_list']} == {chicken}
+
+def test_plan_with_only_invisible_recipes_leaves_the_dog_unassigned(client):
+    alice, bob = create_user('alice'), create_user('bob')
+    chicken = create_ingredient('Chicken')
+    dog_id = create_dog(alice)
+    create_recipe(bob, 'Bob Stew', lines=[(chicken, 500, 'g')], dog_ids=[dog_id])
+
+    response = client.post('/meal-plans/', headers=login(client, 'alice'), json={'days': 2})
+
+    assert response.get_json()['plan']['unassigned_dog_ids'] == [dog_id]
@@ -0,0 +1,52 @@
+import pytest
+from tests.conftest import create_user, login, create_ingredient, create_recipe
+
+@pytest.fixture
+def recipes():
+    """
+    Alice's private recipe and public recipe, and Bob's private recipe.
+    """
+    alice, bob = create_user('alice'), create_user('bob')
+    chicken = create_ingredient('Chicken', calories=165, protein=31, fat=3.6, carbohydrates=0)
+    pumpkin = create_ingredient('Pumpkin', calories=26, protein=1, fat=0.1, carbohydrates=6)
+    return {
+        'private': create_recipe(alice, 'Alice Private', lines=[(chicken, 200, 'g'), (pumpkin, 0.1, 'kg')]),
+        'public': create_recipe(alice, 'Alice Public', is_public=True, lines=[(chicken, 100, 'g'), (pumpkin, 2, 'cups')]),
+        'bob': create_recipe(bob, 'Bob Private', lines=[(chicken, 300, 'g')]),
+        'pumpkin': pumpkin
+    }
+
+def test_totals_are_per_100_grams_of_mass(client, recipes):
+    response = client.post('/recipes/nutrition', headers=login(client, 'alice'),
+                           json={'recipe_ids': [recipes['private']], 'include_micronutrients': False})
+
+    recipe = response.get_json()['recipes'][0]
+    # 200 g of chicken and 0.1 kg of pumpkin: 2 x 165 + 1 x 26
+    assert recipe['total_calories'] == pytest.approx(356.0)
+    assert recipe['unconvertible'] == []
+
+def test_lines_without_a_mass_are_reported_as_unconvertible(client, recipes):
+    headers = login(client, 'alice')
+
+    nutrition = client.post('/recipes/nutrition', headers=headers,
+                            json={'recipe_ids': [recipes['public']], 'include_micronutrients': False}).get_json()
+    nutrients = client.get(f"/recipes/{recipes['public']}/nutrients", headers=headers).get_json()
+
+    expected = [{'ingredient_id': recipes['pumpkin'], 'quantity': 2.0, 'unit': 'cups'}]
+    assert nutrition['recipes'][0]['total_calories'] == pytest.approx(165.0)
+    assert nutrition['recipes'][0]['unconvertible'] == expected
+    assert nutrients['unconvertible'] == expected
+
+def test_other_users_private_recipes_are_unavailable(client, recipes):
+    response = client.post('/recipes/nutrition', headers=login(client, 'bob'),
+                           json={'recipe_ids': [recipes['private'], recipes['public'], recipes['bob'], 999]})
+
+    body = response.get_json()
+    assert [recipe['recipe_id'] for recipe in body['recipes']] == sorted([recipes['public'], recipes['bob']])
+    # Another user's private recipe is indistinguishable from one that doesn't exist
+    assert body['unavailable_ids'] == [recipes['private'], 999]
+
+def test_micronutrients_of_a_private_recipe_are_forbidden(client, recipes):
+    response = client.get(f"/recipes/{recipes['private']}/nutrients", headers=login(client, 'bob'))
+
+    assert response.status_code == 403
@@ -0,0 +1,59 @@
+import pytest
+from tests.conftest import create_user, login, create_ingredient, create_dog, create_recipe
+
+@pytest.fixture
+def household():
+    """
+    Alice with a 20 kg dog, a recipe with a line in cups and a recipe measured only in cups.
+    """
+    alice = create_user('alice')
+    chicken = create_ingredient('Chicken', calories=165, protein=31, fat=3.6, carbohydrates=0)
+    pumpkin = create_ingredient('Pumpkin', calories=26, protein=1, fat=0.1, carbohydrates=6)
+    dog_id = create_dog(alice)
+    return {
+        'dog': dog_id,
+        'chicken': chicken,
+        'pumpkin': pumpkin,
+        'mixed': create_recipe(alice, 'Mixed Stew', lines=[(chicken, 500, 'g'), (pumpkin, 2, 'cups')], dog_ids=[dog_id]),
+        'cups': create_recipe(alice, 'Cup Stew', lines=[(pumpkin, 3, 'cups')])
+    }
+
+def test_only_mass_lines_are_scaled(client, household):
+    headers = login(client, 'alice')
+
+    response = client.get(f"/recipes/{household['mixed']}/scaled?dog_id={household['dog']}&days=2", headers=headers)
+
+    assert response.status_code == 200
+    body = response.get_json()
+    scale = body['target_grams'] / 500
+    assert body['recipe_grams'] == 500.0
+    assert body['ingredients'] == [
+        {'ingredient_id': household['chicken'], 'name': 'Chicken', 'quantity': pytest.approx(500 * scale, abs=1e-3),
+         'unit': 'g', 'unconvertible': False},
+        {'ingredient_id': household['pumpkin'], 'name': 'Pumpkin', 'quantity': 2.0, 'unit': 'cups', 'unconvertible': True}
+    ]
+    # The totals only count the chicken, so they scale with it
+    assert body['nutrition']['total_calories'] == pytest.approx(5 * 165 * scale, abs=0.1)
+
+def test_recipe_without_mass_lines_is_unprocessable(client, household):
+    headers = login(client, 'alice')
+
+    single = client.get(f"/recipes/{household['cups']}/scaled?dog_id={household['dog']}", headers=headers)
+    batch = client.post('/recipes/scaled', headers=headers, json={'items': [
+        {'recipe_id': household['mixed'], 'dog_id': household['dog']},
+        {'recipe_id': household['cups'], 'dog_id': household['dog']}
+    ]})
+
+    assert single.status_code == 422
+    assert batch.status_code == 207
+    assert [result['status'] for result in batch.get_json()['results']] == [200, 422]
+
+def test_meal_plan_shopping_list_keeps_non_mass_lines_as_written(client, household):
+    response = client.post('/meal-plans/', headers=login(client, 'alice'), json={'days': 3})
+
+    shopping_list = {item['ingredient_id']: item for item in response.get_json()['shopping_list']}
+    daily_grams = response.get_json()['plan']['daily_food_grams'][str(household['dog'])]
+    assert shopping_list[household['chicken']]['quantity'] == pytest.approx(3 * daily_grams, abs=0.1)
+    assert shopping_list[household['chicken']]['unconvertible'] is False
+    assert shopping_list[household['pumpkin']]['quantity'] == 2.0
+    assert shopping_list[household['pumpkin']]['unconvertible'] is True
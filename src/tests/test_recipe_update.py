@@ -0,0 +1,83 @@
+from app import db
+from app.models.recipe import Recipe
+from app.models.recipe_ingredient import RecipeIngredient
+from tests.conftest import create_user, login, create_ingredient, create_dog, create_recipe
+
+def ingredient_lines(recipe_id):
+    return sorted(
+        (line.ingredient_id, line.quantity, line.unit)
+        for line in RecipeIngredient.query.filter_by(recipe_id=recipe_id)
+    )
+
+def test_update_diffs_ingredient_lines(client):
+    user_id = create_user('alice')
+    chicken, rice, pumpkin = create_ingredient('Chicken'), create_ingredient('Rice'), create_ingredient('Pumpkin')
+    recipe_id = create_recipe(user_id, lines=[(chicken, 200, 'g'), (rice, 100, 'g')])
+    unchanged_line_id = RecipeIngredient.query.filter_by(recipe_id=recipe_id, ingredient_id=chicken).one().id
+
+    response = client.put(f'/recipes/{recipe_id}', headers=login(client, 'alice'), json={
+        'ingredients': [
+            {'ingredient_id': chicken, 'quantity': 200, 'unit': 'g'},
+            {'ingredient_id': pumpkin, 'quantity': 50, 'unit': 'g'}
+        ]
+    })
+
+    assert response.status_code == 200
+    assert ingredient_lines(recipe_id) == [(chicken, 200, 'g'), (pumpkin, 50, 'g')]
+    # The unchanged line keeps its row instead of being deleted and inserted again
+    assert RecipeIngredient.query.filter_by(recipe_id=recipe_id, ingredient_id=chicken).one().id == unchanged_line_id
+
+def test_update_links_and_unlinks_dogs(client):
+    user_id = create_user('alice')
+    rex, max_ = create_dog(user_id, 'Rex'), create_dog(user_id, 'Max')
+    recipe_id = create_recipe(user_id, dog_ids=[rex])
+
+    response = client.put(f'/recipes/{recipe_id}', headers=login(client, 'alice'), json={'dog_ids': [max_]})
+
+    assert response.status_code == 200
+    assert response.get_json()['dog_ids'] == [max_]
+    db.session.expire_all()
+    assert db.session.get(Recipe, recipe_id).dog_ids == [max_]
+
+def test_rejected_dog_leaves_no_pending_changes(client):
+    alice, bob = create_user('alice'), create_user('bob')
+    chicken, rice = create_ingredient('Chicken'), create_ingredient('Rice')
+    recipe_id = create_recipe(alice, lines=[(chicken, 200, 'g')])
+    bobs_dog = create_dog(bob, 'Fido')
+
+    response = client.put(f'/recipes/{recipe_id}', headers=login(client, 'alice'), json={
+        'name': 'Renamed Stew',
+        'ingredients': [{'ingredient_id': rice, 'quantity': 80, 'unit': 'g'}],
+        'dog_ids': [bobs_dog]
+    })
+    assert response.status_code == 403
+
+    # Nothing was changed in the session, so a later commit in the same context writes nothing
+    db.session.commit()
+    db.session.expire_all()
+    assert db.session.get(Recipe, recipe_id).name == 'Chicken Stew'
+    assert ingredient_lines(recipe_id) == [(chicken, 200, 'g')]
+
+def test_missing_ingredient_leaves_recipe_unchanged(client):
+    user_id = create_user('alice')
+    chicken = create_ingredient('Chicken')
+    recipe_id = create_recipe(user_id, lines=[(chicken, 200, 'g')])
+
+    response = client.put(f'/recipes/{recipe_id}', headers=login(client, 'alice'), json={
+        'name': 'Renamed Stew',
+        'ingredients': [{'ingredient_id': 999, 'quantity': 80, 'unit': 'g'}]
+    })
+
+    assert response.status_code == 400
+    db.session.commit()
+    db.session.expire_all()
+    assert db.session.get(Recipe, recipe_id).name == 'Chicken Stew'
+
+def test_other_users_recipe_is_forbidden(client):
+    alice = create_user('alice')
+    create_user('bob')
+    recipe_id = create_recipe(alice)
+
+    response = client.put(f'/recipes/{recipe_id}', headers=login(client, 'bob'), json={'name': 'Stolen Stew'})
+
+    assert response.status_code == 403
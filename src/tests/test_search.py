@@ -0,0 +1,47 @@
+from app import db
+from app.services import SearchCacheService
+from tests.conftest import create_user, login, create_ingredient, create_recipe
+
+def searched_ids(client, headers, path='/search/recipes?q=stew'):
+    response = client.get(path, headers=headers)
+    return [recipe['id'] for recipe in response.get_json()] if response.status_code == 200 else []
+
+def cached_scopes():
+    return sorted({key[3] for key in SearchCacheService._search_cache._entries}, key=str)
+
+def test_users_see_public_and_their_own_recipes(client):
+    alice, bob = create_user('alice'), create_user('bob')
+    public = create_recipe(alice, 'Public Stew', is_public=True)
+    private = create_recipe(alice, 'Private Stew')
+    bobs = create_recipe(bob, 'Bob Stew')
+
+    assert searched_ids(client, login(client, 'alice')) == [public, private]
+    assert searched_ids(client, login(client, 'bob')) == [public, bobs]
+    # Both searches share the one cached list of public matches
+    assert cached_scopes() == ['public']
+
+def test_admins_see_every_recipe(client):
+    alice = create_user('alice')
+    create_user('root', is_admin=True)
+    private = create_recipe(alice, 'Private Stew')
+
+    assert searched_ids(client, login(client, 'root')) == [private]
+    assert cached_scopes() == ['all']
+
+def test_recipe_made_private_behind_the_cache_is_hidden(client):
+    alice = create_user('alice')
+    create_user('bob')
+    chicken = create_ingredient('Chicken')
+    recipe_id = create_recipe(alice, 'Public Stew', is_public=True, lines=[(chicken, 100, 'g')])
+    bob = login(client, 'bob')
+    by_ingredient = f'/search/recipes/by_ingredient?ingredient_id={chicken}'
+    assert searched_ids(client, bob) == [recipe_id]
+    assert searched_ids(client, bob, by_ingredient) == [recipe_id]
+
+    # A write that doesn't go through the ORM leaves this process's cached IDs in place
+    db.session.execute(db.text('UPDATE recipe SET is_public = 0 WHERE id = :id'), {'id': recipe_id})
+    db.session.commit()
+
+    assert searched_ids(client, bob) == []
+    assert searched_ids(client, bob, by_ingredient) == []
+    assert searched_ids(client, login(client, 'alice')) == [recipe_id]
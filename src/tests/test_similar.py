@@ -0,0 +1,40 @@
+from app import db
+from app.models.recipe import Recipe
+from tests.conftest import create_user, login, create_ingredient, create_recipe
+
+def similar_ids(client, headers, recipe_id):
+    response = client.get(f'/recipes/{recipe_id}/similar', headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return {recipe['recipe_id'] for recipe in response.get_json()['similar']}
+
+def test_only_visible_recipes_are_recommended(client):
+    alice, bob = create_user('alice'), create_user('bob')
+    chicken = create_ingredient('Chicken')
+    target = create_recipe(alice, 'Chicken Stew', is_public=True, lines=[(chicken, 100, 'g')])
+    public = create_recipe(bob, 'Chicken Bowl', is_public=True, lines=[(chicken, 200, 'g')])
+    private = create_recipe(bob, 'Chicken Mix', lines=[(chicken, 300, 'g')])
+
+    assert similar_ids(client, login(client, 'alice'), target) == {public}
+    assert similar_ids(client, login(client, 'bob'), target) == {public, private}
+
+def test_recipe_made_private_drops_out_of_recommendations(client):
+    alice, bob = create_user('alice'), create_user('bob')
+    chicken = create_ingredient('Chicken')
+    target = create_recipe(alice, 'Chicken Stew', is_public=True, lines=[(chicken, 100, 'g')])
+    shared = create_recipe(bob, 'Chicken Bowl', is_public=True, lines=[(chicken, 200, 'g')])
+    headers = login(client, 'alice')
+    assert similar_ids(client, headers, target) == {shared}
+
+    db.session.get(Recipe, shared).is_public = False
+    db.session.commit()
+
+    assert similar_ids(client, headers, target) == set()
+
+def test_private_recipe_is_forbidden(client):
+    alice = create_user('alice')
+    create_user('bob')
+    recipe_id = create_recipe(alice)
+
+    response = client.get(f'/recipes/{recipe_id}/similar', headers=login(client, 'bob'))
+
+    assert response.status_code == 403